@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+约束组卷
+根据总分、难度分布（按分值占比）与各题型题数，从题库中求解一组题目，
+输出可直接交给 generate_exam.py 渲染的试卷 JSON；支持一次生成 K 份互不重复的试卷
+
+求解方法：按 (题型, 难度, 分值) 将候选题归类，先按难度比例贪心分配，
+再以“单次/成对调换”做局部修复，使总分与各难度分值尽量贴合目标。
+求解规模只与类别数有关，与题库大小无关。
+
+使用方法:
+    python assemble_exam.py --subject 化学 --total-score 100 \\
+        --difficulty easy=0.4,medium=0.4,hard=0.2 \\
+        --type multiple_choice:25 --type comprehensive:5 -o outputs/组卷.json
+    python assemble_exam.py --template examples/chemistry_exam_example.json --pool examples/*.json -k 3 -o outputs/卷.json
+"""
+
+import argparse
+import itertools
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from question_bank import DEFAULT_DB, QuestionBank, build_exam
+
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+# 目标函数中总分偏差的权重（高于难度分布偏差）
+TOTAL_WEIGHT = 2.0
+
+
+class AssemblyError(ValueError):
+    """约束无法满足"""
+
+
+class ExamConstraints:
+    """组卷约束"""
+
+    def __init__(
+        self,
+        type_counts: Dict[str, int],
+        total_score: Optional[float] = None,
+        difficulty_distribution: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Args:
+            type_counts: 各题型题数，如 {'multiple_choice': 15}
+            total_score: 目标总分
+            difficulty_distribution: 各难度分值占比，如 {'easy': 0.4, 'medium': 0.4, 'hard': 0.2}
+        """
+        self.type_counts = {t: n for t, n in type_counts.items() if n > 0}
+        self.total_score = total_score
+        self.difficulty_distribution = difficulty_distribution or {}
+
+        if not self.type_counts:
+            raise AssemblyError('至少需要指定一种题型及题数')
+        share = sum(self.difficulty_distribution.values())
+        if self.difficulty_distribution and abs(share - 1.0) > 1e-6:
+            # 允许写成百分数或未归一化的比例
+            self.difficulty_distribution = {d: v / share for d, v in self.difficulty_distribution.items()}
+
+    @classmethod
+    def from_exam(cls, data: Dict[str, Any]) -> 'ExamConstraints':
+        """以一份试卷为模板：沿用其 meta 中的总分/难度分布和各题型题数"""
+        meta = data.get('meta', {})
+        type_counts: Dict[str, int] = {}
+        for section in data.get('sections', []):
+            question_type = section.get('type', '')
+            type_counts[question_type] = type_counts.get(question_type, 0) + len(section.get('questions', []))
+        return cls(type_counts, meta.get('total_score'), meta.get('difficulty_distribution'))
+
+    def difficulty_targets(self) -> Dict[str, float]:
+        """各难度的目标分值"""
+        if not self.total_score or not self.difficulty_distribution:
+            return {}
+        return {d: self.total_score * share for d, share in self.difficulty_distribution.items()}
+
+
+class ExamAssembler:
+    """贪心 + 局部修复组卷器"""
+
+    def __init__(self, candidates: List[Tuple], constraints: ExamConstraints, seed: Optional[int] = None):
+        """
+        Args:
+            candidates: (id, question_type, difficulty, points) 元组列表
+            constraints: 组卷约束
+            seed: 随机种子（同一种子、同一题库得到相同结果）
+        """
+        self.constraints = constraints
+        self.rng = random.Random(seed)
+
+        # 按 (题型, 难度, 分值) 归类
+        self.classes: Dict[Tuple[str, str, float], List[int]] = {}
+        for qid, question_type, difficulty, points in candidates:
+            if question_type not in constraints.type_counts:
+                continue
+            key = (question_type, difficulty or '', float(points or 0))
+            self.classes.setdefault(key, []).append(qid)
+        for ids in self.classes.values():
+            self.rng.shuffle(ids)
+
+    def assemble(self, k: int = 1, time_limit: float = 1.0) -> List[Dict[str, Any]]:
+        """
+        生成 k 份互不重复的试卷选题
+
+        Returns:
+            每份试卷的 {'ids': [...], 'score': 总分, 'by_difficulty': {...}, 'objective': 偏差}
+        """
+        papers = []
+        deadline = time.perf_counter() + time_limit * k
+        for _ in range(k):
+            counts = self._initial_counts()
+            counts = self._repair(counts, deadline)
+            ids = self._take(counts)
+            papers.append(self._summary(counts, ids))
+        return papers
+
+    # ---------- 求解 ----------
+
+    def _available(self) -> Dict[Tuple, int]:
+        return {key: len(ids) for key, ids in self.classes.items()}
+
+    def _initial_counts(self) -> Dict[Tuple, int]:
+        """按难度比例贪心分配各题型的题数"""
+        available = self._available()
+        distribution = self.constraints.difficulty_distribution
+        counts = {key: 0 for key in self.classes}
+
+        for question_type, need in self.constraints.type_counts.items():
+            keys = [key for key in self.classes if key[0] == question_type]
+            if sum(available[key] for key in keys) < need:
+                raise AssemblyError(
+                    f'题型 {question_type} 可用题目不足：需要 {need}，仅剩 {sum(available[k] for k in keys)}'
+                )
+
+            # 最大余数法把题数分到各难度
+            quotas: Dict[str, int] = {}
+            if distribution:
+                raw = {d: need * distribution.get(d, 0.0) for d in DIFFICULTIES}
+                quotas = {d: int(v) for d, v in raw.items()}
+                remainder = need - sum(quotas.values())
+                for d in sorted(raw, key=lambda d: raw[d] - quotas[d], reverse=True)[:remainder]:
+                    quotas[d] += 1
+
+            remaining = need
+            for difficulty, quota in quotas.items():
+                for key in sorted((k for k in keys if k[1] == difficulty), key=lambda k: -available[k]):
+                    take = min(quota, available[key] - counts[key])
+                    counts[key] += take
+                    quota -= take
+                    remaining -= take
+
+            # 不足部分从任意难度补齐
+            for key in sorted(keys, key=lambda k: -available[k]):
+                take = min(remaining, available[key] - counts[key])
+                counts[key] += take
+                remaining -= take
+
+        return counts
+
+    def _objective(self, counts: Dict[Tuple, int]) -> float:
+        total = 0.0
+        by_difficulty: Dict[str, float] = {}
+        for (_, difficulty, points), n in counts.items():
+            if n:
+                total += points * n
+                by_difficulty[difficulty] = by_difficulty.get(difficulty, 0.0) + points * n
+
+        value = 0.0
+        if self.constraints.total_score:
+            value += TOTAL_WEIGHT * abs(total - self.constraints.total_score)
+        for difficulty, target in self.constraints.difficulty_targets().items():
+            value += abs(by_difficulty.get(difficulty, 0.0) - target)
+        return value
+
+    def _moves(self, counts: Dict[Tuple, int]) -> List[Tuple[Tuple, Tuple]]:
+        """同题型内把一道题从类别 a 换到类别 b 的所有可行调换"""
+        available = self._available()
+        moves = []
+        for a, b in itertools.permutations(self.classes, 2):
+            if a[0] == b[0] and counts[a] > 0 and counts[b] < available[b]:
+                moves.append((a, b))
+        return moves
+
+    @staticmethod
+    def _apply(counts: Dict[Tuple, int], moves) -> Dict[Tuple, int]:
+        result = dict(counts)
+        for a, b in moves:
+            result[a] -= 1
+            result[b] += 1
+        return result
+
+    def _repair(self, counts: Dict[Tuple, int], deadline: float) -> Dict[Tuple, int]:
+        """局部修复：反复采用使偏差下降最多的单次或成对调换"""
+        current = self._objective(counts)
+        available = self._available()
+        while current > 1e-9 and time.perf_counter() < deadline:
+            moves = self._moves(counts)
+            self.rng.shuffle(moves)
+
+            best, best_value = None, current
+            for move in moves:
+                value = self._objective(self._apply(counts, [move]))
+                if value < best_value - 1e-9:
+                    best, best_value = [move], value
+
+            if best is None:
+                # 单次调换陷入局部最优时尝试成对调换
+                for m1, m2 in itertools.combinations(moves, 2):
+                    trial = self._apply(counts, [m1, m2])
+                    if any(v < 0 or v > available[k] for k, v in trial.items()):
+                        continue
+                    value = self._objective(trial)
+                    if value < best_value - 1e-9:
+                        best, best_value = [m1, m2], value
+                        break
+                    if time.perf_counter() > deadline:
+                        break
+
+            if best is None:
+                break
+            counts = self._apply(counts, best)
+            current = best_value
+        return counts
+
+    def _take(self, counts: Dict[Tuple, int]) -> List[int]:
+        """从各类别中取出题目，并从候选中移除（保证多份试卷互不重复）"""
+        ids = []
+        for key, n in counts.items():
+            if n:
+                ids.extend(self.classes[key][:n])
+                self.classes[key] = self.classes[key][n:]
+        return ids
+
+    def _summary(self, counts: Dict[Tuple, int], ids: List[int]) -> Dict[str, Any]:
+        by_difficulty: Dict[str, float] = {}
+        for (_, difficulty, points), n in counts.items():
+            if n:
+                by_difficulty[difficulty or '-'] = by_difficulty.get(difficulty or '-', 0.0) + points * n
+        return {
+            'ids': ids,
+            'score': sum(by_difficulty.values()),
+            'by_difficulty': by_difficulty,
+            'objective': self._objective(counts),
+        }
+
+
+def _parse_distribution(value: str) -> Dict[str, float]:
+    """解析 easy=0.4,medium=0.4,hard=0.2"""
+    result = {}
+    for part in value.split(','):
+        name, _, share = part.partition('=')
+        result[name.strip()] = float(share)
+    return result
+
+
+def _output_path(base: str, index: int, k: int) -> str:
+    if k == 1:
+        return base
+    path = Path(base)
+    return str(path.with_name(f'{path.stem}_{index + 1}{path.suffix}'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='约束组卷：按总分、难度分布与题型题数从题库选题')
+    parser.add_argument('--db', default=str(DEFAULT_DB), help='题库文件路径')
+    parser.add_argument('--pool', nargs='+', help='直接以这些试卷 JSON 作为题目池（不使用题库文件）')
+    parser.add_argument('--template', help='以该试卷的 meta 与各题型题数作为约束')
+    parser.add_argument('--subject', help='学科')
+    parser.add_argument('--kp', action='append', help='限定知识点（可重复）')
+    parser.add_argument('--total-score', type=float, help='目标总分')
+    parser.add_argument('--difficulty', help='难度分值占比，如 easy=0.4,medium=0.4,hard=0.2')
+    parser.add_argument('--type', action='append', help='题型及题数，如 multiple_choice:15（可重复）')
+    parser.add_argument('-k', type=int, default=1, help='生成互不重复的试卷份数')
+    parser.add_argument('--seed', type=int, help='随机种子')
+    parser.add_argument('--time-limit', type=float, default=1.0, help='每份试卷的求解时限（秒）')
+    parser.add_argument('--title', default='', help='试卷标题')
+    parser.add_argument('--duration', type=int, default=90, help='考试时长（分钟）')
+    parser.add_argument('-o', '--output', required=True, help='输出的试卷 JSON（多份时自动加序号）')
+
+    args = parser.parse_args()
+
+    meta: Dict[str, Any] = {}
+    if args.template:
+        with open(args.template, 'r', encoding='utf-8') as f:
+            template = json.load(f)
+        constraints = ExamConstraints.from_exam(template)
+        meta = dict(template.get('meta', {}))
+    else:
+        constraints = None
+
+    type_counts = constraints.type_counts if constraints else {}
+    if args.type:
+        type_counts = {}
+        for value in args.type:
+            name, _, count = value.partition(':')
+            type_counts[name] = int(count or 1)
+    total_score = args.total_score or (constraints.total_score if constraints else None)
+    distribution = (_parse_distribution(args.difficulty) if args.difficulty
+                    else (constraints.difficulty_distribution if constraints else None))
+
+    subject = args.subject or meta.get('subject')
+    meta.update({k: v for k, v in {
+        'title': args.title or meta.get('title', ''),
+        'subject': subject or '',
+        'duration': meta.get('duration', args.duration),
+    }.items()})
+    if total_score:
+        meta['total_score'] = int(total_score) if float(total_score).is_integer() else total_score
+    if distribution:
+        meta['difficulty_distribution'] = distribution
+
+    try:
+        constraints = ExamConstraints(type_counts, total_score, distribution)
+    except AssemblyError as e:
+        print(f"× {e}")
+        sys.exit(1)
+
+    db_path = ':memory:' if args.pool else args.db
+    with QuestionBank(db_path) as bank:
+        for path in args.pool or []:
+            bank.import_file(path)
+
+        start = time.perf_counter()
+        candidates = bank.candidates(subject=subject, knowledge_points=args.kp)
+        try:
+            papers = ExamAssembler(candidates, constraints, seed=args.seed).assemble(
+                k=args.k, time_limit=args.time_limit
+            )
+        except AssemblyError as e:
+            print(f"× {e}")
+            sys.exit(1)
+        elapsed = time.perf_counter() - start
+        print(f"✓ 从 {len(candidates)} 道候选题中求解 {len(papers)} 份试卷，用时 {elapsed * 1000:.0f} ms")
+
+        for index, paper in enumerate(papers):
+            exam = build_exam(meta, bank.fetch(paper['ids']))
+            output = _output_path(args.output, index, args.k)
+            with open(output, 'w', encoding='utf-8') as f:
+                json.dump(exam, f, ensure_ascii=False, indent=2)
+
+            detail = '  '.join(f"{d}:{v:g}" for d, v in sorted(paper['by_difficulty'].items()))
+            flag = '✓' if paper['objective'] < 1e-9 else '⚠'
+            print(f"{flag} {output}: 总分 {paper['score']:g}  [{detail}]  偏差 {paper['objective']:g}")
+
+
+if __name__ == '__main__':
+    main()
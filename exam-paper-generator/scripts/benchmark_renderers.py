@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图例渲染器基准测试
+对 DiagramRendererFactory 中注册的每种图例类型，在小/中/大三档规格及示例数据上
+测量单次渲染耗时、峰值内存（RSS）与输出文件大小，并将结果保存为 JSON 以便对比回归
+
+使用方法:
+    python benchmark_renderers.py
+    python benchmark_renderers.py --types bar_chart line_chart --repeat 5
+    python benchmark_renderers.py -o results.json --compare baseline.json
+    python benchmark_renderers.py --check-concurrency 8
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from diagram_renderers import DiagramRendererFactory
+
+# 默认语料：示例试卷
+DEFAULT_EXAMPLE = Path(__file__).parent.parent / 'examples' / 'chemistry_exam_example.json'
+
+# 规格档位 -> 规模
+SIZES = {'small': 4, 'medium': 40, 'huge': 400}
+
+
+def _labels(n: int, prefix: str = '项') -> List[str]:
+    return [f'{prefix}{i + 1}' for i in range(n)]
+
+
+def synthetic_spec(diagram_type: str, n: int) -> Optional[Dict[str, Any]]:
+    """按规模 n 生成指定类型的合成规格"""
+    elements = ['H', 'He', 'Li', 'Be', 'B', 'C', 'N', 'O', 'F', 'Ne',
+                'Na', 'Mg', 'Al', 'Si', 'P', 'S', 'Cl', 'Ar']
+
+    if diagram_type == 'atom_structure':
+        shells = [2, 8, 18, 32][:max(1, min(4, n // 10 + 1))]
+        return {'element': 'X', 'nucleus_charge': sum(shells), 'electron_shells': shells}
+    if diagram_type == 'molecular_structure':
+        return {'formula': 'CH3-' * max(1, n // 4) + 'OH'}
+    if diagram_type == 'periodic_table':
+        return {'highlight_elements': elements[:min(n, len(elements))], 'show_periods': [1, 2, 3]}
+    if diagram_type == 'experiment_setup':
+        names = ['圆底烧瓶', '洗气瓶', '冷凝管', '集气瓶', '烧杯', '滴定管', '锥形瓶', '试管']
+        count = max(2, min(n // 4, 40))
+        apparatus = [{'name': f'{names[i % len(names)]}{i + 1}', 'content': 'NaOH溶液'}
+                     for i in range(count)]
+        connections = [{'from': apparatus[i]['name'], 'to': apparatus[i + 1]['name']}
+                       for i in range(count - 1)]
+        return {'apparatus': apparatus, 'connections': connections}
+    if diagram_type == 'bar_chart':
+        return {'data': [(i * 37) % 100 + 1 for i in range(n)], 'labels': _labels(n),
+                'xlabel': '组别', 'ylabel': 'm/g'}
+    if diagram_type == 'line_chart':
+        points = n * 25
+        return {'data_series': {f'c(H2O) {k}': [((i * (k + 3)) % 97) / 10 for i in range(points)]
+                                for k in range(3)},
+                'xlabel': 't/s', 'ylabel': 'c/mol·L^-1'}
+    if diagram_type == 'pie_chart':
+        count = min(n, 60)
+        return {'data': [i + 1 for i in range(count)], 'labels': _labels(count)}
+    if diagram_type == 'function_graph':
+        exprs = ['sin(x)', 'x^2/10', 'cos(2*x)', 'exp(x/5)', 'abs(x)/2']
+        return {'functions': [{'expression': f'{exprs[i % len(exprs)]} + {i // len(exprs)}'}
+                              for i in range(max(1, n // 4))],
+                'x_range': [-5, 5]}
+    if diagram_type == 'coordinate_system':
+        return {'points': [{'x': (i % 9) - 4, 'y': (i * 7 % 9) - 4, 'label': f'P{i}'} for i in range(n)],
+                'vectors': [{'start': [0, 0], 'end': [(i % 5) - 2, (i % 3) - 1]} for i in range(n // 4)]}
+    if diagram_type == 'geometry':
+        return {'shapes': [{'type': 'circle', 'center': [5, 5], 'radius': 0.5 + (i % 40) / 10}
+                           for i in range(n)],
+                'points': [{'x': 5 + (i % 5), 'y': 5, 'label': chr(65 + i % 26)} for i in range(min(n, 26))]}
+    if diagram_type == 'flowchart':
+        count = max(2, min(n // 2, 60))
+        nodes = [{'id': f'n{i}', 'label': f'步骤{i + 1}'} for i in range(count)]
+        edges = [{'from': f'n{i}', 'to': f'n{i + 1}'} for i in range(count - 1)]
+        return {'nodes': nodes, 'edges': edges, 'direction': 'LR'}
+    return None
+
+
+def example_specs(example_path: Path) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """从示例试卷中提取 (类型, 用例名, 规格)"""
+    if not example_path.exists():
+        return
+    with open(example_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    def walk(node, path):
+        if isinstance(node, dict):
+            diagram = node.get('diagram')
+            if isinstance(diagram, dict) and diagram.get('type'):
+                yield diagram['type'], f'example:{path}', diagram.get('spec', {})
+            for key, value in node.items():
+                yield from walk(value, f'{path}.{key}' if path else key)
+        elif isinstance(node, list):
+            for i, value in enumerate(node):
+                yield from walk(value, f'{path}[{i}]')
+
+    yield from walk(data, '')
+
+
+def build_corpus(types: List[str], example_path: Path) -> List[Dict[str, Any]]:
+    """组装基准语料"""
+    corpus = []
+    for diagram_type in types:
+        for size, n in SIZES.items():
+            spec = synthetic_spec(diagram_type, n)
+            if spec is not None:
+                corpus.append({'type': diagram_type, 'case': f'synthetic:{size}',
+                               'size': size, 'spec': spec})
+
+    for diagram_type, case, spec in example_specs(example_path):
+        if diagram_type in types:
+            corpus.append({'type': diagram_type, 'case': case, 'size': 'example', 'spec': spec})
+    return corpus
+
+
+def _peak_rss_kb() -> Optional[int]:
+    """当前进程的峰值 RSS（KB）"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节为单位，Linux 以 KB 为单位
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_case(case: Dict[str, Any], repeat: int, context: Dict[str, Any]) -> Dict[str, Any]:
+    """执行单个用例：一次预热后计时 repeat 次"""
+    renderer = DiagramRendererFactory.get_renderer(case['type'])
+    result = {'type': case['type'], 'case': case['case'], 'size': case['size']}
+    if renderer is None:
+        result['error'] = 'renderer not found'
+        return result
+
+    fd, output_path = tempfile.mkstemp(suffix='.png')
+    os.close(fd)
+    try:
+        renderer.render(case['spec'], output_path, context)  # 预热
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            renderer.render(case['spec'], output_path, context)
+            times.append((time.perf_counter() - start) * 1000)
+        result.update({
+            'times_ms': [round(t, 3) for t in times],
+            'median_ms': round(statistics.median(times), 3),
+            'min_ms': round(min(times), 3),
+            'peak_rss_kb': _peak_rss_kb(),
+            'output_bytes': os.path.getsize(output_path),
+        })
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+    finally:
+        if os.path.exists(output_path):
+            os.unlink(output_path)
+    return result
+
+
+def _isolated_worker(case, repeat, context, queue):
+    queue.put(run_case(case, repeat, context))
+
+
+def run_isolated(case: Dict[str, Any], repeat: int, context: Dict[str, Any]) -> Dict[str, Any]:
+    """在独立子进程中运行用例，使峰值 RSS 只反映该用例"""
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_isolated_worker, args=(case, repeat, context, queue))
+    proc.start()
+    try:
+        result = queue.get(timeout=600)
+    except Exception:
+        result = {'type': case['type'], 'case': case['case'], 'size': case['size'],
+                  'error': 'worker crashed or timed out'}
+    proc.join()
+    return result
+
+
+def _render_bytes(case: Dict[str, Any], context: Dict[str, Any]) -> Optional[bytes]:
+    renderer = DiagramRendererFactory.get_renderer(case['type'])
+    fd, output_path = tempfile.mkstemp(suffix='.png')
+    os.close(fd)
+    try:
+        if not renderer.render(case['spec'], output_path, context):
+            return None
+        with open(output_path, 'rb') as f:
+            return f.read()
+    finally:
+        os.unlink(output_path)
+
+
+def check_concurrency(corpus: List[Dict], threads: int, rounds: int = 3) -> List[str]:
+    """
+    并发一致性检查：多个线程共享同一批渲染器实例、交错使用不同上下文渲染，
+    输出必须与串行渲染逐字节相同
+
+    Returns:
+        不一致的用例列表
+    """
+    contexts = [{'subject': '化学'}, {'subject': '数学', 'width_cm': 6}]
+    tasks = [(i, j) for i in range(len(corpus)) for j in range(len(contexts))]
+    expected = {(i, j): _render_bytes(corpus[i], contexts[j]) for i, j in tasks}
+
+    def worker(task):
+        try:
+            return _render_bytes(corpus[task[0]], contexts[task[1]])
+        except Exception as e:
+            return f'{type(e).__name__}: {e}'
+
+    work = tasks * rounds
+    random.Random(0).shuffle(work)
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        outputs = list(pool.map(worker, work))
+
+    mismatches = set()
+    for (i, j), output in zip(work, outputs):
+        if output != expected[(i, j)]:
+            mismatches.add(f"{corpus[i]['type']} {corpus[i]['case']} ({contexts[j]['subject']})")
+    return sorted(mismatches)
+
+
+def compare(results: List[Dict], baseline_path: str, threshold: float) -> List[str]:
+    """与基线结果对比，返回超出阈值的回归项"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    base_index = {(r['type'], r['case']): r for r in baseline.get('results', [])}
+
+    regressions = []
+    print(f"\n{'类型':<20}{'用例':<36}{'基线(ms)':>10}{'本次(ms)':>10}{'变化':>9}")
+    for r in results:
+        base = base_index.get((r['type'], r['case']))
+        if not base or 'median_ms' not in base or 'median_ms' not in r:
+            continue
+        delta = (r['median_ms'] - base['median_ms']) / base['median_ms'] if base['median_ms'] else 0.0
+        flag = ''
+        if delta > threshold:
+            flag = '  ×'
+            regressions.append(f"{r['type']} {r['case']}: {delta:+.1%}")
+        print(f"{r['type']:<20}{r['case'][:35]:<36}{base['median_ms']:>10.1f}"
+              f"{r['median_ms']:>10.1f}{delta:>+9.1%}{flag}")
+    return regressions
+
+
+def print_table(results: List[Dict]):
+    """打印结果表"""
+    print(f"\n{'类型':<20}{'用例':<36}{'中位(ms)':>10}{'最快(ms)':>10}{'峰值RSS(MB)':>13}{'输出(KB)':>10}")
+    for r in results:
+        if 'error' in r:
+            print(f"{r['type']:<20}{r['case'][:35]:<36}  × {r['error']}")
+            continue
+        rss = f"{r['peak_rss_kb'] / 1024:.1f}" if r.get('peak_rss_kb') else '-'
+        print(f"{r['type']:<20}{r['case'][:35]:<36}{r['median_ms']:>10.1f}{r['min_ms']:>10.1f}"
+              f"{rss:>13}{r['output_bytes'] / 1024:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='图例渲染器基准测试')
+    parser.add_argument('--types', nargs='+', help='仅测试指定的图例类型（默认全部）')
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES) + ['example'],
+                        help='仅测试指定档位（默认全部）')
+    parser.add_argument('--example', default=str(DEFAULT_EXAMPLE), help='示例试卷 JSON（语料来源）')
+    parser.add_argument('--subject', default='化学', help='渲染上下文中的学科')
+    parser.add_argument('--repeat', type=int, default=3, help='每个用例的计时次数')
+    parser.add_argument('--in-process', action='store_true',
+                        help='在当前进程内运行（更快，但峰值 RSS 为累计值）')
+    parser.add_argument('-o', '--output', help='保存结果 JSON 的路径')
+    parser.add_argument('--compare', help='与之前保存的结果 JSON 对比')
+    parser.add_argument('--threshold', type=float, default=0.10, help='判定回归的耗时增幅（默认 10%%）')
+    parser.add_argument('--check-concurrency', type=int, metavar='THREADS',
+                        help='改为检查多线程并发渲染的输出是否与串行一致')
+
+    args = parser.parse_args()
+
+    available = DiagramRendererFactory.list_available()
+    types = args.types or available
+    unknown = [t for t in types if t not in available]
+    if unknown:
+        print(f"× 未注册的图例类型: {', '.join(unknown)}")
+        sys.exit(1)
+
+    corpus = build_corpus(types, Path(args.example))
+    if args.sizes:
+        corpus = [c for c in corpus if c['size'] in args.sizes]
+
+    if args.check_concurrency:
+        print(f"正在以 {args.check_concurrency} 个线程并发渲染 {len(corpus)} 个用例...")
+        mismatches = check_concurrency(corpus, args.check_concurrency)
+        if mismatches:
+            print(f"× {len(mismatches)} 个用例的并发输出与串行不一致:")
+            for item in mismatches:
+                print(f"  - {item}")
+            sys.exit(1)
+        print("✓ 并发渲染输出与串行完全一致")
+        return
+
+    context = {'subject': args.subject}
+    print(f"正在运行 {len(corpus)} 个用例（每个 {args.repeat} 次）...")
+
+    results = []
+    for case in corpus:
+        if args.in_process:
+            result = run_case(case, args.repeat, context)
+        else:
+            result = run_isolated(case, args.repeat, context)
+        results.append(result)
+        status = f"{result['median_ms']:.1f} ms" if 'median_ms' in result else f"× {result.get('error')}"
+        print(f"  {case['type']:<20}{case['case'][:40]:<42}{status}")
+
+    print_table(results)
+
+    if args.output:
+        import matplotlib
+        payload = {
+            'meta': {
+                'created_at': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'matplotlib': matplotlib.__version__,
+                'repeat': args.repeat,
+                'isolated': not args.in_process,
+            },
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        print(f"\n✓ 结果已保存: {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n× 发现 {len(regressions)} 项性能回归（阈值 {args.threshold:.0%}）:")
+            for item in regressions:
+                print(f"  - {item}")
+            sys.exit(1)
+        print("\n✓ 未发现性能回归")
+
+
+if __name__ == '__main__':
+    main()
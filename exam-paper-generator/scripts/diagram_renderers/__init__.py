@@ -5,7 +5,7 @@
 提供多种类型图例的渲染功能
 """
 
-from .base import BaseDiagramRenderer
+from .base import BaseDiagramRenderer, PRINT_DPI
 from .factory import DiagramRendererFactory
 from .chemistry import (
     AtomStructureRenderer,
@@ -24,9 +24,11 @@ from .math import (
     GeometryRenderer,
 )
 from .flowchart import FlowchartRenderer
+from .apparatus import ApparatusGlyph, GlyphLibrary
 
 __all__ = [
     'BaseDiagramRenderer',
+    'PRINT_DPI',
     'DiagramRendererFactory',
     'AtomStructureRenderer',
     'MolecularStructureRenderer',
@@ -39,4 +41,6 @@ __all__ = [
     'CoordinateSystemRenderer',
     'GeometryRenderer',
     'FlowchartRenderer',
+    'ApparatusGlyph',
+    'GlyphLibrary',
 ]
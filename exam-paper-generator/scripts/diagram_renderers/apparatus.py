@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+实验仪器图元库
+预先构建烧瓶、滴定管、冷凝管、集气瓶等仪器的矢量路径，首次使用时载入图元缓存，
+之后每次绘制只需一次平移变换，不再重复构造路径
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from matplotlib.path import Path
+
+
+# 玻璃器皿与液体的默认样式
+GLASS_STYLE = {'facecolor': 'none', 'edgecolor': '#1F3A5F', 'linewidth': 1.8}
+LIQUID_STYLE = {'facecolor': '#A5D8FF', 'edgecolor': 'none', 'alpha': 0.8}
+DETAIL_STYLE = {'facecolor': 'none', 'edgecolor': '#1F3A5F', 'linewidth': 1.0}
+BOX_STYLE = {'facecolor': '#E3F2FD', 'edgecolor': '#1976D2', 'linewidth': 2}
+
+
+class ApparatusGlyph:
+    """
+    单个仪器图元
+
+    局部坐标系以仪器底部中心为原点，单位与绘图数据坐标一致。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        width: float,
+        height: float,
+        layers: List[Tuple[Path, Dict]],
+        ports: Dict[str, Tuple[float, float]],
+    ):
+        """
+        Args:
+            name: 图元名称
+            width: 外接宽度
+            height: 外接高度
+            layers: 按绘制顺序排列的 (路径, 样式) 列表
+            ports: 导管接口位置，包含 'in' 与 'out'
+        """
+        self.name = name
+        self.width = width
+        self.height = height
+        self.layers = layers
+        self.ports = ports
+
+    def port(self, key: str, origin: Tuple[float, float]) -> Tuple[float, float]:
+        """获取接口在数据坐标中的位置"""
+        px, py = self.ports.get(key, (0.0, self.height))
+        return origin[0] + px, origin[1] + py
+
+
+def _polyline(points, closed: bool = False) -> Path:
+    """由顶点序列构造折线路径"""
+    verts = np.asarray(points, dtype=float)
+    codes = [Path.MOVETO] + [Path.LINETO] * (len(verts) - 1)
+    if closed:
+        verts = np.vstack([verts, verts[:1]])
+        codes.append(Path.CLOSEPOLY)
+    return Path(verts, codes)
+
+
+def _segments(lines) -> Path:
+    """由多条独立线段构造路径（刻度、导管等）"""
+    verts = []
+    codes = []
+    for line in lines:
+        for i, point in enumerate(line):
+            verts.append(point)
+            codes.append(Path.MOVETO if i == 0 else Path.LINETO)
+    return Path(np.asarray(verts, dtype=float), codes)
+
+
+def _arc(cx: float, cy: float, r: float, deg_start: float, deg_end: float, n: int = 48):
+    """圆弧顶点（角度制，逆时针）"""
+    theta = np.radians(np.linspace(deg_start, deg_end, n))
+    return np.column_stack([cx + r * np.cos(theta), cy + r * np.sin(theta)])
+
+
+def _build_round_flask() -> ApparatusGlyph:
+    """圆底烧瓶"""
+    r, neck = 0.75, 0.16
+    cy = r
+    half = np.degrees(np.arcsin(neck / r))
+    bulb = _arc(0, cy, r, 90 + half, 450 - half)
+    top = cy + r * np.cos(np.radians(half)) + 0.9
+    outline = np.vstack([
+        [[neck, top]],
+        bulb[::-1],
+        [[-neck, top]],
+    ])
+    # 液面以下的弓形区域
+    level = cy - 0.15
+    depth = np.degrees(np.arcsin((level - cy) / r))
+    liquid = _arc(0, cy, r, 180 - depth, 360 + depth)
+    return ApparatusGlyph(
+        'round_flask', 2 * r, top,
+        [(_polyline(liquid, closed=True), LIQUID_STYLE),
+         (_polyline(outline), GLASS_STYLE)],
+        ports={'in': (0, top), 'out': (0, top)},
+    )
+
+
+def _build_conical_flask() -> ApparatusGlyph:
+    """锥形瓶"""
+    outline = [(0.15, 2.0), (0.15, 1.3), (0.75, 0.0), (-0.75, 0.0), (-0.15, 1.3), (-0.15, 2.0)]
+    liquid = [(0.53, 0.48), (0.75, 0.0), (-0.75, 0.0), (-0.53, 0.48)]
+    return ApparatusGlyph(
+        'conical_flask', 1.5, 2.0,
+        [(_polyline(liquid, closed=True), LIQUID_STYLE),
+         (_polyline(outline), GLASS_STYLE)],
+        ports={'in': (0, 2.0), 'out': (0, 2.0)},
+    )
+
+
+def _build_burette() -> ApparatusGlyph:
+    """滴定管（含刻度与活塞）"""
+    w = 0.12
+    outline = [(w, 2.8), (w, 0.6), (0.04, 0.35), (0.04, 0.0),
+               (-0.04, 0.0), (-0.04, 0.35), (-w, 0.6), (-w, 2.8)]
+    liquid = [(w, 2.2), (w, 0.6), (-w, 0.6), (-w, 2.2)]
+    ticks = [[(-w, y), (-w + 0.08, y)] for y in np.linspace(0.8, 2.6, 10)]
+    stopcock = [[(-0.22, 0.5), (0.22, 0.5)], [(0.22, 0.42), (0.22, 0.58)]]
+    return ApparatusGlyph(
+        'burette', 0.5, 2.8,
+        [(_polyline(liquid, closed=True), LIQUID_STYLE),
+         (_polyline(outline), GLASS_STYLE),
+         (_segments(ticks + stopcock), DETAIL_STYLE)],
+        ports={'in': (0, 2.8), 'out': (0, 0.0)},
+    )
+
+
+def _build_condenser() -> ApparatusGlyph:
+    """直形冷凝管（外套管 + 内管 + 进出水口）"""
+    length, jacket, inner = 2.6, 0.22, 0.07
+    y0 = 0.9
+    half = length / 2
+    jacket_path = [(-half + 0.3, y0 + jacket), (half - 0.3, y0 + jacket),
+                   (half - 0.3, y0 - jacket), (-half + 0.3, y0 - jacket)]
+    inner_lines = [[(-half, y0 + inner), (half, y0 + inner)],
+                   [(-half, y0 - inner), (half, y0 - inner)]]
+    water = [[(half - 0.6, y0 - jacket), (half - 0.6, y0 - jacket - 0.35)],
+             [(-half + 0.6, y0 + jacket), (-half + 0.6, y0 + jacket + 0.35)]]
+    coolant = [(-half + 0.3, y0 + jacket), (half - 0.3, y0 + jacket),
+               (half - 0.3, y0 + inner), (-half + 0.3, y0 + inner)]
+    coolant_low = [(-half + 0.3, y0 - inner), (half - 0.3, y0 - inner),
+                   (half - 0.3, y0 - jacket), (-half + 0.3, y0 - jacket)]
+    return ApparatusGlyph(
+        'condenser', length, 1.6,
+        [(_polyline(coolant, closed=True), LIQUID_STYLE),
+         (_polyline(coolant_low, closed=True), LIQUID_STYLE),
+         (_polyline(jacket_path, closed=True), GLASS_STYLE),
+         (_segments(inner_lines + water), GLASS_STYLE)],
+        ports={'in': (-half, y0), 'out': (half, y0)},
+    )
+
+
+def _build_gas_jar() -> ApparatusGlyph:
+    """集气瓶（含毛玻璃片）"""
+    w, h = 0.55, 1.9
+    body = [(w - 0.2, h), (w - 0.2, h - 0.15), (w, h - 0.35), (w, 0.0),
+            (-w, 0.0), (-w, h - 0.35), (-w + 0.2, h - 0.15), (-w + 0.2, h)]
+    plate = [[(-w + 0.05, h + 0.05), (w - 0.05, h + 0.05)]]
+    return ApparatusGlyph(
+        'gas_jar', 2 * w, h + 0.05,
+        [(_polyline(body), GLASS_STYLE),
+         (_segments(plate), GLASS_STYLE)],
+        ports={'in': (-0.15, h + 0.05), 'out': (0.15, h + 0.05)},
+    )
+
+
+def _build_washing_bottle() -> ApparatusGlyph:
+    """洗气瓶（长进短出）"""
+    w, h = 0.6, 1.7
+    body = [(w - 0.2, h), (w - 0.2, h - 0.15), (w, h - 0.35), (w, 0.0),
+            (-w, 0.0), (-w, h - 0.35), (-w + 0.2, h - 0.15), (-w + 0.2, h)]
+    liquid = [(w, 0.8), (w, 0.0), (-w, 0.0), (-w, 0.8)]
+    tubes = [[(-0.18, h + 0.45), (-0.18, 0.25)],
+             [(0.18, h + 0.45), (0.18, h - 0.3)]]
+    return ApparatusGlyph(
+        'washing_bottle', 2 * w, h + 0.45,
+        [(_polyline(liquid, closed=True), LIQUID_STYLE),
+         (_polyline(body), GLASS_STYLE),
+         (_segments(tubes), GLASS_STYLE)],
+        ports={'in': (-0.18, h + 0.45), 'out': (0.18, h + 0.45)},
+    )
+
+
+def _build_beaker() -> ApparatusGlyph:
+    """烧杯"""
+    w, h = 0.6, 1.4
+    outline = [(w + 0.08, h + 0.05), (w, h), (w, 0.0), (-w, 0.0), (-w, h)]
+    liquid = [(w, 0.7), (w, 0.0), (-w, 0.0), (-w, 0.7)]
+    return ApparatusGlyph(
+        'beaker', 2 * w + 0.1, h + 0.05,
+        [(_polyline(liquid, closed=True), LIQUID_STYLE),
+         (_polyline(outline), GLASS_STYLE)],
+        ports={'in': (0, h), 'out': (0, h)},
+    )
+
+
+def _build_test_tube() -> ApparatusGlyph:
+    """试管"""
+    w, h = 0.2, 1.8
+    bottom = _arc(0, w, w, 180, 360, n=24)
+    outline = np.vstack([[[-w, h]], bottom, [[w, h]]])
+    liquid = np.vstack([[[-w, 0.7]], bottom, [[w, 0.7]]])
+    return ApparatusGlyph(
+        'test_tube', 2 * w, h,
+        [(_polyline(liquid, closed=True), LIQUID_STYLE),
+         (_polyline(outline), GLASS_STYLE)],
+        ports={'in': (0, h), 'out': (0, h)},
+    )
+
+
+def _build_box() -> ApparatusGlyph:
+    """通用方框（无法识别仪器时的兜底图元）"""
+    outline = [(1.0, 0.0), (1.0, 1.2), (-1.0, 1.2), (-1.0, 0.0)]
+    return ApparatusGlyph(
+        'box', 2.0, 1.2,
+        [(_polyline(outline, closed=True), BOX_STYLE)],
+        ports={'in': (-1.0, 0.6), 'out': (1.0, 0.6)},
+    )
+
+
+class GlyphLibrary:
+    """仪器图元库：按名称构建一次并缓存，之后按变换复用"""
+
+    _builders: Dict[str, Callable[[], ApparatusGlyph]] = {
+        'round_flask': _build_round_flask,
+        'conical_flask': _build_conical_flask,
+        'burette': _build_burette,
+        'condenser': _build_condenser,
+        'gas_jar': _build_gas_jar,
+        'washing_bottle': _build_washing_bottle,
+        'beaker': _build_beaker,
+        'test_tube': _build_test_tube,
+        'box': _build_box,
+    }
+    _cache: Dict[str, ApparatusGlyph] = {}
+
+    # 中文仪器名称关键字 -> 图元（按顺序匹配）
+    KEYWORDS = [
+        ('锥形瓶', 'conical_flask'),
+        ('烧瓶', 'round_flask'),
+        ('滴定管', 'burette'),
+        ('冷凝', 'condenser'),
+        ('洗气', 'washing_bottle'),
+        ('尾气', 'washing_bottle'),
+        ('集气', 'gas_jar'),
+        ('烧杯', 'beaker'),
+        ('试管', 'test_tube'),
+    ]
+
+    @classmethod
+    def register(cls, name: str, builder: Callable[[], ApparatusGlyph]):
+        """注册自定义图元"""
+        cls._builders[name] = builder
+        cls._cache.pop(name, None)
+
+    @classmethod
+    def get(cls, name: str) -> ApparatusGlyph:
+        """获取图元（未知名称返回通用方框）"""
+        if name not in cls._builders:
+            name = 'box'
+        glyph = cls._cache.get(name)
+        if glyph is None:
+            glyph = cls._builders[name]()
+            cls._cache[name] = glyph
+        return glyph
+
+    @classmethod
+    def resolve(cls, apparatus: Dict) -> ApparatusGlyph:
+        """根据仪器定义选择图元：优先使用显式 glyph，其次按名称关键字匹配"""
+        explicit: Optional[str] = apparatus.get('glyph')
+        if explicit:
+            return cls.get(explicit)
+
+        name = apparatus.get('name', '')
+        for keyword, glyph_name in cls.KEYWORDS:
+            if keyword in name:
+                return cls.get(glyph_name)
+        return cls.get('box')
+
+    @classmethod
+    def list_available(cls) -> list:
+        """列出所有可用图元"""
+        return list(cls._builders.keys())
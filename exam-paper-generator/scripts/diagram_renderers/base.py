@@ -5,42 +5,144 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+import os
 import re
+import threading
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from . import mathtext_cache
+
+# 公式排版结果在图例之间共享
+mathtext_cache.install()
+
+# 未指定目标宽度时的栅格化分辨率
+DEFAULT_DPI = 200
+# 默认打印分辨率（像素/英寸）
+PRINT_DPI = 300
+# 分辨率上下限，防止极端尺寸产生过小或过大的位图
+MIN_DPI = 36
+MAX_DPI = 600
+# savefig(bbox_inches='tight') 的留白（英寸）
+PAD_INCHES = 0.1
+
+# 可复现模式下各格式去掉的元数据（软件版本、生成时间）
+DETERMINISTIC_METADATA = {
+    '.png': {'Software': None},
+    '.svg': {'Creator': None, 'Date': None},
+    '.pdf': {'Creator': None, 'Producer': None, 'CreationDate': None},
+}
+# 可复现模式下 SVG 元素 id 的固定盐值
+DETERMINISTIC_SVG_SALT = 'exam-paper-generator'
+
+# 标签格式化结果的缓存条数
+LABEL_CACHE_SIZE = 4096
+
+_LABEL_SEGMENT = re.compile(r'[A-Za-z][A-Za-z0-9\(\)\+\-\^]*')
+_CHEM_MARK = re.compile(r'[0-9\+\-\^]')
+_MATH_POWER = re.compile(r'\^(-?[0-9]+)')
+_SINGLE_ION = re.compile(r'([A-Z][a-z]?)(\d*)([+-])')
+_CHEM_CHARGE = re.compile(r'\^([0-9]*[+-])')
+_CHEM_POWER = re.compile(r'\^([0-9]+)')
+_TRAILING_DIGIT_CHARGE = re.compile(r'([0-9])([+-])$')
+_TRAILING_CHARGE = re.compile(r'([A-Za-z\)])([+-])$')
+_SUBSCRIPT = re.compile(r'(?<=[A-Za-z\)\]])(\d+)')
+
+# matplotlib 的 rcParams 是进程级全局状态，rc_context 的设置与恢复
+# 必须与使用它的绘制过程互斥，否则并发渲染会互相串改字体等参数
+_RENDER_LOCK = threading.RLock()
 
 
 class BaseDiagramRenderer(ABC):
-    """图例渲染器基类"""
+    """
+    图例渲染器基类
+
+    渲染器实例不保存任何与单次渲染相关的状态，可在多线程间共享；
+    学科、目标尺寸等渲染上下文通过 render() 的 context 参数传入
+    """
 
     # 图例类型标识
     diagram_type: str = ""
 
-    def __init__(self):
-        self.context: Dict[str, Any] = {}
-        self._setup_fonts()
-
-    def _setup_fonts(self):
-        """设置字体（子类可覆盖）"""
-        pass
-
-    def set_context(self, context: Dict[str, Any]):
-        """设置渲染上下文（如学科）"""
-        self.context = context or {}
+    # 渲染期间生效的 matplotlib 参数（子类可覆盖）
+    rc_params: Dict[str, Any] = {
+        'font.sans-serif': ['STHeiti', 'SimHei', 'Arial Unicode MS'],
+        'axes.unicode_minus': False,
+    }
 
-    @abstractmethod
-    def render(self, spec: Dict[str, Any], output_path: str) -> bool:
+    def render(self, spec: Dict[str, Any], output_path: str,
+               context: Optional[Dict[str, Any]] = None) -> bool:
         """
         渲染图例
 
         Args:
             spec: 图例规格参数
             output_path: 输出文件路径
+            context: 渲染上下文（学科 subject、目标宽度 width_cm、打印分辨率 print_dpi、
+                可复现输出 deterministic）
 
         Returns:
             是否渲染成功
         """
+        context = context or {}
+        rc_params = self.rc_params
+        if context.get('deterministic'):
+            rc_params = {**rc_params, 'svg.hashsalt': DETERMINISTIC_SVG_SALT}
+        with _RENDER_LOCK, matplotlib.rc_context(rc_params):
+            return self._render(spec, output_path, context)
+
+    @abstractmethod
+    def _render(self, spec: Dict[str, Any], output_path: str, context: Dict[str, Any]) -> bool:
+        """绘制并保存图例（子类实现，调用时 rc_params 已生效）"""
         pass
 
+    @staticmethod
+    def _new_figure(figsize: Optional[Tuple[float, float]] = None):
+        """创建独立于 pyplot 全局状态的图像与坐标轴"""
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        return fig, fig.subplots()
+
+    @staticmethod
+    def _pixel_width(context: Dict[str, Any], figure_width: float) -> int:
+        """输出图片的像素宽度（用于按分辨率裁剪数据量）"""
+        width_cm = context.get('width_cm')
+        if width_cm:
+            return max(int(width_cm / 2.54 * (context.get('print_dpi') or PRINT_DPI)), 1)
+        return int(figure_width * DEFAULT_DPI)
+
+    @staticmethod
+    def _target_dpi(fig, context: Dict[str, Any]) -> float:
+        """
+        计算栅格化分辨率：使裁剪后的图片宽度恰好等于
+        width_cm 在打印分辨率下所需的像素数
+        """
+        width_cm = context.get('width_cm')
+        if not width_cm:
+            return DEFAULT_DPI
+
+        print_dpi = context.get('print_dpi') or PRINT_DPI
+        target_px = width_cm / 2.54 * print_dpi
+        bbox = fig.get_tightbbox(fig.canvas.get_renderer())
+        width_in = bbox.width + 2 * PAD_INCHES
+        if width_in <= 0:
+            return DEFAULT_DPI
+        return min(max(target_px / width_in, MIN_DPI), MAX_DPI)
+
+    def _save_figure(self, fig, output_path: str, context: Dict[str, Any]):
+        """按目标尺寸保存图像"""
+        fig.tight_layout()
+        metadata = None
+        if context.get('deterministic'):
+            metadata = DETERMINISTIC_METADATA.get(os.path.splitext(output_path)[1].lower())
+        fig.savefig(output_path, dpi=self._target_dpi(fig, context), bbox_inches='tight',
+                    pad_inches=PAD_INCHES, facecolor='white', metadata=metadata)
+
     def validate_spec(self, spec: Dict[str, Any]) -> bool:
         """
         验证规格参数
@@ -51,14 +153,68 @@ class BaseDiagramRenderer(ABC):
         Returns:
             是否有效
         """
-        return True
+        return not self.spec_errors(spec)
 
-    def _format_label(self, text: str) -> str:
+    def spec_errors(self, spec: Dict[str, Any]) -> List[str]:
+        """
+        检查规格参数（子类可覆盖），渲染前的快速预检
+
+        Args:
+            spec: 图例规格参数
+
+        Returns:
+            错误信息列表，为空表示有效
+        """
+        if not isinstance(spec, dict):
+            return ['spec 必须是对象']
+        return []
+
+    @staticmethod
+    def _is_number(value: Any) -> bool:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    def _check_numbers(self, spec: Dict[str, Any], key: str, errors: List[str], required: bool = False):
+        """检查数值数组字段"""
+        values = spec.get(key)
+        if values is None:
+            if required:
+                errors.append(f'{key} 不能为空')
+            return
+        if not isinstance(values, list) or (required and not values):
+            errors.append(f'{key} 必须是非空数组' if required else f'{key} 必须是数组')
+            return
+        bad = [i for i, v in enumerate(values) if not self._is_number(v)]
+        if bad:
+            errors.append(f'{key}[{bad[0]}] 不是数值')
+
+    def _check_range(self, spec: Dict[str, Any], key: str, errors: List[str]):
+        """检查 [min, max] 形式的范围字段"""
+        value = spec.get(key)
+        if value is None:
+            return
+        if (not isinstance(value, list) or len(value) != 2
+                or not all(self._is_number(v) for v in value)):
+            errors.append(f'{key} 必须是两个数值组成的数组')
+        elif value[0] >= value[1]:
+            errors.append(f'{key} 的下限必须小于上限')
+
+    def _check_lengths(self, spec: Dict[str, Any], key: str, ref_key: str, errors: List[str]):
+        """检查可选数组字段与参照字段长度一致"""
+        values = spec.get(key)
+        ref = spec.get(ref_key)
+        if values is None or not isinstance(ref, list):
+            return
+        if not isinstance(values, list):
+            errors.append(f'{key} 必须是数组')
+        elif len(values) != len(ref):
+            errors.append(f'{key} 的长度（{len(values)}）与 {ref_key}（{len(ref)}）不一致')
+
+    def _format_label(self, text: str, context: Dict[str, Any]) -> str:
         """根据学科格式化图例文本"""
         if not text:
             return text
 
-        subject = str(self.context.get('subject', '') or '')
+        subject = str(context.get('subject', '') or '')
         subject_lower = subject.lower()
         is_math = '数学' in subject or 'math' in subject_lower
         is_chem = '化学' in subject or 'chem' in subject_lower
@@ -77,36 +233,43 @@ class BaseDiagramRenderer(ABC):
         return self._format_segments(text, mode='chem')
 
     def _format_segments(self, text: str, mode: str) -> str:
-        pattern = re.compile(r'[A-Za-z][A-Za-z0-9\(\)\+\-\^]*')
-
-        def repl(match: re.Match) -> str:
-            seg = match.group(0)
-            if mode == 'math':
-                if '^' not in seg:
-                    return seg
-                return f'${self._math_tex_from_segment(seg)}$'
-
-            if not re.search(r'[0-9\+\-\^]', seg):
-                return seg
-            return f'${self._chem_tex_from_segment(seg)}$'
-
-        return pattern.sub(repl, text)
+        return _format_segments(text, mode)
 
-    def _math_tex_from_segment(self, seg: str) -> str:
-        return re.sub(r'\^(-?[0-9]+)', r'^{\1}', seg)
+    @staticmethod
+    def _math_tex_from_segment(seg: str) -> str:
+        return _MATH_POWER.sub(r'^{\1}', seg)
 
-    def _chem_tex_from_segment(self, seg: str) -> str:
+    @staticmethod
+    def _chem_tex_from_segment(seg: str) -> str:
         # 单原子离子，如 Fe2+、Na+、Cl-
-        single_ion = re.fullmatch(r'([A-Z][a-z]?)(\d*)([+-])', seg)
+        single_ion = _SINGLE_ION.fullmatch(seg)
         if single_ion:
             elem, digits, sign = single_ion.groups()
             charge = f'{digits}{sign}' if digits else sign
             return f'{elem}^{{{charge}}}'
 
         s = seg
-        s = re.sub(r'\^([0-9]*[+-])', r'^{\1}', s)
-        s = re.sub(r'\^([0-9]+)', r'^{\1}', s)
-        s = re.sub(r'([0-9])([+-])$', r'\1^{\2}', s)
-        s = re.sub(r'([A-Za-z\)])([+-])$', r'\1^{\2}', s)
-        s = re.sub(r'(?<=[A-Za-z\)\]])(\d+)', r'_{\1}', s)
+        s = _CHEM_CHARGE.sub(r'^{\1}', s)
+        s = _CHEM_POWER.sub(r'^{\1}', s)
+        s = _TRAILING_DIGIT_CHARGE.sub(r'\1^{\2}', s)
+        s = _TRAILING_CHARGE.sub(r'\1^{\2}', s)
+        s = _SUBSCRIPT.sub(r'_{\1}', s)
         return s
+
+
+@lru_cache(maxsize=LABEL_CACHE_SIZE)
+def _format_segments(text: str, mode: str) -> str:
+    """把标签中的公式段包成 mathtext（按 (文本, 模式) 缓存）"""
+
+    def repl(match: re.Match) -> str:
+        seg = match.group(0)
+        if mode == 'math':
+            if '^' not in seg:
+                return seg
+            return f'${BaseDiagramRenderer._math_tex_from_segment(seg)}$'
+
+        if not _CHEM_MARK.search(seg):
+            return seg
+        return f'${BaseDiagramRenderer._chem_tex_from_segment(seg)}$'
+
+    return _LABEL_SEGMENT.sub(repl, text)
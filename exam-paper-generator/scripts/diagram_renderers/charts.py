@@ -12,6 +12,16 @@ import numpy as np
 from typing import Dict, Any, List
 
 from .base import BaseDiagramRenderer
+from .downsample import (
+    BIN_AGGREGATES, LINE_METHODS, bin_labels, bin_values, downsample_line, sparse_ticks,
+)
+
+# 单柱至少占用的像素宽度（300 dpi 下约 1 mm），超出时自动分箱
+MIN_BAR_PIXELS = 12
+# 超过该点数的折线不再绘制数据点标记
+MAX_MARKERS = 60
+# 长横轴最多显示的刻度标签数
+MAX_TICK_LABELS = 12
 
 
 class BarChartRenderer(BaseDiagramRenderer):
@@ -19,12 +29,19 @@ class BarChartRenderer(BaseDiagramRenderer):
 
     diagram_type = "bar_chart"
 
-    def _setup_fonts(self):
-        plt.rcParams['font.sans-serif'] = ['STHeiti', 'SimHei', 'Arial Unicode MS']
-        plt.rcParams['axes.unicode_minus'] = False
-
-    def render(self, spec: Dict[str, Any], output_path: str) -> bool:
-        """渲染柱状图"""
+    def spec_errors(self, spec: Dict[str, Any]) -> List[str]:
+        errors = super().spec_errors(spec)
+        if errors:
+            return errors
+        self._check_numbers(spec, 'data', errors, required=True)
+        self._check_lengths(spec, 'labels', 'data', errors)
+        self._check_lengths(spec, 'colors', 'data', errors)
+        if spec.get('bin_aggregate', 'mean') not in BIN_AGGREGATES:
+            errors.append(f"bin_aggregate 只能是 {' / '.join(BIN_AGGREGATES)}")
+        return errors
+
+    def _render(self, spec: Dict[str, Any], output_path: str, context: Dict[str, Any]) -> bool:
+        """渲染柱状图（柱数超过像素宽度所能容纳的数量时分箱聚合）"""
         data = spec.get('data', [])
         labels = spec.get('labels', [])
         title = spec.get('title', '')
@@ -35,27 +52,34 @@ class BarChartRenderer(BaseDiagramRenderer):
         if not data:
             return False
 
-        fig, ax = plt.subplots(figsize=(10, 6))
+        fig, ax = self._new_figure(figsize=(10, 6))
+
+        max_bars = self._pixel_width(context, 10) // MIN_BAR_PIXELS
+        if len(data) > max_bars:
+            values, starts = bin_values(np.asarray(data, dtype=float), max_bars,
+                                        spec.get('bin_aggregate', 'mean'))
+            labels = bin_labels(labels, starts, len(data))
+            colors = [colors[i] for i in starts] if colors else None
+            data = values
 
         x = np.arange(len(data))
         bar_colors = colors if colors else ['steelblue'] * len(data)
 
         ax.bar(x, data, color=bar_colors, alpha=0.8)
 
-        ax.set_xlabel(self._format_label(xlabel), fontsize=12)
-        ax.set_ylabel(self._format_label(ylabel), fontsize=12)
-        ax.set_title(self._format_label(title), fontsize=14, fontweight='bold')
+        ax.set_xlabel(self._format_label(xlabel, context), fontsize=12)
+        ax.set_ylabel(self._format_label(ylabel, context), fontsize=12)
+        ax.set_title(self._format_label(title, context), fontsize=14, fontweight='bold')
 
         if labels:
-            ax.set_xticks(x)
-            ax.set_xticklabels([self._format_label(label) for label in labels], fontsize=11)
+            ticks = sparse_ticks(len(labels), MAX_TICK_LABELS) if len(labels) > max_bars // 4 else x
+            ax.set_xticks(ticks)
+            ax.set_xticklabels([self._format_label(labels[i], context) for i in ticks], fontsize=11)
 
         ax.tick_params(axis='y', labelsize=11)
         ax.grid(axis='y', alpha=0.3)
 
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=200, bbox_inches='tight', facecolor='white')
-        plt.close()
+        self._save_figure(fig, output_path, context)
 
         return True
 
@@ -65,12 +89,24 @@ class LineChartRenderer(BaseDiagramRenderer):
 
     diagram_type = "line_chart"
 
-    def _setup_fonts(self):
-        plt.rcParams['font.sans-serif'] = ['STHeiti', 'SimHei', 'Arial Unicode MS']
-        plt.rcParams['axes.unicode_minus'] = False
-
-    def render(self, spec: Dict[str, Any], output_path: str) -> bool:
-        """渲染折线图"""
+    def spec_errors(self, spec: Dict[str, Any]) -> List[str]:
+        errors = super().spec_errors(spec)
+        if errors:
+            return errors
+        data_series = spec.get('data_series')
+        if not isinstance(data_series, dict) or not data_series:
+            return ['data_series 必须是非空对象']
+        x_values = spec.get('x_values')
+        for label, data in data_series.items():
+            self._check_numbers(data_series, label, errors, required=True)
+            if isinstance(x_values, list) and isinstance(data, list) and len(data) != len(x_values):
+                errors.append(f'data_series.{label} 的长度（{len(data)}）与 x_values（{len(x_values)}）不一致')
+        if spec.get('downsample', 'lttb') not in LINE_METHODS:
+            errors.append(f"downsample 只能是 {' / '.join(LINE_METHODS)}")
+        return errors
+
+    def _render(self, spec: Dict[str, Any], output_path: str, context: Dict[str, Any]) -> bool:
+        """渲染折线图（点数超过像素宽度时先降采样）"""
         data_series = spec.get('data_series', {})
         x_values = spec.get('x_values', None)
         title = spec.get('title', '')
@@ -81,18 +117,35 @@ class LineChartRenderer(BaseDiagramRenderer):
         if not data_series:
             return False
 
-        fig, ax = plt.subplots(figsize=(10, 6))
-
-        for label, data in data_series.items():
-            fmt_label = self._format_label(label)
-            if x_values:
-                ax.plot(x_values, data, marker='o', label=fmt_label, linewidth=2)
-            else:
-                ax.plot(data, marker='o', label=fmt_label, linewidth=2)
-
-        ax.set_xlabel(self._format_label(xlabel), fontsize=12)
-        ax.set_ylabel(self._format_label(ylabel), fontsize=12)
-        ax.set_title(self._format_label(title), fontsize=14, fontweight='bold')
+        fig, ax = self._new_figure(figsize=(10, 6))
+
+        pixels = self._pixel_width(context, 10)
+        method = spec.get('downsample', 'lttb')
+        longest = max(len(data) for data in data_series.values())
+
+        if longest <= pixels or method == 'none':
+            for label, data in data_series.items():
+                fmt_label = self._format_label(label, context)
+                marker = 'o' if len(data) <= MAX_MARKERS else None
+                if x_values:
+                    ax.plot(x_values, data, marker=marker, label=fmt_label, linewidth=2)
+                else:
+                    ax.plot(data, marker=marker, label=fmt_label, linewidth=2)
+        else:
+            # 非数值横轴（如日期字符串）按序号降采样，再稀疏地标注原始刻度
+            numeric_x = bool(x_values) and all(self._is_number(v) for v in x_values)
+            for label, data in data_series.items():
+                x = np.asarray(x_values if numeric_x else np.arange(len(data)), dtype=float)
+                xs, ys = downsample_line(x, np.asarray(data, dtype=float), pixels, method)
+                ax.plot(xs, ys, label=self._format_label(label, context), linewidth=2)
+            if x_values and not numeric_x:
+                ticks = sparse_ticks(len(x_values), MAX_TICK_LABELS)
+                ax.set_xticks(ticks)
+                ax.set_xticklabels([str(x_values[i]) for i in ticks])
+
+        ax.set_xlabel(self._format_label(xlabel, context), fontsize=12)
+        ax.set_ylabel(self._format_label(ylabel, context), fontsize=12)
+        ax.set_title(self._format_label(title, context), fontsize=14, fontweight='bold')
 
         if show_legend and len(data_series) > 1:
             ax.legend(fontsize=11)
@@ -100,9 +153,7 @@ class LineChartRenderer(BaseDiagramRenderer):
         ax.tick_params(axis='both', labelsize=11)
         ax.grid(alpha=0.3)
 
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=200, bbox_inches='tight', facecolor='white')
-        plt.close()
+        self._save_figure(fig, output_path, context)
 
         return True
 
@@ -112,11 +163,19 @@ class PieChartRenderer(BaseDiagramRenderer):
 
     diagram_type = "pie_chart"
 
-    def _setup_fonts(self):
-        plt.rcParams['font.sans-serif'] = ['STHeiti', 'SimHei', 'Arial Unicode MS']
-        plt.rcParams['axes.unicode_minus'] = False
-
-    def render(self, spec: Dict[str, Any], output_path: str) -> bool:
+    def spec_errors(self, spec: Dict[str, Any]) -> List[str]:
+        errors = super().spec_errors(spec)
+        if errors:
+            return errors
+        self._check_numbers(spec, 'data', errors, required=True)
+        if not errors and any(v < 0 for v in spec['data']):
+            errors.append('data 不能包含负数')
+        self._check_lengths(spec, 'labels', 'data', errors)
+        self._check_lengths(spec, 'explode', 'data', errors)
+        self._check_lengths(spec, 'colors', 'data', errors)
+        return errors
+
+    def _render(self, spec: Dict[str, Any], output_path: str, context: Dict[str, Any]) -> bool:
         """渲染饼图"""
         data = spec.get('data', [])
         labels = spec.get('labels', [])
@@ -128,14 +187,14 @@ class PieChartRenderer(BaseDiagramRenderer):
         if not data:
             return False
 
-        fig, ax = plt.subplots(figsize=(8, 8))
+        fig, ax = self._new_figure(figsize=(8, 8))
 
         autopct = '%1.1f%%' if show_percentage else None
         chart_colors = colors if colors else plt.cm.Set3(np.linspace(0, 1, len(data)))
 
         ax.pie(
             data,
-            labels=[self._format_label(label) for label in labels],
+            labels=[self._format_label(label, context) for label in labels],
             autopct=autopct,
             colors=chart_colors,
             explode=explode,
@@ -143,10 +202,8 @@ class PieChartRenderer(BaseDiagramRenderer):
             textprops={'fontsize': 11}
         )
 
-        ax.set_title(self._format_label(title), fontsize=14, fontweight='bold')
+        ax.set_title(self._format_label(title, context), fontsize=14, fontweight='bold')
 
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=200, bbox_inches='tight', facecolor='white')
-        plt.close()
+        self._save_figure(fig, output_path, context)
 
         return True
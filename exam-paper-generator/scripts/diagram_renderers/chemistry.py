@@ -5,15 +5,14 @@
 包含：原子结构图、分子结构图、元素周期表、实验装置图
 """
 
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 import matplotlib.patches as patches
-from matplotlib.patches import Circle, FancyBboxPatch, FancyArrowPatch
+from matplotlib.patches import Circle, FancyBboxPatch, FancyArrowPatch, PathPatch
+from matplotlib.transforms import Affine2D
 import numpy as np
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 
 from .base import BaseDiagramRenderer
+from .apparatus import ApparatusGlyph, GlyphLibrary
 
 
 class AtomStructureRenderer(BaseDiagramRenderer):
@@ -21,19 +20,33 @@ class AtomStructureRenderer(BaseDiagramRenderer):
 
     diagram_type = "atom_structure"
 
-    def _setup_fonts(self):
-        """设置中文字体"""
-        plt.rcParams['font.sans-serif'] = ['STHeiti', 'SimHei', 'Arial Unicode MS', 'DejaVu Sans']
-        plt.rcParams['axes.unicode_minus'] = False
+    rc_params = {
+        **BaseDiagramRenderer.rc_params,
+        'font.sans-serif': ['STHeiti', 'SimHei', 'Arial Unicode MS', 'DejaVu Sans'],
+    }
 
-    def render(self, spec: Dict[str, Any], output_path: str) -> bool:
+    def spec_errors(self, spec: Dict[str, Any]) -> List[str]:
+        errors = super().spec_errors(spec)
+        if errors:
+            return errors
+        shells = spec.get('electron_shells', [])
+        if not isinstance(shells, list) or not all(isinstance(n, int) and n >= 0 for n in shells):
+            errors.append('electron_shells 必须是非负整数数组')
+        elif len(shells) > 4:
+            errors.append('electron_shells 最多支持 4 层')
+        charge = spec.get('nucleus_charge', 0)
+        if not isinstance(charge, int) or isinstance(charge, bool):
+            errors.append('nucleus_charge 必须是整数')
+        return errors
+
+    def _render(self, spec: Dict[str, Any], output_path: str, context: Dict[str, Any]) -> bool:
         """渲染原子结构图"""
         element = spec.get('element', '?')
         nucleus_charge = spec.get('nucleus_charge', 0)
         electron_shells = spec.get('electron_shells', [])
         show_label = spec.get('show_label', True)
 
-        fig, ax = plt.subplots(figsize=(6, 6))
+        fig, ax = self._new_figure(figsize=(6, 6))
         ax.set_xlim(-4, 4)
         ax.set_ylim(-4, 4)
         ax.set_aspect('equal')
@@ -71,11 +84,9 @@ class AtomStructureRenderer(BaseDiagramRenderer):
         # 标签
         if show_label:
             label = f'{element}（{nucleus_charge}）原子结构示意图'
-            ax.text(0, -3.7, self._format_label(label), ha='center', va='center', fontsize=12)
+            ax.text(0, -3.7, self._format_label(label, context), ha='center', va='center', fontsize=12)
 
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=200, bbox_inches='tight', facecolor='white')
-        plt.close()
+        self._save_figure(fig, output_path, context)
 
         return True
 
@@ -85,27 +96,27 @@ class MolecularStructureRenderer(BaseDiagramRenderer):
 
     diagram_type = "molecular_structure"
 
-    def _setup_fonts(self):
-        plt.rcParams['font.sans-serif'] = ['STHeiti', 'SimHei', 'Arial Unicode MS']
-        plt.rcParams['axes.unicode_minus'] = False
+    def spec_errors(self, spec: Dict[str, Any]) -> List[str]:
+        errors = super().spec_errors(spec)
+        if not errors and not (spec.get('structure') or spec.get('formula')):
+            errors.append('需要提供 formula 或 structure')
+        return errors
 
-    def render(self, spec: Dict[str, Any], output_path: str) -> bool:
+    def _render(self, spec: Dict[str, Any], output_path: str, context: Dict[str, Any]) -> bool:
         """渲染分子结构图"""
         # 简化实现：显示文本形式的结构式
         formula = spec.get('formula', '')
         structure = spec.get('structure', '')
 
-        fig, ax = plt.subplots(figsize=(8, 3))
+        fig, ax = self._new_figure(figsize=(8, 3))
         ax.set_xlim(0, 10)
         ax.set_ylim(0, 3)
         ax.axis('off')
 
-        ax.text(5, 1.5, self._format_label(structure or formula), ha='center', va='center',
+        ax.text(5, 1.5, self._format_label(structure or formula, context), ha='center', va='center',
                 fontsize=18, fontfamily='monospace')
 
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=200, bbox_inches='tight', facecolor='white')
-        plt.close()
+        self._save_figure(fig, output_path, context)
 
         return True
 
@@ -131,23 +142,31 @@ class PeriodicTableRenderer(BaseDiagramRenderer):
         11: (3, 1), 12: (3, 2), 13: (3, 13), 14: (3, 14), 15: (3, 15), 16: (3, 16), 17: (3, 17), 18: (3, 18),
     }
 
-    def _setup_fonts(self):
-        plt.rcParams['font.sans-serif'] = ['STHeiti', 'SimHei', 'Arial Unicode MS']
-        plt.rcParams['axes.unicode_minus'] = False
-
-    def render(self, spec: Dict[str, Any], output_path: str) -> bool:
+    def spec_errors(self, spec: Dict[str, Any]) -> List[str]:
+        errors = super().spec_errors(spec)
+        if errors:
+            return errors
+        highlight = spec.get('highlight_elements', [])
+        if not isinstance(highlight, list) or not all(isinstance(e, str) for e in highlight):
+            errors.append('highlight_elements 必须是元素符号数组')
+        periods = spec.get('show_periods', [1, 2, 3])
+        if not isinstance(periods, list) or any(p not in (1, 2, 3) for p in periods):
+            errors.append('show_periods 只支持 1、2、3 周期')
+        return errors
+
+    def _render(self, spec: Dict[str, Any], output_path: str, context: Dict[str, Any]) -> bool:
         """渲染元素周期表（局部）"""
         highlight_elements = spec.get('highlight_elements', [])
         show_periods = spec.get('show_periods', [1, 2, 3])
         show_groups = spec.get('show_groups', list(range(1, 19)))
 
-        fig, ax = plt.subplots(figsize=(12, 4))
+        fig, ax = self._new_figure(figsize=(12, 4))
         ax.set_xlim(0, 19)
         ax.set_ylim(0, 4.5)
         ax.axis('off')
 
         # 标题
-        ax.text(9.5, 4.2, self._format_label('元素周期表（短周期）'), ha='center', va='center',
+        ax.text(9.5, 4.2, self._format_label('元素周期表（短周期）', context), ha='center', va='center',
                 fontsize=13, fontweight='bold')
 
         # 绘制元素格子
@@ -184,9 +203,7 @@ class PeriodicTableRenderer(BaseDiagramRenderer):
             ax.text(x, y-0.05, symbol, ha='center', va='center',
                     fontsize=12, fontweight='bold')
 
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=200, bbox_inches='tight', facecolor='white')
-        plt.close()
+        self._save_figure(fig, output_path, context)
 
         return True
 
@@ -196,86 +213,140 @@ class ExperimentSetupRenderer(BaseDiagramRenderer):
 
     diagram_type = "experiment_setup"
 
-    def _setup_fonts(self):
-        plt.rcParams['font.sans-serif'] = ['STHeiti', 'SimHei', 'Arial Unicode MS']
-        plt.rcParams['axes.unicode_minus'] = False
-
-    def render(self, spec: Dict[str, Any], output_path: str) -> bool:
+    # 相邻仪器之间的间距（数据坐标）
+    GAP = 1.4
+    # 每个数据坐标单位对应的图像尺寸（英寸）
+    UNIT_INCH = 1.0
+    # 图像四周留白
+    MARGIN = 0.5
+
+    def spec_errors(self, spec: Dict[str, Any]) -> List[str]:
+        errors = super().spec_errors(spec)
+        if errors:
+            return errors
+        apparatus = spec.get('apparatus')
+        if not isinstance(apparatus, list) or not apparatus:
+            return ['apparatus 必须是非空数组']
+        names = set()
+        for i, app in enumerate(apparatus):
+            if not isinstance(app, dict):
+                errors.append(f'apparatus[{i}] 必须是对象')
+                continue
+            names.add(app.get('name', f'装置{i+1}'))
+            glyph = app.get('glyph')
+            if glyph and glyph not in GlyphLibrary.list_available():
+                errors.append(f'apparatus[{i}].glyph 未知: {glyph}')
+        for i, conn in enumerate(spec.get('connections', [])):
+            if not isinstance(conn, dict):
+                errors.append(f'connections[{i}] 必须是对象')
+                continue
+            for key in ('from', 'to'):
+                if conn.get(key) not in names:
+                    errors.append(f'connections[{i}].{key} 引用了不存在的装置: {conn.get(key)}')
+        if spec.get('layout', 'horizontal') not in ('horizontal', 'vertical'):
+            errors.append('layout 只能是 horizontal 或 vertical')
+        return errors
+
+    def _render(self, spec: Dict[str, Any], output_path: str, context: Dict[str, Any]) -> bool:
         """渲染实验装置图"""
         apparatus = spec.get('apparatus', [])
         connections = spec.get('connections', [])
         layout = spec.get('layout', 'horizontal')
 
-        n = len(apparatus)
-        if n == 0:
+        if not apparatus:
             return False
 
-        fig_width = max(12, n * 3)
-        fig, ax = plt.subplots(figsize=(fig_width, 4))
-
-        if layout == 'horizontal':
-            ax.set_xlim(0, n * 3 + 1)
-            ax.set_ylim(0, 4)
-        else:
-            ax.set_xlim(0, 6)
-            ax.set_ylim(0, n * 2 + 1)
+        # 计算布局：按图元实际尺寸依次排列
+        placements = self._layout(apparatus, layout)
 
+        fig, ax = self._new_figure()
         ax.axis('off')
 
         # 存储位置用于连接
         positions = {}
 
-        for i, app in enumerate(apparatus):
+        for i, (app, glyph, origin) in enumerate(placements):
             name = app.get('name', f'装置{i+1}')
             content = app.get('content', '')
+            positions[name] = (glyph, origin)
 
-            if layout == 'horizontal':
-                x = i * 3 + 1.5
-                y = 2
-            else:
-                x = 3
-                y = n * 2 - i * 2
-
-            positions[name] = (x, y)
-
-            # 绘制装置（简化为方框）
-            rect = FancyBboxPatch((x-1, y-0.6), 2, 1.2,
-                                   boxstyle="round,pad=0.05",
-                                   facecolor='#E3F2FD', edgecolor='#1976D2',
-                                   linewidth=2)
-            ax.add_patch(rect)
+            self._draw_glyph(ax, glyph, origin)
 
+            x, y = origin
             # 装置名称
-            ax.text(x, y+0.2, self._format_label(name), ha='center', va='center',
+            ax.text(x, y - 0.3, self._format_label(name, context), ha='center', va='center',
                     fontsize=11, fontweight='bold')
             # 内容物
             if content:
-                ax.text(x, y-0.2, self._format_label(content), ha='center', va='center',
+                ax.text(x, y - 0.65, self._format_label(content, context), ha='center', va='center',
                         fontsize=10, color='#666')
 
         # 绘制连接
+        route_y = max(origin[1] + glyph.height for _, glyph, origin in placements) + 0.35
         for conn in connections:
             from_name = conn.get('from', '')
             to_name = conn.get('to', '')
             label = conn.get('label', '')
 
             if from_name in positions and to_name in positions:
-                x1, y1 = positions[from_name]
-                x2, y2 = positions[to_name]
+                from_glyph, from_origin = positions[from_name]
+                to_glyph, to_origin = positions[to_name]
+                x1, y1 = from_glyph.port('out', from_origin)
+                x2, y2 = to_glyph.port('in', to_origin)
 
                 if layout == 'horizontal':
-                    ax.annotate('', xy=(x2-1, y2), xytext=(x1+1, y1),
-                               arrowprops=dict(arrowstyle='->', color='#333', lw=2))
+                    # 导管：向上引出，水平连接，再向下接入
+                    ax.plot([x1, x1, x2], [y1, route_y, route_y], color='#333', lw=2)
+                    ax.annotate('', xy=(x2, y2), xytext=(x2, route_y),
+                                arrowprops=dict(arrowstyle='->', color='#333', lw=2))
                     if label:
-                        ax.text((x1+x2)/2, y1+0.8, self._format_label(label), ha='center', fontsize=10)
+                        ax.text((x1 + x2) / 2, route_y + 0.2, self._format_label(label, context),
+                                ha='center', fontsize=10)
                 else:
-                    ax.annotate('', xy=(x2, y2+0.6), xytext=(x1, y1-0.6),
-                               arrowprops=dict(arrowstyle='->', color='#333', lw=2))
+                    ax.annotate('', xy=(x2, y2), xytext=(from_origin[0], from_origin[1] - 0.9),
+                                arrowprops=dict(arrowstyle='->', color='#333', lw=2))
                     if label:
-                        ax.text(x1+1, (y1+y2)/2, self._format_label(label), ha='left', fontsize=10)
+                        ax.text(x2 + 0.3, (from_origin[1] - 0.9 + y2) / 2,
+                                self._format_label(label, context), ha='left', fontsize=10)
+
+        # 根据实际内容自动确定范围与图像尺寸
+        xmin = min(o[0] - g.width / 2 for _, g, o in placements) - self.MARGIN
+        xmax = max(o[0] + g.width / 2 for _, g, o in placements) + self.MARGIN
+        ymin = min(o[1] for _, _, o in placements) - 0.9 - self.MARGIN
+        ymax = route_y + 0.5 + self.MARGIN
+        if layout != 'horizontal':
+            xmin -= self.GAP
+            xmax += self.GAP
+        ax.set_xlim(xmin, xmax)
+        ax.set_ylim(ymin, ymax)
+        ax.set_aspect('equal')
+        fig.set_size_inches((xmax - xmin) * self.UNIT_INCH, (ymax - ymin) * self.UNIT_INCH)
 
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=200, bbox_inches='tight', facecolor='white')
-        plt.close()
+        self._save_figure(fig, output_path, context)
 
         return True
+
+    def _layout(self, apparatus: List[Dict], layout: str) -> List[Tuple[Dict, ApparatusGlyph, Tuple[float, float]]]:
+        """按图元尺寸计算每个仪器的放置原点（底部中心）"""
+        placements = []
+        cursor = 0.0
+
+        if layout == 'horizontal':
+            for app in apparatus:
+                glyph = GlyphLibrary.resolve(app)
+                placements.append((app, glyph, (cursor + glyph.width / 2, 0.0)))
+                cursor += glyph.width + self.GAP
+        else:
+            for app in apparatus:
+                glyph = GlyphLibrary.resolve(app)
+                cursor -= glyph.height
+                placements.append((app, glyph, (0.0, cursor)))
+                cursor -= self.GAP
+
+        return placements
+
+    def _draw_glyph(self, ax, glyph: ApparatusGlyph, origin: Tuple[float, float]):
+        """以平移变换实例化缓存中的图元路径"""
+        transform = Affine2D().translate(*origin) + ax.transData
+        for path, style in glyph.layers:
+            ax.add_patch(PathPatch(path, transform=transform, **style))
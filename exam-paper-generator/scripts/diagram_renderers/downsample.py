@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+大数据量序列的降采样
+折线图按输出像素宽度做 LTTB 或最大/最小值分桶，柱状图按像素宽度分箱聚合，
+使绘制耗时与输入规模无关
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# 支持的折线降采样方法
+LINE_METHODS = ('lttb', 'minmax', 'none')
+# 支持的柱状图分箱聚合方式
+BIN_AGGREGATES = ('mean', 'sum', 'max', 'min')
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets 降采样
+
+    Args:
+        x: 横坐标（单调递增）
+        y: 纵坐标
+        threshold: 保留的点数（含首尾）
+
+    Returns:
+        保留点的下标
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # 首尾点之外的点平均分到 threshold - 2 个桶
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    prev = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # 下一桶的平均点（最后一桶以终点为参照）
+        next_start, next_end = end, (edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # 选取与前一选中点、下一桶平均点围成三角形面积最大的点
+        px, py = x[prev], y[prev]
+        area = np.abs((px - avg_x) * (y[start:end] - py) - (px - x[start:end]) * (avg_y - py))
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+
+    return selected
+
+
+def minmax(y: np.ndarray, buckets: int) -> np.ndarray:
+    """
+    最大/最小值分桶降采样：每个桶保留最小值与最大值所在的点（按原顺序）
+
+    Args:
+        y: 纵坐标
+        buckets: 桶数（约为像素列数）
+
+    Returns:
+        保留点的下标
+    """
+    n = len(y)
+    if buckets * 2 >= n or buckets < 1:
+        return np.arange(n)
+
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    indices = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        segment = y[start:end]
+        low, high = start + int(np.argmin(segment)), start + int(np.argmax(segment))
+        indices.extend(sorted({low, high}))
+    indices.extend([0, n - 1])
+    return np.unique(indices)
+
+
+def downsample_line(
+    x: np.ndarray, y: np.ndarray, pixels: int, method: str = 'lttb'
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    把折线降采样到与像素宽度相当的点数
+
+    Args:
+        x: 横坐标
+        y: 纵坐标
+        pixels: 绘图区的像素宽度
+        method: lttb / minmax / none
+
+    Returns:
+        (x, y) 降采样后的坐标
+    """
+    if method == 'minmax':
+        indices = minmax(y, pixels)
+    elif method == 'lttb':
+        indices = lttb(x, y, pixels)
+    else:
+        return x, y
+    return x[indices], y[indices]
+
+
+def bin_values(
+    values: np.ndarray, bins: int, aggregate: str = 'mean'
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    把连续的柱分箱聚合
+
+    Args:
+        values: 各柱的数值
+        bins: 分箱数
+        aggregate: mean / sum / max / min
+
+    Returns:
+        (聚合后的数值, 各箱起始下标)
+    """
+    n = len(values)
+    starts = np.unique(np.linspace(0, n, bins + 1).astype(int)[:-1])
+    if aggregate == 'sum':
+        result = np.add.reduceat(values, starts)
+    elif aggregate == 'max':
+        result = np.maximum.reduceat(values, starts)
+    elif aggregate == 'min':
+        result = np.minimum.reduceat(values, starts)
+    else:
+        counts = np.diff(np.append(starts, n))
+        result = np.add.reduceat(values, starts) / counts
+    return result, starts
+
+
+def bin_labels(labels: Optional[List[str]], starts: np.ndarray, total: int) -> List[str]:
+    """分箱后的标签：“首项–末项”"""
+    ends = np.append(starts[1:], total) - 1
+    if not labels:
+        return [f'{s + 1}–{e + 1}' if e > s else f'{s + 1}' for s, e in zip(starts, ends)]
+    return [f'{labels[s]}–{labels[e]}' if e > s else str(labels[s]) for s, e in zip(starts, ends)]
+
+
+def sparse_ticks(count: int, max_ticks: int) -> np.ndarray:
+    """在 count 个位置中均匀选取不超过 max_ticks 个刻度"""
+    if count <= max_ticks:
+        return np.arange(count)
+    return np.unique(np.linspace(0, count - 1, max_ticks).astype(int))
@@ -4,15 +4,17 @@
 图例渲染器工厂
 """
 
+import threading
 from typing import Dict, Optional, Type
 from .base import BaseDiagramRenderer
 
 
 class DiagramRendererFactory:
-    """图例渲染器工厂"""
+    """图例渲染器工厂（渲染器实例无状态，按类型共享，可跨线程使用）"""
 
     _renderers: Dict[str, Type[BaseDiagramRenderer]] = {}
     _instances: Dict[str, BaseDiagramRenderer] = {}
+    _lock = threading.RLock()
 
     @classmethod
     def register(cls, diagram_type: str, renderer_class: Type[BaseDiagramRenderer]):
@@ -39,21 +41,26 @@ class DiagramRendererFactory:
         # 延迟导入，避免循环依赖
         cls._ensure_registered()
 
-        if diagram_type not in cls._instances:
-            renderer_class = cls._renderers.get(diagram_type)
-            if renderer_class:
-                cls._instances[diagram_type] = renderer_class()
-            else:
-                return None
+        with cls._lock:
+            if diagram_type not in cls._instances:
+                renderer_class = cls._renderers.get(diagram_type)
+                if renderer_class:
+                    cls._instances[diagram_type] = renderer_class()
+                else:
+                    return None
 
-        return cls._instances.get(diagram_type)
+            return cls._instances.get(diagram_type)
 
     @classmethod
     def _ensure_registered(cls):
         """确保所有渲染器已注册"""
-        if cls._renderers:
-            return
+        with cls._lock:
+            if not cls._renderers:
+                cls._register_builtin()
 
+    @classmethod
+    def _register_builtin(cls):
+        """注册内置渲染器"""
         # 导入并注册所有渲染器
         from .chemistry import (
             AtomStructureRenderer,
@@ -4,9 +4,6 @@
 流程图渲染器
 """
 
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 from matplotlib.patches import FancyBboxPatch, FancyArrowPatch
 import numpy as np
 from typing import Dict, Any, List, Tuple
@@ -27,11 +24,32 @@ class FlowchartRenderer(BaseDiagramRenderer):
         'parallelogram': {'boxstyle': 'round,pad=0.1', 'facecolor': '#9b59b6', 'edgecolor': '#8e44ad'},
     }
 
-    def _setup_fonts(self):
-        plt.rcParams['font.sans-serif'] = ['STHeiti', 'SimHei', 'Arial Unicode MS']
-        plt.rcParams['axes.unicode_minus'] = False
-
-    def render(self, spec: Dict[str, Any], output_path: str) -> bool:
+    def spec_errors(self, spec: Dict[str, Any]) -> List[str]:
+        errors = super().spec_errors(spec)
+        if errors:
+            return errors
+        nodes = spec.get('nodes')
+        if not isinstance(nodes, list) or not nodes:
+            return ['nodes 必须是非空数组']
+        bad_nodes = [i for i, node in enumerate(nodes) if not isinstance(node, dict)]
+        if bad_nodes:
+            return [f'nodes[{i}] 必须是对象' for i in bad_nodes]
+        ids = [node.get('id', f'node_{i}') for i, node in enumerate(nodes)]
+        duplicates = sorted({i for i in ids if ids.count(i) > 1})
+        if duplicates:
+            errors.append(f'nodes 中存在重复 id: {", ".join(duplicates)}')
+        for i, edge in enumerate(spec.get('edges', [])):
+            if not isinstance(edge, dict):
+                errors.append(f'edges[{i}] 必须是对象')
+                continue
+            for key in ('from', 'to'):
+                if edge.get(key) not in ids:
+                    errors.append(f'edges[{i}].{key} 引用了不存在的节点: {edge.get(key)}')
+        if spec.get('direction', 'LR') not in ('LR', 'TB'):
+            errors.append('direction 只能是 LR 或 TB')
+        return errors
+
+    def _render(self, spec: Dict[str, Any], output_path: str, context: Dict[str, Any]) -> bool:
         """渲染流程图"""
         nodes = spec.get('nodes', [])
         edges = spec.get('edges', [])
@@ -59,7 +77,7 @@ class FlowchartRenderer(BaseDiagramRenderer):
             fig_width = 8
             fig_height = max(8, len(nodes) * v_spacing + 2)
 
-        fig, ax = plt.subplots(figsize=(fig_width, fig_height))
+        fig, ax = self._new_figure(figsize=(fig_width, fig_height))
         ax.axis('off')
 
         # 绘制边（先画边，再画节点，确保节点在上面）
@@ -72,14 +90,15 @@ class FlowchartRenderer(BaseDiagramRenderer):
             node_width,
             node_height,
             edge_font_size,
+            context,
         )
 
         # 绘制节点
-        self._draw_nodes(ax, nodes, positions, node_width, node_height, font_size, box_alpha)
+        self._draw_nodes(ax, nodes, positions, node_width, node_height, font_size, box_alpha, context)
 
         # 标题
         if title:
-            ax.set_title(self._format_label(title), fontsize=13, fontweight='bold', pad=20)
+            ax.set_title(self._format_label(title, context), fontsize=13, fontweight='bold', pad=20)
 
         # 自动调整范围
         all_x = [p[0] for p in positions.values()]
@@ -88,9 +107,7 @@ class FlowchartRenderer(BaseDiagramRenderer):
         ax.set_xlim(min(all_x) - margin, max(all_x) + margin)
         ax.set_ylim(min(all_y) - margin, max(all_y) + margin)
 
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=200, bbox_inches='tight', facecolor='white')
-        plt.close()
+        self._save_figure(fig, output_path, context)
 
         return True
 
@@ -130,6 +147,7 @@ class FlowchartRenderer(BaseDiagramRenderer):
         node_height: float,
         font_size: int,
         box_alpha: float,
+        context: Dict[str, Any],
     ):
         """绘制节点"""
         half_width = node_width / 2
@@ -161,7 +179,7 @@ class FlowchartRenderer(BaseDiagramRenderer):
             ax.add_patch(box)
 
             # 绘制文字
-            ax.text(x, y, self._format_label(label), ha='center', va='center',
+            ax.text(x, y, self._format_label(label, context), ha='center', va='center',
                    fontsize=font_size, fontweight='bold', color='white',
                    wrap=True, zorder=3)
 
@@ -175,6 +193,7 @@ class FlowchartRenderer(BaseDiagramRenderer):
         node_width: float,
         node_height: float,
         edge_font_size: int,
+        context: Dict[str, Any],
     ):
         """绘制边"""
         # 创建节点ID到索引的映射
@@ -209,6 +228,7 @@ class FlowchartRenderer(BaseDiagramRenderer):
                     node_width,
                     node_height,
                     edge_font_size,
+                    context,
                 )
             else:
                 # 正常边：直线箭头
@@ -223,6 +243,7 @@ class FlowchartRenderer(BaseDiagramRenderer):
                     node_width,
                     node_height,
                     edge_font_size,
+                    context,
                 )
 
     def _draw_normal_edge(
@@ -237,6 +258,7 @@ class FlowchartRenderer(BaseDiagramRenderer):
         node_width: float,
         node_height: float,
         edge_font_size: int,
+        context: Dict[str, Any],
     ):
         """绘制正常边"""
         if direction == 'LR':
@@ -253,7 +275,7 @@ class FlowchartRenderer(BaseDiagramRenderer):
         if label:
             mid_x = (start[0] + end[0]) / 2
             mid_y = (start[1] + end[1]) / 2 + (node_height * 0.35)
-            ax.text(mid_x, mid_y, self._format_label(label), ha='center', va='center',
+            ax.text(mid_x, mid_y, self._format_label(label, context), ha='center', va='center',
                    fontsize=edge_font_size, color='#666', zorder=3)
 
     def _draw_back_edge(
@@ -268,6 +290,7 @@ class FlowchartRenderer(BaseDiagramRenderer):
         node_width: float,
         node_height: float,
         edge_font_size: int,
+        context: Dict[str, Any],
     ):
         """绘制回路边（曲线）"""
         if direction == 'LR':
@@ -302,8 +325,8 @@ class FlowchartRenderer(BaseDiagramRenderer):
 
         if label:
             if direction == 'LR':
-                ax.text((x1 + x2) / 2, offset - 0.3, self._format_label(label),
+                ax.text((x1 + x2) / 2, offset - 0.3, self._format_label(label, context),
                        ha='center', va='center', fontsize=edge_font_size, color='#e74c3c', zorder=3)
             else:
-                ax.text(offset + 0.3, (y1 + y2) / 2, self._format_label(label),
+                ax.text(offset + 0.3, (y1 + y2) / 2, self._format_label(label, context),
                        ha='left', va='center', fontsize=edge_font_size, color='#e74c3c', zorder=3)
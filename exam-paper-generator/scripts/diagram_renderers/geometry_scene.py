@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+几何场景与约束求解
+用约束描述几何图形（“AB 的中点”“过 C 作 AB 的垂线的垂足”“△ABC 的外心”），
+按依赖层次把派生点分组，每一层内同类约束用 numpy 一次性批量求解。
+求解结果按几何内容哈希缓存，只改标签、标题或样式的变体直接复用
+
+场景格式:
+    {
+      "points": {"A": [0, 0], "B": [4, 0], "C": [1, 3]},
+      "derived": [
+        {"name": "M", "op": "midpoint", "of": ["A", "B"]},
+        {"name": "H", "op": "foot", "point": "C", "line": ["A", "B"]},
+        {"name": "O", "op": "circumcenter", "of": ["A", "B", "C"]}
+      ],
+      "draw": [
+        {"type": "polygon", "points": ["A", "B", "C"]},
+        {"type": "segment", "points": ["C", "H"], "style": "--"},
+        {"type": "right_angle", "at": "H", "points": ["C", "B"]},
+        {"type": "circumcircle", "points": ["A", "B", "C"]}
+      ]
+    }
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+# 缓存的已求解场景数
+SCENE_CACHE_SIZE = 256
+
+
+class GeometrySceneError(ValueError):
+    """场景描述无效或约束无法求解"""
+
+
+def _cross(u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    return u[:, 0] * v[:, 1] - u[:, 1] * v[:, 0]
+
+
+def _foot(p: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    d = b - a
+    t = np.einsum('ij,ij->i', p - a, d) / np.einsum('ij,ij->i', d, d)
+    return a + t[:, None] * d
+
+
+def _circumcenter(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    d = 2 * (a[:, 0] * (b[:, 1] - c[:, 1]) + b[:, 0] * (c[:, 1] - a[:, 1]) + c[:, 0] * (a[:, 1] - b[:, 1]))
+    a2, b2, c2 = (a ** 2).sum(1), (b ** 2).sum(1), (c ** 2).sum(1)
+    x = (a2 * (b[:, 1] - c[:, 1]) + b2 * (c[:, 1] - a[:, 1]) + c2 * (a[:, 1] - b[:, 1])) / d
+    y = (a2 * (c[:, 0] - b[:, 0]) + b2 * (a[:, 0] - c[:, 0]) + c2 * (b[:, 0] - a[:, 0])) / d
+    return np.stack([x, y], axis=1)
+
+
+def _incenter(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    la = np.linalg.norm(b - c, axis=1)[:, None]
+    lb = np.linalg.norm(c - a, axis=1)[:, None]
+    lc = np.linalg.norm(a - b, axis=1)[:, None]
+    return (la * a + lb * b + lc * c) / (la + lb + lc)
+
+
+def _intersection(p1: np.ndarray, p2: np.ndarray, p3: np.ndarray, p4: np.ndarray) -> np.ndarray:
+    d1, d2 = p2 - p1, p4 - p3
+    t = _cross(p3 - p1, d2) / _cross(d1, d2)
+    return p1 + t[:, None] * d1
+
+
+def _rotate(p: np.ndarray, c: np.ndarray, degrees: np.ndarray) -> np.ndarray:
+    theta = np.radians(degrees)
+    cos, sin = np.cos(theta), np.sin(theta)
+    v = p - c
+    return c + np.stack([v[:, 0] * cos - v[:, 1] * sin, v[:, 0] * sin + v[:, 1] * cos], axis=1)
+
+
+# 约束名 -> (取参数的函数, 批量求解函数)
+# 取参数的函数返回 (引用的点名列表, 数值参数列表)
+OPS: Dict[str, Tuple[Callable[[Dict], Tuple[List[str], List[float]]], Callable[..., np.ndarray]]] = {
+    'midpoint': (lambda d: (d['of'], []), lambda a, b: (a + b) / 2),
+    'divide': (lambda d: (d['of'], [d.get('ratio', 0.5)]), lambda a, b, t: a + t[:, None] * (b - a)),
+    'centroid': (lambda d: (d['of'], []), lambda a, b, c: (a + b + c) / 3),
+    'circumcenter': (lambda d: (d['of'], []), _circumcenter),
+    'incenter': (lambda d: (d['of'], []), _incenter),
+    'orthocenter': (lambda d: (d['of'], []), lambda a, b, c: a + b + c - 2 * _circumcenter(a, b, c)),
+    'foot': (lambda d: ([d['point']] + list(d['line']), []), _foot),
+    'reflect': (lambda d: ([d['point']] + list(d['line']), []), lambda p, a, b: 2 * _foot(p, a, b) - p),
+    'intersection': (lambda d: (list(d['lines'][0]) + list(d['lines'][1]), []), _intersection),
+    'rotate': (lambda d: ([d['point'], d['center']], [d.get('angle', 90)]), _rotate),
+}
+
+# 各约束引用的点数
+OP_ARITY = {
+    'midpoint': 2, 'divide': 2, 'centroid': 3, 'circumcenter': 3, 'incenter': 3,
+    'orthocenter': 3, 'foot': 3, 'reflect': 3, 'intersection': 4, 'rotate': 2,
+}
+
+
+def geometry_hash(scene: Dict[str, Any]) -> str:
+    """只取几何内容（给定点与约束）计算哈希，标签、标题、绘制样式不参与"""
+    body = json.dumps({'points': scene.get('points', {}), 'derived': scene.get('derived', [])},
+                      sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(body.encode('utf-8')).hexdigest()
+
+
+class GeometryScene:
+    """几何场景求解器"""
+
+    def __init__(self, scene: Dict[str, Any]):
+        self.scene = scene
+        self.points = scene.get('points', {}) or {}
+        self.derived = scene.get('derived', []) or []
+
+    def _parse(self) -> List[Tuple[Dict, List[str], List[float]]]:
+        """检查约束并解析出引用与数值参数"""
+        if not isinstance(self.points, dict):
+            raise GeometrySceneError('scene.points 必须是 {点名: [x, y]} 对象')
+        for name, xy in self.points.items():
+            if (not isinstance(xy, (list, tuple)) or len(xy) != 2
+                    or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in xy)):
+                raise GeometrySceneError(f'点 {name} 的坐标必须是两个数值')
+
+        if not isinstance(self.derived, list):
+            raise GeometrySceneError('scene.derived 必须是数组')
+
+        names = set(self.points)
+        parsed = []
+        for i, item in enumerate(self.derived):
+            if not isinstance(item, dict):
+                raise GeometrySceneError(f'derived[{i}] 必须是对象')
+            name, op = item.get('name'), item.get('op')
+            if not name:
+                raise GeometrySceneError(f'derived[{i}] 缺少 name')
+            if name in names:
+                raise GeometrySceneError(f'点名重复: {name}')
+            if op not in OPS:
+                raise GeometrySceneError(f'derived[{i}] 未知约束: {op}（支持 {", ".join(OPS)}）')
+            try:
+                refs, params = OPS[op][0](item)
+            except (KeyError, IndexError, TypeError):
+                raise GeometrySceneError(f'derived[{i}]（{op}）参数不完整')
+            if len(refs) != OP_ARITY[op]:
+                raise GeometrySceneError(f'derived[{i}]（{op}）需要 {OP_ARITY[op]} 个点，实际 {len(refs)} 个')
+            names.add(name)
+            parsed.append((item, list(refs), params))
+
+        known = set(self.points) | {item['name'] for item, _, _ in parsed}
+        for item, refs, _ in parsed:
+            missing = [r for r in refs if r not in known]
+            if missing:
+                raise GeometrySceneError(f"{item['name']} 引用了不存在的点: {', '.join(missing)}")
+        return parsed
+
+    def _levels(self, parsed) -> List[List[Tuple[Dict, List[str], List[float]]]]:
+        """按依赖深度分层（同层约束互不依赖，可批量求解）"""
+        depth = {name: 0 for name in self.points}
+        pending = list(parsed)
+        levels: List[List] = []
+        while pending:
+            ready = [p for p in pending if all(r in depth for r in p[1])]
+            if not ready:
+                raise GeometrySceneError(f"约束存在循环依赖: {', '.join(p[0]['name'] for p in pending)}")
+            for item, refs, params in ready:
+                level = max(depth[r] for r in refs) + 1
+                depth[item['name']] = level
+                while len(levels) < level:
+                    levels.append([])
+                levels[level - 1].append((item, refs, params))
+            pending = [p for p in pending if p[0]['name'] not in depth]
+        return levels
+
+    def solve(self) -> Dict[str, np.ndarray]:
+        """
+        求解所有点坐标
+
+        Returns:
+            {点名: array([x, y])}
+        """
+        parsed = self._parse()
+        coords = {name: np.asarray(xy, dtype=float) for name, xy in self.points.items()}
+
+        for level in self._levels(parsed):
+            groups: Dict[str, List] = {}
+            for entry in level:
+                groups.setdefault(entry[0]['op'], []).append(entry)
+
+            for op, entries in groups.items():
+                solver = OPS[op][1]
+                arity = OP_ARITY[op]
+                args = [np.stack([coords[refs[k]] for _, refs, _ in entries]) for k in range(arity)]
+                n_params = len(entries[0][2])
+                args += [np.asarray([params[k] for _, _, params in entries], dtype=float)
+                         for k in range(n_params)]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    result = solver(*args)
+                for (item, _, _), xy in zip(entries, result):
+                    if not np.all(np.isfinite(xy)):
+                        raise GeometrySceneError(f"{item['name']}（{op}）无解：点共线或直线平行")
+                    coords[item['name']] = xy
+        return coords
+
+
+_cache: 'OrderedDict[str, Dict[str, np.ndarray]]' = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def solve_scene(scene: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """求解场景（按几何哈希缓存）"""
+    key = geometry_hash(scene)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+
+    coords = GeometryScene(scene).solve()
+    with _cache_lock:
+        _cache[key] = coords
+        if len(_cache) > SCENE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return coords
+
+
+def circumcircle(a, b, c) -> Tuple[np.ndarray, float]:
+    """外接圆 (圆心, 半径)"""
+    center = _circumcenter(*(np.asarray(p, dtype=float)[None, :] for p in (a, b, c)))[0]
+    return center, float(np.linalg.norm(np.asarray(a, dtype=float) - center))
+
+
+def incircle(a, b, c) -> Tuple[np.ndarray, float]:
+    """内切圆 (圆心, 半径)"""
+    a, b, c = (np.asarray(p, dtype=float) for p in (a, b, c))
+    center = _incenter(a[None, :], b[None, :], c[None, :])[0]
+    return center, float(np.linalg.norm(_foot(center[None, :], a[None, :], b[None, :])[0] - center))
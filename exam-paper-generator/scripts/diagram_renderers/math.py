@@ -5,15 +5,13 @@
 包含：函数图像、坐标系、几何图形
 """
 
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 from matplotlib.patches import Circle, Polygon, FancyArrowPatch
 import numpy as np
-from typing import Dict, Any, List, Callable
+from typing import Dict, Any, List, Callable, Tuple
 
 from .base import BaseDiagramRenderer
+from .geometry_scene import GeometrySceneError, circumcircle, incircle, solve_scene
 
 
 class FunctionGraphRenderer(BaseDiagramRenderer):
@@ -21,11 +19,34 @@ class FunctionGraphRenderer(BaseDiagramRenderer):
 
     diagram_type = "function_graph"
 
-    def _setup_fonts(self):
-        plt.rcParams['font.sans-serif'] = ['STHeiti', 'SimHei', 'Arial Unicode MS']
-        plt.rcParams['axes.unicode_minus'] = False
-
-    def render(self, spec: Dict[str, Any], output_path: str) -> bool:
+    # 表达式中允许出现的名称
+    SAFE_NAMES = {'x', 'sin', 'cos', 'tan', 'exp', 'log', 'log10', 'sqrt', 'abs', 'pi', 'e'}
+
+    def spec_errors(self, spec: Dict[str, Any]) -> List[str]:
+        errors = super().spec_errors(spec)
+        if errors:
+            return errors
+        functions = spec.get('functions')
+        if not isinstance(functions, list) or not functions:
+            return ['functions 必须是非空数组']
+        for i, func_spec in enumerate(functions):
+            if not isinstance(func_spec, dict):
+                errors.append(f'functions[{i}] 必须是对象')
+                continue
+            expression = str(func_spec.get('expression', 'x'))
+            try:
+                code = compile(expression.replace('^', '**'), '<expression>', 'eval')
+            except SyntaxError:
+                errors.append(f'functions[{i}].expression 语法错误: {expression}')
+                continue
+            unknown = set(code.co_names) - self.SAFE_NAMES
+            if unknown:
+                errors.append(f'functions[{i}].expression 包含未知名称: {", ".join(sorted(unknown))}')
+        self._check_range(spec, 'x_range', errors)
+        self._check_range(spec, 'y_range', errors)
+        return errors
+
+    def _render(self, spec: Dict[str, Any], output_path: str, context: Dict[str, Any]) -> bool:
         """渲染函数图像"""
         functions = spec.get('functions', [])
         x_range = spec.get('x_range', [-10, 10])
@@ -38,7 +59,7 @@ class FunctionGraphRenderer(BaseDiagramRenderer):
         if not functions:
             return False
 
-        fig, ax = plt.subplots(figsize=(10, 8))
+        fig, ax = self._new_figure(figsize=(10, 8))
 
         x = np.linspace(x_range[0], x_range[1], 1000)
 
@@ -54,7 +75,7 @@ class FunctionGraphRenderer(BaseDiagramRenderer):
                 # 处理 y 值中的无穷大和 NaN
                 y = np.where(np.isfinite(y), y, np.nan)
 
-                ax.plot(x, y, label=self._format_label(label), color=color, linewidth=2)
+                ax.plot(x, y, label=self._format_label(label, context), color=color, linewidth=2)
             except Exception as e:
                 print(f"函数解析失败: {expression}, 错误: {e}")
                 continue
@@ -74,17 +95,15 @@ class FunctionGraphRenderer(BaseDiagramRenderer):
             ax.set_ylim(y_range)
 
         # 标签
-        ax.set_xlabel(self._format_label('x'), fontsize=11)
-        ax.set_ylabel(self._format_label('y'), fontsize=11)
-        ax.set_title(self._format_label(title), fontsize=13, fontweight='bold')
+        ax.set_xlabel(self._format_label('x', context), fontsize=11)
+        ax.set_ylabel(self._format_label('y', context), fontsize=11)
+        ax.set_title(self._format_label(title, context), fontsize=13, fontweight='bold')
 
         # 图例
         if show_legend and len(functions) > 0:
             ax.legend()
 
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=200, bbox_inches='tight', facecolor='white')
-        plt.close()
+        self._save_figure(fig, output_path, context)
 
         return True
 
@@ -116,11 +135,20 @@ class CoordinateSystemRenderer(BaseDiagramRenderer):
 
     diagram_type = "coordinate_system"
 
-    def _setup_fonts(self):
-        plt.rcParams['font.sans-serif'] = ['STHeiti', 'SimHei', 'Arial Unicode MS']
-        plt.rcParams['axes.unicode_minus'] = False
-
-    def render(self, spec: Dict[str, Any], output_path: str) -> bool:
+    def spec_errors(self, spec: Dict[str, Any]) -> List[str]:
+        errors = super().spec_errors(spec)
+        if errors:
+            return errors
+        self._check_range(spec, 'x_range', errors)
+        self._check_range(spec, 'y_range', errors)
+        for i, point in enumerate(spec.get('points', [])):
+            if not isinstance(point, dict):
+                errors.append(f'points[{i}] 必须是对象')
+            elif not (self._is_number(point.get('x', 0)) and self._is_number(point.get('y', 0))):
+                errors.append(f'points[{i}] 的坐标必须是数值')
+        return errors
+
+    def _render(self, spec: Dict[str, Any], output_path: str, context: Dict[str, Any]) -> bool:
         """渲染坐标系"""
         points = spec.get('points', [])
         vectors = spec.get('vectors', [])
@@ -130,7 +158,7 @@ class CoordinateSystemRenderer(BaseDiagramRenderer):
         title = spec.get('title', '')
         show_grid = spec.get('show_grid', True)
 
-        fig, ax = plt.subplots(figsize=(8, 8))
+        fig, ax = self._new_figure(figsize=(8, 8))
 
         # 坐标轴
         ax.axhline(y=0, color='k', linewidth=1)
@@ -149,7 +177,7 @@ class CoordinateSystemRenderer(BaseDiagramRenderer):
 
             ax.plot(x, y, 'o', color=color, markersize=8)
             if label:
-                ax.annotate(self._format_label(label), (x, y), xytext=(5, 5),
+                ax.annotate(self._format_label(label, context), (x, y), xytext=(5, 5),
                            textcoords='offset points', fontsize=10)
 
         # 绘制向量
@@ -165,7 +193,7 @@ class CoordinateSystemRenderer(BaseDiagramRenderer):
             if label:
                 mid_x = (start[0] + end[0]) / 2
                 mid_y = (start[1] + end[1]) / 2
-                ax.text(mid_x, mid_y, self._format_label(label), fontsize=10, color=color)
+                ax.text(mid_x, mid_y, self._format_label(label, context), fontsize=10, color=color)
 
         # 绘制直线
         for line in lines:
@@ -180,13 +208,11 @@ class CoordinateSystemRenderer(BaseDiagramRenderer):
         ax.set_xlim(x_range)
         ax.set_ylim(y_range)
         ax.set_aspect('equal')
-        ax.set_xlabel(self._format_label('x'), fontsize=11)
-        ax.set_ylabel(self._format_label('y'), fontsize=11)
-        ax.set_title(self._format_label(title), fontsize=13, fontweight='bold')
+        ax.set_xlabel(self._format_label('x', context), fontsize=11)
+        ax.set_ylabel(self._format_label('y', context), fontsize=11)
+        ax.set_title(self._format_label(title, context), fontsize=13, fontweight='bold')
 
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=200, bbox_inches='tight', facecolor='white')
-        plt.close()
+        self._save_figure(fig, output_path, context)
 
         return True
 
@@ -196,11 +222,152 @@ class GeometryRenderer(BaseDiagramRenderer):
 
     diagram_type = "geometry"
 
-    def _setup_fonts(self):
-        plt.rcParams['font.sans-serif'] = ['STHeiti', 'SimHei', 'Arial Unicode MS']
-        plt.rcParams['axes.unicode_minus'] = False
+    SHAPE_TYPES = ('circle', 'polygon', 'line', 'arc')
+
+    # 场景（scene）中可绘制的对象
+    SCENE_DRAW_TYPES = ('segment', 'line', 'polygon', 'circle', 'circumcircle', 'incircle', 'right_angle')
+
+    # 各绘制对象至少需要的 points 个数与必填键
+    SCENE_DRAW_MIN_POINTS = {'segment': 2, 'line': 2, 'polygon': 3, 'circle': 0,
+                             'circumcircle': 3, 'incircle': 3, 'right_angle': 2}
+    SCENE_DRAW_REQUIRED_KEYS = {'circle': ('center',), 'right_angle': ('at',)}
+
+    def spec_errors(self, spec: Dict[str, Any]) -> List[str]:
+        errors = super().spec_errors(spec)
+        if errors:
+            return errors
+        self._check_range(spec, 'x_range', errors)
+        self._check_range(spec, 'y_range', errors)
+        for i, shape in enumerate(spec.get('shapes', [])):
+            if not isinstance(shape, dict):
+                errors.append(f'shapes[{i}] 必须是对象')
+            elif shape.get('type') not in self.SHAPE_TYPES:
+                errors.append(f'shapes[{i}].type 未知: {shape.get("type")}')
+        if 'scene' in spec:
+            errors.extend(self._scene_errors(spec['scene']))
+        return errors
+
+    def _scene_errors(self, scene: Any) -> List[str]:
+        if not isinstance(scene, dict):
+            return ['scene 必须是对象']
+        try:
+            coords = solve_scene(scene)
+        except GeometrySceneError as e:
+            return [f'scene: {e}']
+
+        draw = scene.get('draw', [])
+        if not isinstance(draw, list):
+            return ['scene.draw 必须是数组']
+        errors = []
+        for i, item in enumerate(draw):
+            if not isinstance(item, dict):
+                errors.append(f'scene.draw[{i}] 必须是对象')
+                continue
+            draw_type = item.get('type')
+            if draw_type not in self.SCENE_DRAW_TYPES:
+                errors.append(f'scene.draw[{i}].type 未知: {draw_type}')
+                continue
+            points = item.get('points', [])
+            if not isinstance(points, list):
+                errors.append(f'scene.draw[{i}].points 必须是点名列表')
+                continue
+            min_points = self.SCENE_DRAW_MIN_POINTS[draw_type]
+            if len(points) < min_points:
+                errors.append(f'scene.draw[{i}] ({draw_type}) 至少需要 {min_points} 个点，实际 {len(points)} 个')
+            for key in self.SCENE_DRAW_REQUIRED_KEYS.get(draw_type, ()):
+                if key not in item:
+                    errors.append(f'scene.draw[{i}] ({draw_type}) 缺少 {key}')
+            refs = list(points)
+            refs += [item[k] for k in ('at', 'center', 'through') if k in item]
+            missing = [r for r in refs if r not in coords]
+            if missing:
+                errors.append(f"scene.draw[{i}] 引用了不存在的点: {', '.join(map(str, missing))}")
+        return errors
+
+    def _draw_scene(self, ax, scene: Dict[str, Any], context: Dict[str, Any]) -> Tuple[List[float], List]:
+        """
+        求解并绘制场景
+
+        Returns:
+            (图形包围盒 [xmin, xmax, ymin, ymax]（用于自动确定坐标范围）,
+             待坐标范围确定后再画的直线)
+        """
+        coords = solve_scene(scene)
+        xy = np.array(list(coords.values()))
+        extent = [xy[:, 0].min(), xy[:, 0].max(), xy[:, 1].min(), xy[:, 1].max()]
+        span = max(extent[1] - extent[0], extent[3] - extent[2], 1e-9)
+
+        def grow(center, radius):
+            extent[0] = min(extent[0], center[0] - radius)
+            extent[1] = max(extent[1], center[0] + radius)
+            extent[2] = min(extent[2], center[1] - radius)
+            extent[3] = max(extent[3], center[1] + radius)
+
+        lines = []
+        for item in scene.get('draw', []):
+            draw_type = item.get('type')
+            refs = [coords[name] for name in item.get('points', [])]
+            style = dict(color=item.get('color', 'black'), linewidth=item.get('width', 1.5),
+                         linestyle=item.get('style', '-'))
+
+            if draw_type == 'segment':
+                (p, q) = refs[:2]
+                ax.plot([p[0], q[0]], [p[1], q[1]], **style)
+
+            elif draw_type == 'line':
+                # 直线延伸到整个视野，等坐标范围确定后再画
+                lines.append((refs[0], refs[1], style))
+
+            elif draw_type == 'polygon':
+                ax.add_patch(Polygon(refs, closed=True, fill=item.get('fill', False),
+                                     facecolor=item.get('facecolor', 'lightblue'),
+                                     alpha=item.get('alpha', 1.0), edgecolor=style['color'],
+                                     linewidth=style['linewidth'], linestyle=style['linestyle']))
+
+            elif draw_type in ('circle', 'circumcircle', 'incircle'):
+                if draw_type == 'circle':
+                    center = coords[item['center']]
+                    if 'through' in item:
+                        radius = float(np.linalg.norm(coords[item['through']] - center))
+                    else:
+                        radius = float(item.get('radius', 1))
+                elif draw_type == 'circumcircle':
+                    center, radius = circumcircle(*refs[:3])
+                else:
+                    center, radius = incircle(*refs[:3])
+                ax.add_patch(Circle(center, radius, fill=False, edgecolor=style['color'],
+                                    linewidth=style['linewidth'], linestyle=style['linestyle']))
+                grow(center, radius)
+
+            elif draw_type == 'right_angle':
+                vertex = coords[item['at']]
+                size = item.get('size', 0.05 * span)
+                u, v = (r - vertex for r in refs[:2])
+                u = u / np.linalg.norm(u) * size
+                v = v / np.linalg.norm(v) * size
+                corner = np.array([vertex + u, vertex + u + v, vertex + v])
+                ax.plot(corner[:, 0], corner[:, 1], color=style['color'], linewidth=1)
+
+        # 点与标签：标签沿“远离图形中心”的方向偏移
+        labels = scene.get('labels', {})
+        hidden = set(scene.get('hidden', []))
+        middle = xy.mean(axis=0)
+        for name, (x, y) in coords.items():
+            if name in hidden:
+                continue
+            ax.plot(x, y, 'o', color='black', markersize=3)
+            text = labels.get(name, name)
+            if not text:
+                continue
+            direction = np.array([x, y]) - middle
+            norm = np.linalg.norm(direction)
+            direction = direction / norm if norm > 1e-9 else np.array([0.7, 0.7])
+            ax.annotate(self._format_label(text, context), (x, y), xytext=tuple(direction * 10),
+                        textcoords='offset points', fontsize=11, ha='center', va='center')
 
-    def render(self, spec: Dict[str, Any], output_path: str) -> bool:
+        return extent, lines
+
+    def _render(self, spec: Dict[str, Any], output_path: str, context: Dict[str, Any]) -> bool:
         """渲染几何图形"""
         shapes = spec.get('shapes', [])
         points = spec.get('points', [])
@@ -209,7 +376,14 @@ class GeometryRenderer(BaseDiagramRenderer):
         x_range = spec.get('x_range', [0, 10])
         y_range = spec.get('y_range', [0, 10])
 
-        fig, ax = plt.subplots(figsize=(8, 8))
+        fig, ax = self._new_figure(figsize=(8, 8))
+
+        scene_lines = []
+        if 'scene' in spec:
+            extent, scene_lines = self._draw_scene(ax, spec['scene'], context)
+            pad = 0.12 * max(extent[1] - extent[0], extent[3] - extent[2], 1e-9)
+            x_range = spec.get('x_range', [extent[0] - pad, extent[1] + pad])
+            y_range = spec.get('y_range', [extent[2] - pad, extent[3] + pad])
 
         # 绘制图形
         for shape in shapes:
@@ -260,18 +434,22 @@ class GeometryRenderer(BaseDiagramRenderer):
 
             ax.plot(x, y, 'o', color='red', markersize=6)
             if label:
-                ax.annotate(self._format_label(label), (x, y), xytext=(5, 5),
+                ax.annotate(self._format_label(label, context), (x, y), xytext=(5, 5),
                            textcoords='offset points', fontsize=11,
                            fontweight='bold')
 
+        for p, q, style in scene_lines:
+            d = q - p
+            reach = 4 * (abs(x_range[1] - x_range[0]) + abs(y_range[1] - y_range[0])) / np.linalg.norm(d)
+            t = np.array([-reach, reach])
+            ax.plot(p[0] + t * d[0], p[1] + t * d[1], **style)
+
         ax.set_xlim(x_range)
         ax.set_ylim(y_range)
         ax.set_aspect('equal')
         ax.axis('off')
-        ax.set_title(self._format_label(title), fontsize=13, fontweight='bold')
+        ax.set_title(self._format_label(title, context), fontsize=13, fontweight='bold')
 
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=200, bbox_inches='tight', facecolor='white')
-        plt.close()
+        self._save_figure(fig, output_path, context)
 
         return True
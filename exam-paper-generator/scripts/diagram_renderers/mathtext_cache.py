@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进程级 mathtext 缓存
+图例标签中的公式段（$H_{2}O$、$x^{2}$ 等）在各图例间大量重复。
+matplotlib 的解析缓存挂在每个 RendererAgg 各自的 MathTextParser 上，
+每张新图都会新建渲染器，缓存在图例之间完全失效，且只保留 50 条。
+这里把解析与排版结果改为按 (输出类型, 公式, 字体, 字号/dpi) 在进程内共享
+"""
+
+import functools
+import inspect
+import threading
+from typing import Dict, Optional
+
+from matplotlib.mathtext import MathTextParser
+
+# 缓存的公式排版结果数
+MATHTEXT_CACHE_SIZE = 4096
+
+# 被替换的 MathTextParser._parse_cached 原函数应有的参数（matplotlib 私有接口）
+EXPECTED_PARAMETERS = ['self', 's', 'dpi', 'prop', 'antialiased', 'load_glyph_flags']
+
+_lock = threading.Lock()
+_installed = False
+_parsers: Dict[str, MathTextParser] = {}
+_parse_uncached = None
+
+
+@functools.lru_cache(maxsize=MATHTEXT_CACHE_SIZE)
+def _parse_shared(output_type, s, dpi, prop, antialiased, load_glyph_flags):
+    # prop 是 FontProperties 的副本（可哈希，含字体与字号）
+    return _parse_uncached(_parsers[output_type], s, dpi, prop, antialiased, load_glyph_flags)
+
+
+def _parse_cached(self, s, dpi, prop, antialiased, load_glyph_flags):
+    output_type = self._output_type
+    _parsers.setdefault(output_type, self)
+    return _parse_shared(output_type, s, dpi, prop, antialiased, load_glyph_flags)
+
+
+def install() -> bool:
+    """
+    启用进程级缓存（可重复调用）
+
+    Returns:
+        是否已启用（matplotlib 内部接口不符时保持原行为）
+    """
+    global _installed, _parse_uncached
+    with _lock:
+        if _installed:
+            return True
+        original = getattr(MathTextParser, '_parse_cached', None)
+        uncached = getattr(original, '__wrapped__', None)
+        if uncached is None:
+            return False
+        try:
+            parameters = list(inspect.signature(uncached).parameters)
+        except (TypeError, ValueError):
+            return False
+        if parameters != EXPECTED_PARAMETERS:
+            return False
+        _parse_uncached = uncached
+        MathTextParser._parse_cached = _parse_cached
+        _installed = True
+        return True
+
+
+def cache_info() -> Optional[functools._CacheInfo]:
+    """命中统计（未启用时为 None）"""
+    return _parse_shared.cache_info() if _installed else None
+
+
+def cache_clear():
+    _parse_shared.cache_clear()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+试卷生成分阶段性能剖析
+记录字体、样式、文本格式化、图例渲染与 ReportLab 排版等阶段的耗时，
+输出阶段汇总、最慢的题目/图例，并可导出 cProfile 或 speedscope 文件
+"""
+
+import cProfile
+import json
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+
+class ExamProfiler:
+    """分阶段计时器（支持嵌套，汇总时同时给出含子阶段与自身耗时）"""
+
+    # 参与“最慢 N 项”排名的阶段前缀
+    RANKED_PREFIXES = ('question', 'diagram:')
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.totals: Dict[str, Dict[str, float]] = {}
+        self.items: List[Dict[str, Any]] = []
+        self.events: List[Dict[str, Any]] = []
+        self._stack: List[List[float]] = []
+        self._origin = time.perf_counter()
+        self._cprofile: Optional[cProfile.Profile] = None
+
+    @contextmanager
+    def phase(self, name: str, label: str = ''):
+        """
+        计时一个阶段
+
+        Args:
+            name: 阶段名，如 fonts、diagram:flowchart
+            label: 附加说明（如题号），用于最慢项排名
+        """
+        if not self.enabled:
+            yield
+            return
+
+        frame = f'{name} {label}'.strip()
+        start = time.perf_counter()
+        self.events.append({'type': 'O', 'frame': frame, 'at': start - self._origin})
+        # [子阶段累计耗时]
+        self._stack.append([0.0])
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            elapsed = end - start
+            child_time = self._stack.pop()[0]
+            if self._stack:
+                self._stack[-1][0] += elapsed
+            self.events.append({'type': 'C', 'frame': frame, 'at': end - self._origin})
+
+            total = self.totals.setdefault(name, {'calls': 0, 'total': 0.0, 'self': 0.0})
+            total['calls'] += 1
+            total['total'] += elapsed
+            total['self'] += elapsed - child_time
+
+            if name.startswith(self.RANKED_PREFIXES):
+                self.items.append({'phase': name, 'label': label, 'seconds': elapsed})
+
+    def start_cprofile(self):
+        """开启 cProfile 函数级采样"""
+        if self.enabled and self._cprofile is None:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def stop_cprofile(self):
+        if self._cprofile is not None:
+            self._cprofile.disable()
+
+    def dump_cprofile(self, path: str):
+        """导出 cProfile 结果（可用 snakeviz / pstats 查看）"""
+        if self._cprofile is None:
+            return
+        self._cprofile.dump_stats(path)
+        print(f"✓ cProfile 已保存: {path}")
+
+    def dump_speedscope(self, path: str, name: str = 'exam build'):
+        """导出阶段时间线为 speedscope 事件格式（https://www.speedscope.app）"""
+        frames: List[Dict[str, str]] = []
+        frame_index: Dict[str, int] = {}
+        events = []
+        for event in self.events:
+            index = frame_index.get(event['frame'])
+            if index is None:
+                index = len(frames)
+                frame_index[event['frame']] = index
+                frames.append({'name': event['frame']})
+            events.append({'type': event['type'], 'frame': index, 'at': event['at'] * 1000})
+
+        end_value = events[-1]['at'] if events else 0
+        payload = {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'evented',
+                'name': name,
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': end_value,
+                'events': events,
+            }],
+            'name': name,
+            'exporter': 'exam-paper-generator',
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        print(f"✓ speedscope 时间线已保存: {path}")
+
+    def report(self, top_n: int = 10):
+        """打印阶段汇总与最慢项"""
+        if not self.enabled:
+            return
+
+        wall = time.perf_counter() - self._origin
+        print("\n" + "=" * 64)
+        print(f"性能剖析（总耗时 {wall:.3f}s）")
+        print("=" * 64)
+        print(f"{'阶段':<28}{'次数':>6}{'总计(s)':>10}{'自身(s)':>10}{'占比':>8}")
+        for name, stat in sorted(self.totals.items(), key=lambda kv: kv[1]['self'], reverse=True):
+            share = stat['self'] / wall if wall else 0.0
+            print(f"{name:<28}{stat['calls']:>6}{stat['total']:>10.3f}{stat['self']:>10.3f}{share:>8.1%}")
+
+        if self.items and top_n > 0:
+            print(f"\n最慢的 {top_n} 项（题目/图例）:")
+            for item in sorted(self.items, key=lambda i: i['seconds'], reverse=True)[:top_n]:
+                print(f"  {item['seconds']:>8.3f}s  {item['phase']:<26} {item['label']}")
+        print("=" * 64)
+
+
+# 未开启剖析时使用的空实现
+NULL_PROFILER = ExamProfiler(enabled=False)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+试卷数据校验
+在任何渲染开始前，用编译缓存的 JSON Schema 校验器检查数据结构，
+并通过各渲染器的 validate_spec 预检图例规格，使错误在毫秒级暴露
+
+使用方法:
+    python exam_validator.py exam_data.json [more.json ...]
+"""
+
+import argparse
+import json
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import jsonschema
+except ImportError:  # 可选依赖：缺失时只做图例预检
+    jsonschema = None
+
+from diagram_renderers import DiagramRendererFactory
+
+SCHEMA_PATH = Path(__file__).parent.parent / 'schemas' / 'exam_schema.json'
+
+# 单次报告的最大错误数
+MAX_ERRORS = 50
+
+
+class ExamValidationError(ValueError):
+    """试卷数据校验失败"""
+
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        super().__init__(f"试卷数据校验失败（{len(errors)} 处错误）")
+
+
+@lru_cache(maxsize=None)
+def get_schema_validator(schema_path: str = str(SCHEMA_PATH)):
+    """
+    加载并编译 Schema 校验器（同一进程内只编译一次）
+
+    Returns:
+        校验器实例；未安装 jsonschema 时返回 None
+    """
+    if jsonschema is None:
+        print("⚠ 未安装 jsonschema，跳过 Schema 校验（pip install jsonschema）")
+        return None
+
+    with open(schema_path, 'r', encoding='utf-8') as f:
+        schema = json.load(f)
+    validator_class = jsonschema.validators.validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema)
+
+
+def _format_path(path) -> str:
+    parts = []
+    for part in path:
+        if isinstance(part, int):
+            parts.append(f'[{part}]')
+        else:
+            parts.append(f'.{part}' if parts else str(part))
+    return ''.join(parts) or '(根)'
+
+
+def iter_diagrams(data: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """遍历试卷中所有图例，返回 (位置, 图例定义)"""
+    # 结构不符（非对象、非数组）的部分由 Schema 校验报告，这里跳过
+    sections = data.get('sections', []) or []
+    for s_idx, section in enumerate(sections if isinstance(sections, list) else []):
+        questions = (section.get('questions', []) or []) if isinstance(section, dict) else []
+        for q_idx, question in enumerate(questions if isinstance(questions, list) else []):
+            if not isinstance(question, dict):
+                continue
+            base = f'sections[{s_idx}].questions[{q_idx}]'
+            if isinstance(question.get('diagram'), dict):
+                yield f'{base}.diagram', question['diagram']
+            sub_questions = question.get('sub_questions', []) or []
+            for sub_idx, sub_q in enumerate(sub_questions if isinstance(sub_questions, list) else []):
+                if isinstance(sub_q, dict) and isinstance(sub_q.get('diagram'), dict):
+                    yield f'{base}.sub_questions[{sub_idx}].diagram', sub_q['diagram']
+
+
+def collect_errors(data: Any, check_schema: bool = True) -> List[str]:
+    """
+    收集试卷数据中的全部错误（Schema + 图例规格）
+
+    Args:
+        data: 试卷数据
+        check_schema: 是否执行 Schema 校验
+
+    Returns:
+        错误信息列表
+    """
+    errors: List[str] = []
+
+    if check_schema:
+        validator = get_schema_validator()
+        if validator is not None:
+            for error in validator.iter_errors(data):
+                errors.append(f"{_format_path(error.absolute_path)}: {error.message}")
+                if len(errors) >= MAX_ERRORS:
+                    return errors
+
+    if not isinstance(data, dict):
+        return errors or ['试卷数据必须是对象']
+
+    for location, diagram in iter_diagrams(data):
+        renderer = DiagramRendererFactory.get_renderer(diagram.get('type'))
+        if renderer is None:
+            # 尚无渲染器的类型会以占位符输出，不视为错误
+            continue
+        try:
+            messages = renderer.spec_errors(diagram.get('spec', {}))
+        except Exception as e:
+            # 预检本身不应让校验崩溃：未预料的结构同样作为错误报告
+            messages = [f'规格无法解析: {type(e).__name__}: {e}']
+        for message in messages:
+            errors.append(f"{location}.spec ({diagram.get('type')}): {message}")
+            if len(errors) >= MAX_ERRORS:
+                return errors
+
+    return errors
+
+
+def validate_exam_data(data: Any, check_schema: bool = True):
+    """
+    校验试卷数据，失败时抛出 ExamValidationError
+
+    Args:
+        data: 试卷数据
+        check_schema: 是否执行 Schema 校验
+    """
+    errors = collect_errors(data, check_schema=check_schema)
+    if errors:
+        raise ExamValidationError(errors)
+
+
+def print_errors(error: ExamValidationError, source: Optional[str] = None):
+    """打印校验错误"""
+    prefix = f"{source}: " if source else ""
+    print(f"× {prefix}{error}")
+    for message in error.errors:
+        print(f"  - {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='校验试卷 JSON 数据')
+    parser.add_argument('inputs', nargs='+', help='输入的 JSON 数据文件')
+    parser.add_argument('--no-schema', action='store_true', help='只做图例规格预检')
+
+    args = parser.parse_args()
+
+    failed = 0
+    for path in args.inputs:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            validate_exam_data(data, check_schema=not args.no_schema)
+            print(f"✓ {path}")
+        except json.JSONDecodeError as e:
+            failed += 1
+            print(f"× {path}: JSON 解析失败: {e}")
+        except ExamValidationError as e:
+            failed += 1
+            print_errors(e, path)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
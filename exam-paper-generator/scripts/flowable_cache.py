@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+段落缓存
+批量生成试卷时，标题、考试信息、考生须知、考生信息栏、常量表和大题说明等
+在数百份试卷之间完全相同。这里缓存标记解析与断行结果，
+相同的 (文本, 样式, 版面宽度) 直接复用，跳过 ReportLab 的标记解析与（中文）断行
+
+每次 get() 都返回新的 Paragraph 实例：ReportLab 排版时会在段落对象上记录状态
+（例如推到下一帧时置 _postponed 且不会清除），同一实例被再次排版会误报 LayoutError
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import Paragraph
+
+# 每个线程缓存的段落数上限
+DEFAULT_MAX_SIZE = 2048
+
+# 参与缓存键的样式属性
+STYLE_ATTRS = (
+    'fontName', 'fontSize', 'leading', 'alignment', 'leftIndent', 'rightIndent',
+    'firstLineIndent', 'spaceBefore', 'spaceAfter', 'textColor', 'wordWrap',
+)
+
+
+class CachedParagraph(Paragraph):
+    """记住各版面宽度下断行结果的 Paragraph"""
+
+    def __init__(self, text: str, style: ParagraphStyle, **kwargs):
+        super().__init__(text, style, **kwargs)
+        self._layouts: Dict[float, Tuple[Any, ...]] = {}
+        # 解析完成、尚未排版时的属性，fresh() 由此派生新实例
+        self._parsed = dict(self.__dict__)
+
+    def fresh(self) -> 'CachedParagraph':
+        """未排版的新实例：共享解析与断行缓存，不带任何排版状态"""
+        paragraph = self.__class__.__new__(self.__class__)
+        paragraph.__dict__.update(self._parsed)
+        return paragraph
+
+    def wrap(self, availWidth, availHeight):
+        layout = self._layouts.get(availWidth)
+        if layout is not None:
+            self.width, self._wrapWidths, self.blPara, self.height = layout
+            return self.width, self.height
+
+        width, height = super().wrap(availWidth, availHeight)
+        if getattr(self, 'blPara', None) is not None:
+            self._layouts[availWidth] = (self.width, self._wrapWidths, self.blPara, self.height)
+        return width, height
+
+
+def style_key(style: ParagraphStyle) -> Tuple:
+    """样式指纹：不同 StyleManager 实例中等价的样式得到相同的键"""
+    return (style.name,) + tuple(str(getattr(style, attr, None)) for attr in STYLE_ATTRS)
+
+
+class ParagraphCache:
+    """
+    按 (文本, 样式) 缓存已解析的段落模板（LRU），断行结果再按版面宽度缓存
+
+    get() 返回模板的新实例，可在同一文档中多次使用，也可跨多次 build 使用；
+    缓存按线程隔离：断行缓存会在 wrap 时写入，不与并发排版共享
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self._local = threading.local()
+
+    def _entries(self) -> 'OrderedDict[Tuple, CachedParagraph]':
+        entries = getattr(self._local, 'entries', None)
+        if entries is None:
+            entries = self._local.entries = OrderedDict()
+            self._local.hits = self._local.misses = 0
+        return entries
+
+    def get(self, text: str, style: ParagraphStyle) -> Paragraph:
+        """获取段落的新实例（模板不存在时解析并缓存）"""
+        entries = self._entries()
+        key = (text, style_key(style))
+        template = entries.get(key)
+        if template is not None:
+            entries.move_to_end(key)
+            self._local.hits += 1
+            return template.fresh()
+
+        self._local.misses += 1
+        template = CachedParagraph(text, style)
+        entries[key] = template
+        if len(entries) > self.max_size:
+            entries.popitem(last=False)
+        return template.fresh()
+
+    def stats(self) -> Dict[str, int]:
+        """当前线程的命中统计"""
+        entries = self._entries()
+        return {'size': len(entries), 'hits': self._local.hits, 'misses': self._local.misses}
+
+    def clear(self):
+        self._entries().clear()
+
+
+# 进程内共享（按线程隔离）的段落缓存
+PARAGRAPH_CACHE = ParagraphCache()
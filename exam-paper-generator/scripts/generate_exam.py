@@ -8,16 +8,15 @@
     python generate_exam.py input.json -o output.pdf
     python generate_exam.py input.json -o output.pdf --with-answers
     python generate_exam.py input.json -o output.docx --format word
+    python generate_exam.py input.json -o preview.html --format html
+    python generate_exam.py input.json -o output.pdf --profile
 """
 
 import argparse
-import html
-import json
 import os
-import re
 import sys
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union, BinaryIO
 
 # PDF 生成相关
 from reportlab.lib.pagesizes import A4
@@ -28,13 +27,25 @@ from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
     PageBreak, Image, KeepTogether, ListFlowable, ListItem
 )
+from reportlab import rl_config
 from reportlab.lib import colors
 from reportlab.lib.utils import ImageReader
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 
 # 图例渲染器
-from diagram_renderers import DiagramRendererFactory
+from diagram_renderers import DiagramRendererFactory, PRINT_DPI
+import json_io
+from exam_profiler import ExamProfiler, NULL_PROFILER
+from image_store import DiagramImageStore, diagram_key
+from flowable_cache import PARAGRAPH_CACHE
+from workspace import RenderWorkspace
+from subject_format import format_text
+from html_preview import HtmlExamRenderer
+from exam_validator import ExamValidationError, validate_exam_data, print_errors
+
+# 图像等二进制流直接以 Flate 压缩写入，不再做 ASCII85 编码（体积约减少 20%）
+rl_config.useA85 = 0
 
 
 class FontManager:
@@ -220,15 +231,31 @@ class StyleManager:
 
 
 class ExamRenderer:
-    """试卷渲染器"""
-
-    def __init__(self, data: Dict[str, Any], output_path: str, include_answers: bool = False):
+    """试卷渲染器（output_path 可以是文件路径，也可以是可写的二进制文件对象）"""
+
+    def __init__(
+        self,
+        data: Dict[str, Any],
+        output_path: Union[str, BinaryIO],
+        include_answers: bool = False,
+        profiler: Optional[ExamProfiler] = None,
+        print_dpi: int = PRINT_DPI,
+        quantize_images: bool = True,
+        deterministic: bool = False,
+    ):
         self.data = data
         self.output_path = output_path
         self.include_answers = include_answers
-        self.style_manager = StyleManager()
+        self.print_dpi = print_dpi
+        self.deterministic = deterministic
+        self.profiler = profiler or NULL_PROFILER
+        with self.profiler.phase('fonts'):
+            FontManager.initialize()
+        with self.profiler.phase('styles'):
+            self.style_manager = StyleManager()
         self.diagram_factory = DiagramRendererFactory()
-        self.temp_files: List[str] = []  # 临时图片文件
+        self.workspace: Optional[RenderWorkspace] = None  # 图例图片的临时工作目录
+        self.image_store = DiagramImageStore(quantize=quantize_images)
 
     def render(self):
         """渲染试卷"""
@@ -238,29 +265,34 @@ class ExamRenderer:
             leftMargin=2*cm,
             rightMargin=2*cm,
             topMargin=2*cm,
-            bottomMargin=2*cm
+            bottomMargin=2*cm,
+            # 固定时间戳，文档 ID 由内容摘要生成：相同输入得到相同字节
+            invariant=1 if self.deterministic else None,
         )
 
         story = []
 
-        # 渲染头部
-        story.extend(self._render_header())
+        # 临时图片在 doc.build 时才读取；出错或收到终止信号也会随工作目录一起删除
+        self.workspace = RenderWorkspace()
+        with self.workspace:
+            # 渲染头部
+            story.extend(self._render_header())
 
-        # 渲染各部分
-        for section in self.data.get('sections', []):
-            story.extend(self._render_section(section))
+            # 渲染各部分
+            for section in self.data.get('sections', []):
+                story.extend(self._render_section(section))
 
-        # 如果需要答案，添加答案页
-        if self.include_answers:
-            story.append(PageBreak())
-            story.extend(self._render_answers())
+            # 如果需要答案，添加答案页
+            if self.include_answers:
+                story.append(PageBreak())
+                story.extend(self._render_answers())
 
-        # 生成 PDF
-        doc.build(story)
-        print(f"✓ 试卷已生成: {self.output_path}")
+            # 生成 PDF
+            with self.profiler.phase('layout'):
+                doc.build(story)
 
-        # 清理临时文件
-        self._cleanup_temp_files()
+        if isinstance(self.output_path, str):
+            print(f"✓ 试卷已生成: {self.output_path}")
 
     def _render_header(self) -> List:
         """渲染试卷头部"""
@@ -270,11 +302,11 @@ class ExamRenderer:
 
         # 标题
         if meta.get('title'):
-            story.append(Paragraph(meta['title'], styles.get('ExamTitle')))
+            story.append(PARAGRAPH_CACHE.get(meta['title'], styles.get('ExamTitle')))
 
         # 科目
         if meta.get('subject'):
-            story.append(Paragraph(f"{meta['subject']}试题", styles.get('ExamSubtitle')))
+            story.append(PARAGRAPH_CACHE.get(f"{meta['subject']}试题", styles.get('ExamSubtitle')))
 
         story.append(Spacer(1, 0.3*cm))
 
@@ -285,12 +317,12 @@ class ExamRenderer:
         if meta.get('total_score'):
             info_parts.append(f"满分：{meta['total_score']}分")
         if info_parts:
-            story.append(Paragraph("    ".join(info_parts), styles.get('ExamInfo')))
+            story.append(PARAGRAPH_CACHE.get("    ".join(info_parts), styles.get('ExamInfo')))
 
         story.append(Spacer(1, 0.3*cm))
 
         # 考生信息栏
-        story.append(Paragraph(
+        story.append(PARAGRAPH_CACHE.get(
             "姓名：__________    学号：__________    班级：__________",
             styles.get('ExamInfo')
         ))
@@ -300,9 +332,9 @@ class ExamRenderer:
         # 考生须知
         notes = meta.get('notes', [])
         if notes:
-            story.append(Paragraph("考生须知：", styles.get('Question')))
+            story.append(PARAGRAPH_CACHE.get("考生须知：", styles.get('Question')))
             for i, note in enumerate(notes, 1):
-                story.append(Paragraph(f"{i}. {note}", styles.get('ExamNotes')))
+                story.append(PARAGRAPH_CACHE.get(f"{i}. {note}", styles.get('ExamNotes')))
             story.append(Spacer(1, 0.3*cm))
 
         # 常量表
@@ -311,11 +343,11 @@ class ExamRenderer:
             const_str = "可能用到的相对原子质量：" + "  ".join(
                 f"{k}-{v}" for k, v in constants.items()
             )
-            story.append(Paragraph(const_str, styles.get('ExamNotes')))
+            story.append(PARAGRAPH_CACHE.get(const_str, styles.get('ExamNotes')))
             story.append(Spacer(1, 0.5*cm))
 
         # 分隔线
-        story.append(Paragraph("_" * 80, styles.get('ExamInfo')))
+        story.append(PARAGRAPH_CACHE.get("_" * 80, styles.get('ExamInfo')))
         story.append(Spacer(1, 0.5*cm))
 
         return story
@@ -329,11 +361,12 @@ class ExamRenderer:
         title = section.get('title', '')
         if section.get('instructions'):
             title += f"（{section['instructions']}）"
-        story.append(Paragraph(self._format_chem_text(title), styles.get('SectionTitle')))
+        story.append(PARAGRAPH_CACHE.get(self._format_chem_text(title), styles.get('SectionTitle')))
 
         # 渲染题目
         for question in section.get('questions', []):
-            story.extend(self._render_question(question, section.get('points_per_question')))
+            with self.profiler.phase('question', f"第{question.get('number', '')}题"):
+                story.extend(self._render_question(question, section.get('points_per_question')))
 
         story.append(Spacer(1, 0.5*cm))
         return story
@@ -444,15 +477,24 @@ class ExamRenderer:
             # 使用图例渲染器工厂生成图例
             renderer = self.diagram_factory.get_renderer(diagram_type)
             if renderer:
-                renderer.set_context({'subject': self.data.get('meta', {}).get('subject', '')})
-                # 生成临时图片
-                import tempfile
-                temp_file = tempfile.NamedTemporaryFile(suffix='.png', delete=False)
-                temp_path = temp_file.name
-                temp_file.close()
-                self.temp_files.append(temp_path)
-
-                renderer.render(spec, temp_path)
+                context = {
+                    'subject': self.data.get('meta', {}).get('subject', ''),
+                    'width_cm': width_cm,
+                    'print_dpi': self.print_dpi,
+                    'deterministic': self.deterministic,
+                }
+                key = diagram_key(diagram_type, spec, context)
+                temp_path = self.image_store.lookup(key)
+
+                if temp_path is None:
+                    # 生成临时图片
+                    temp_path = self.workspace.new_file('.png')
+
+                    with self.profiler.phase(f'diagram:{diagram_type}', title):
+                        rendered = renderer.render(spec, temp_path, context)
+                    if rendered and os.path.getsize(temp_path) > 0:
+                        # 压缩并按内容去重，相同图片在 PDF 中只嵌入一次
+                        temp_path = self.image_store.add(key, temp_path)
 
                 # 插入图片
                 if os.path.exists(temp_path) and os.path.getsize(temp_path) > 0:
@@ -495,12 +537,12 @@ class ExamRenderer:
         story = []
         styles = self.style_manager
 
-        story.append(Paragraph("参考答案及评分标准", styles.get('AnswerTitle')))
+        story.append(PARAGRAPH_CACHE.get("参考答案及评分标准", styles.get('AnswerTitle')))
         story.append(Spacer(1, 0.5*cm))
 
         for section in self.data.get('sections', []):
             # 大题标题
-            story.append(Paragraph(
+            story.append(PARAGRAPH_CACHE.get(
                 self._format_chem_text(section.get('title', '')),
                 styles.get('SectionTitle')
             ))
@@ -583,82 +625,13 @@ class ExamRenderer:
         if not text:
             return text
 
-        subject = str(self.data.get('meta', {}).get('subject', '') or '')
-        subject_lower = subject.lower()
-        is_math = '数学' in subject or 'math' in subject_lower
-        is_chem = '化学' in subject or 'chem' in subject_lower
-
-        if is_math and not is_chem:
-            return self._format_math_text(text)
-
-        return self._format_chemistry_text(text)
-
-    def _format_math_text(self, text: str) -> str:
-        """数学表达式：处理 ^n 的上标"""
-        safe_text = html.escape(text, quote=False)
-        safe_text = re.sub(r'\^(-?[0-9]+)', r'<super>\1</super>', safe_text)
-        return safe_text
-
-    def _format_chemistry_text(self, text: str) -> str:
-        """化学表达式：处理下标与电荷"""
-        safe_text = html.escape(text, quote=False)
-
-        def sub_tag(value: str) -> str:
-            return f'<sub rise="2" size="80%">{value}</sub>'
-
-        # 先处理电荷（显式 ^ 形式）
-        safe_text = re.sub(r'\^([0-9]*[+-])', r'<super>\1</super>', safe_text)
-        safe_text = re.sub(r'\^([0-9]+)', r'<super>\1</super>', safe_text)
-
-        # 普通下标
-        safe_text = self._apply_outside_tags(
-            safe_text,
-            lambda s: re.sub(r'(?<=[A-Za-z\)\]])(\d+)', lambda m: sub_tag(m.group(1)), s),
-        )
-
-        # 单原子离子（如 Fe2+、Na+）
-        safe_text = re.sub(
-            r'(?<![A-Za-z\)\]])([A-Z][a-z]?)(?:<sub rise=\"2\" size=\"80%\">(\d+)</sub>)([+-])',
-            r'\1<super>\2\3</super>',
-            safe_text,
-        )
-        safe_text = re.sub(
-            r'(?<![A-Za-z\)\]])([A-Z][a-z]?)([+-])',
-            r'\1<super>\2</super>',
-            safe_text,
-        )
-
-        # 多原子离子电荷
-        safe_text = re.sub(
-            r'(<sub rise=\"2\" size=\"80%\">\d+</sub>)([+-])',
-            r'\1<super>\2</super>',
-            safe_text,
-        )
-        return safe_text
-
-    def _apply_outside_tags(self, text: str, func) -> str:
-        """仅对标签外的文本进行转换"""
-        parts = re.split(r'(<[^>]+>)', text)
-        for idx, part in enumerate(parts):
-            if part.startswith('<') and part.endswith('>'):
-                continue
-            parts[idx] = func(part)
-        return ''.join(parts)
-
-    def _cleanup_temp_files(self):
-        """清理临时文件"""
-        for f in self.temp_files:
-            try:
-                if os.path.exists(f):
-                    os.unlink(f)
-            except Exception:
-                pass
+        with self.profiler.phase('format_text'):
+            return format_text(text, str(self.data.get('meta', {}).get('subject', '') or ''))
 
 
 def load_exam_data(input_path: str) -> Dict[str, Any]:
-    """加载试卷数据"""
-    with open(input_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """加载试卷数据（安装了 orjson 时使用快速解析）"""
+    return json_io.load_file(input_path)
 
 
 def main():
@@ -668,29 +641,70 @@ def main():
     parser.add_argument('input', help='输入的 JSON 数据文件')
     parser.add_argument('-o', '--output', help='输出文件路径', default='exam.pdf')
     parser.add_argument('--with-answers', action='store_true', help='包含答案页')
-    parser.add_argument('--format', choices=['pdf', 'word'], default='pdf', help='输出格式')
+    parser.add_argument('--format', choices=['pdf', 'word', 'html'], default='pdf',
+                        help='输出格式（html 为快速校对预览）')
     parser.add_argument('--answers-only', action='store_true', help='仅生成答案')
+    parser.add_argument('--dpi', type=int, default=PRINT_DPI, help='图例栅格化的打印分辨率（按 width_cm 计算像素）')
+    parser.add_argument('--no-quantize', action='store_true', help='不对平面图做调色板量化')
+    parser.add_argument('--no-validate', action='store_true', help='跳过渲染前的数据校验')
+    parser.add_argument('--deterministic', action='store_true',
+                        help='可复现输出：相同输入生成逐字节相同的 PDF（固定时间戳与文档 ID）')
+    parser.add_argument('--profile', action='store_true', help='输出分阶段性能剖析')
+    parser.add_argument('--profile-top', type=int, default=10, help='剖析报告中列出的最慢题目/图例数')
+    parser.add_argument('--profile-cprofile', metavar='FILE', help='导出 cProfile 结果（.prof）')
+    parser.add_argument('--profile-speedscope', metavar='FILE', help='导出 speedscope 时间线（.json）')
 
     args = parser.parse_args()
 
+    profiler = None
+    if args.profile or args.profile_cprofile or args.profile_speedscope:
+        profiler = ExamProfiler()
+        if args.profile_cprofile:
+            profiler.start_cprofile()
+
     # 加载数据
     print(f"正在加载数据: {args.input}")
-    data = load_exam_data(args.input)
+    with (profiler or NULL_PROFILER).phase('load'):
+        data = load_exam_data(args.input)
+
+    # 渲染前快速校验，尽早暴露数据错误
+    if not args.no_validate:
+        try:
+            with (profiler or NULL_PROFILER).phase('validate'):
+                validate_exam_data(data)
+        except ExamValidationError as e:
+            print_errors(e, args.input)
+            sys.exit(1)
 
     # 确定输出路径
     output_path = args.output
-    if not output_path.endswith(('.pdf', '.docx')):
-        output_path += '.pdf' if args.format == 'pdf' else '.docx'
+    if not output_path.endswith(('.pdf', '.docx', '.html')):
+        output_path += {'pdf': '.pdf', 'word': '.docx', 'html': '.html'}[args.format]
 
     # 渲染
     if args.format == 'pdf':
-        renderer = ExamRenderer(data, output_path, include_answers=args.with_answers)
+        renderer = ExamRenderer(
+            data, output_path, include_answers=args.with_answers, profiler=profiler,
+            print_dpi=args.dpi, quantize_images=not args.no_quantize, deterministic=args.deterministic,
+        )
         renderer.render()
+    elif args.format == 'html':
+        with (profiler or NULL_PROFILER).phase('html'):
+            HtmlExamRenderer(data, include_answers=args.with_answers).write(output_path)
+        print(f"✓ 预览已生成: {output_path}")
     else:
         # TODO: Word 格式渲染
         print("Word 格式暂未实现，请使用 PDF 格式")
         sys.exit(1)
 
+    if profiler:
+        profiler.stop_cprofile()
+        profiler.report(args.profile_top)
+        if args.profile_cprofile:
+            profiler.dump_cprofile(args.profile_cprofile)
+        if args.profile_speedscope:
+            profiler.dump_speedscope(args.profile_speedscope, name=Path(args.input).name)
+
 
 if __name__ == '__main__':
     main()
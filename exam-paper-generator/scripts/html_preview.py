@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTML 校对预览
+从同一份试卷 JSON 生成 HTML 预览页，用于校对文字；最终输出仍使用 PDF。
+- 复用 PDF 渲染的学科格式化（上下标输出为 <sub>/<sup>）；
+- 图例渲染为 SVG 内联，按规格哈希缓存在磁盘上，图例未改动时不加载 matplotlib；
+- 按题目缓存 HTML 片段，--watch 模式下只重新渲染改动过的题目
+
+使用方法:
+    python html_preview.py exam_data.json -o preview.html
+    python html_preview.py exam_data.json --with-answers --watch
+"""
+
+import argparse
+import hashlib
+import html
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import json_io
+from subject_format import format_html
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / 'outputs' / '.preview_cache'
+
+PAGE_CSS = """
+body { font-family: "Songti SC", "SimSun", "Noto Serif CJK SC", serif; background: #eee; margin: 0; }
+.page { width: 17cm; margin: 1cm auto; padding: 2cm; background: #fff; box-shadow: 0 0 4px #999; }
+h1 { text-align: center; font-size: 20pt; margin: 0; }
+h2.subtitle { text-align: center; font-size: 14pt; font-weight: normal; margin: 0.3em 0; }
+.info { text-align: center; margin: 0.4em 0; }
+.notes { font-size: 10pt; }
+h3 { font-size: 12pt; margin: 1.2em 0 0.6em; }
+.question { margin: 0.6em 0; line-height: 1.7; }
+.option, .sub-question { margin-left: 2em; }
+.answer-line { border-bottom: 1px solid #333; height: 1.6em; margin-left: 2em; }
+figure { margin: 0.6em auto; text-align: center; }
+figure svg { width: 100%; height: auto; }
+figcaption, .explanation { font-size: 10pt; color: #444; }
+.answers { border-top: 2px dashed #999; margin-top: 2em; }
+.placeholder { color: #b00; }
+"""
+
+
+def fragment_key(*parts: Any) -> str:
+    """片段缓存键"""
+    return hashlib.sha1(json_io.dumps(parts).encode('utf-8')).hexdigest()
+
+
+class SvgDiagramCache:
+    """图例 SVG 缓存（内存 + 磁盘，跨进程复用）"""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self._memory: Dict[str, Optional[str]] = {}
+        self._factory = None
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'rendered': 0, 'failed': 0}
+
+    def get(self, diagram_type: str, spec: Dict[str, Any], context: Dict[str, Any]) -> Optional[str]:
+        """获取图例 SVG（失败时返回 None）"""
+        key = fragment_key('svg', diagram_type, spec, context)
+        if key in self._memory:
+            self.stats['memory_hits'] += 1
+            return self._memory[key]
+
+        path = self.cache_dir / f'{key}.svg'
+        if path.exists():
+            self.stats['disk_hits'] += 1
+            svg = path.read_text(encoding='utf-8')
+        else:
+            svg = self._render(diagram_type, spec, context, path)
+        self._memory[key] = svg
+        return svg
+
+    def _render(self, diagram_type: str, spec: Dict[str, Any], context: Dict[str, Any],
+                path: Path) -> Optional[str]:
+        if self._factory is None:
+            # 只有缓存未命中时才加载 matplotlib
+            from diagram_renderers import DiagramRendererFactory
+            self._factory = DiagramRendererFactory()
+
+        renderer = self._factory.get_renderer(diagram_type)
+        if renderer is None:
+            self.stats['failed'] += 1
+            return None
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(suffix='.svg', dir=self.cache_dir)
+        os.close(fd)
+        try:
+            if not renderer.render(spec, temp_path, context):
+                self.stats['failed'] += 1
+                return None
+            with open(temp_path, encoding='utf-8') as f:
+                svg = f.read()
+            # 去掉 XML 声明与 DOCTYPE，便于内联
+            svg = svg[svg.find('<svg'):]
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(svg)
+            os.replace(temp_path, path)
+            self.stats['rendered'] += 1
+            return svg
+        except Exception as e:
+            print(f"× 图例渲染失败 ({diagram_type}): {e}")
+            self.stats['failed'] += 1
+            return None
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+
+class HtmlExamRenderer:
+    """试卷 HTML 预览渲染器（可重复调用 render，未改动的片段直接复用）"""
+
+    def __init__(self, data: Dict[str, Any], include_answers: bool = False,
+                 diagram_cache: Optional[SvgDiagramCache] = None):
+        self.data = data
+        self.include_answers = include_answers
+        self.diagrams = diagram_cache or SvgDiagramCache()
+        self._fragments: Dict[str, str] = {}
+        self._used: set = set()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    @property
+    def subject(self) -> str:
+        return str(self.data.get('meta', {}).get('subject', '') or '')
+
+    def _fmt(self, text: str) -> str:
+        return format_html(text, self.subject) if text else ''
+
+    def _cached(self, builder, *parts: Any) -> str:
+        """按内容缓存片段"""
+        key = fragment_key(builder.__name__, self.subject, *parts)
+        self._used.add(key)
+        fragment = self._fragments.get(key)
+        if fragment is not None:
+            self.stats['hits'] += 1
+            return fragment
+        self.stats['misses'] += 1
+        fragment = self._fragments[key] = builder(*parts)
+        return fragment
+
+    def render(self) -> str:
+        """渲染完整 HTML 页面"""
+        self._used = set()
+        self.stats = {'hits': 0, 'misses': 0}
+        meta = self.data.get('meta', {})
+
+        body = [self._cached(self._render_header, meta)]
+        for section in self.data.get('sections', []):
+            body.append(self._cached(self._render_section_title, section.get('title', ''),
+                                     section.get('instructions', '')))
+            for question in section.get('questions', []):
+                body.append(self._cached(self._render_question, question,
+                                         section.get('points_per_question')))
+
+        if self.include_answers:
+            body.append('<div class="answers"><h2 class="subtitle">参考答案及评分标准</h2>')
+            for section in self.data.get('sections', []):
+                body.append(f"<h3>{self._fmt(section.get('title', ''))}</h3>")
+                for question in section.get('questions', []):
+                    body.append(self._cached(self._render_question_answer, question))
+            body.append('</div>')
+
+        # 丢弃本次未用到的片段，watch 模式下缓存不会无限增长
+        self._fragments = {k: v for k, v in self._fragments.items() if k in self._used}
+
+        title = html.escape(str(meta.get('title', '试卷预览')))
+        return (
+            '<!DOCTYPE html>\n<html lang="zh-CN"><head><meta charset="utf-8">'
+            f'<title>{title}</title><style>{PAGE_CSS}</style></head>'
+            '<body><div class="page">\n' + '\n'.join(body) + '\n</div></body></html>\n'
+        )
+
+    def write(self, output_path: str) -> str:
+        """渲染并写入文件（先写临时文件再替换，浏览器刷新时不会读到半个文件）"""
+        page = self.render()
+        temp_path = f'{output_path}.part'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(page)
+        os.replace(temp_path, output_path)
+        return output_path
+
+    def _render_header(self, meta: Dict[str, Any]) -> str:
+        parts = []
+        if meta.get('title'):
+            parts.append(f"<h1>{html.escape(str(meta['title']))}</h1>")
+        if meta.get('subject'):
+            parts.append(f"<h2 class=\"subtitle\">{html.escape(str(meta['subject']))}试题</h2>")
+
+        info_parts = []
+        if meta.get('duration'):
+            info_parts.append(f"考试时间：{meta['duration']}分钟")
+        if meta.get('total_score'):
+            info_parts.append(f"满分：{meta['total_score']}分")
+        if info_parts:
+            parts.append(f'<p class="info">{html.escape("    ".join(info_parts))}</p>')
+        parts.append('<p class="info">姓名：__________    学号：__________    班级：__________</p>')
+
+        notes = meta.get('notes', [])
+        if notes:
+            items = ''.join(f'<li>{html.escape(str(note))}</li>' for note in notes)
+            parts.append(f'<div class="notes"><b>考生须知：</b><ol>{items}</ol></div>')
+
+        constants = meta.get('constants', {})
+        if constants:
+            const_str = "可能用到的相对原子质量：" + "  ".join(f"{k}-{v}" for k, v in constants.items())
+            parts.append(f'<p class="notes">{html.escape(const_str)}</p>')
+        parts.append('<hr>')
+        return '\n'.join(parts)
+
+    def _render_section_title(self, title: str, instructions: str) -> str:
+        if instructions:
+            title += f"（{instructions}）"
+        return f'<h3>{self._fmt(title)}</h3>'
+
+    @staticmethod
+    def _points_str(item: Dict[str, Any], points: Any) -> str:
+        if item.get('is_diagram_question'):
+            return f"（{points}分，图例题）" if points else "（图例题）"
+        return f"（{points}分）" if points else ""
+
+    def _render_question(self, question: Dict[str, Any], default_points: Optional[float] = None) -> str:
+        parts = ['<div class="question">']
+        points = question.get('points', default_points)
+        q_text = f"{question.get('number', '')}. {self._points_str(question, points)}{question.get('content', '')}"
+        parts.append(f'<p>{self._fmt(q_text)}</p>')
+        if question.get('content_continued'):
+            parts.append(f"<p>{self._fmt(question['content_continued'])}</p>")
+
+        diagram = question.get('diagram')
+        if diagram and diagram.get('position', 'after_content') == 'after_content':
+            parts.append(self._render_diagram(diagram))
+
+        for opt in question.get('options', []):
+            if isinstance(opt, dict):
+                opt = f"{opt.get('label', '')}. {opt.get('content', '')}"
+            parts.append(f'<p class="option">{self._fmt(opt)}</p>')
+
+        for sub_q in question.get('sub_questions', []):
+            parts.append(self._render_sub_question(sub_q))
+
+        answer_space = question.get('answer_space', {})
+        if answer_space:
+            parts.extend(['<div class="answer-line"></div>'] * answer_space.get('lines', 3))
+
+        parts.append('</div>')
+        return '\n'.join(parts)
+
+    def _render_sub_question(self, sub_q: Dict[str, Any]) -> str:
+        points_str = self._points_str(sub_q, sub_q.get('points'))
+        text = f"{sub_q.get('number', '')} {points_str}{sub_q.get('content', '')}"
+        parts = [f'<p class="sub-question">{self._fmt(text)}</p>']
+        diagram = sub_q.get('diagram')
+        if diagram:
+            parts.append(self._render_diagram(diagram))
+        for opt in sub_q.get('options', []):
+            parts.append(f'<p class="option">{self._fmt(opt)}</p>')
+        return '\n'.join(parts)
+
+    def _render_diagram(self, diagram: Dict[str, Any]) -> str:
+        diagram_type = diagram.get('type')
+        title = diagram.get('title', '')
+        width_cm = diagram.get('width_cm', 10)
+        # 可复现的 SVG（无时间戳、固定 id），相同试卷生成相同的预览页
+        context = {'subject': self.subject, 'width_cm': width_cm, 'deterministic': True}
+        svg = self.diagrams.get(diagram_type, diagram.get('spec', {}), context)
+        if svg is None:
+            return f'<p class="placeholder">【图例：{html.escape(str(title or diagram_type))}】</p>'
+        caption = f'<figcaption>{self._fmt(f"图：{title}")}</figcaption>' if title else ''
+        return f'<figure style="width: {width_cm}cm">{svg}{caption}</figure>'
+
+    def _render_answer(self, prefix: str, answer: Dict[str, Any]) -> List[str]:
+        parts = [f"<p>{self._fmt(prefix + str(answer.get('content', '')))}</p>"]
+        if answer.get('explanation'):
+            parts.append(f"<p class=\"explanation\">{self._fmt('解析：' + answer['explanation'])}</p>")
+        scoring = answer.get('scoring_criteria', [])
+        if scoring:
+            scoring_str = "；".join(self._fmt(f"{s['point']}得{s['score']}分") for s in scoring)
+            parts.append(f'<p class="explanation">评分标准：{scoring_str}</p>')
+        return parts
+
+    def _render_question_answer(self, question: Dict[str, Any]) -> str:
+        parts = ['<div class="question">']
+        if question.get('answer'):
+            parts.extend(self._render_answer(f"{question.get('number', '')}. ", question['answer']))
+        for sub_q in question.get('sub_questions', []):
+            if sub_q.get('answer'):
+                parts.extend(self._render_answer(f"{sub_q.get('number', '')} ", sub_q['answer']))
+        parts.append('</div>')
+        return '\n'.join(parts)
+
+
+def render_preview(input_path: str, output_path: str, renderer: Optional[HtmlExamRenderer] = None,
+                   include_answers: bool = False, cache_dir: Optional[str] = None) -> HtmlExamRenderer:
+    """加载 JSON 并写出预览（传入上次的 renderer 以复用片段缓存）"""
+    data = json_io.load_file(input_path)
+    if renderer is None:
+        renderer = HtmlExamRenderer(data, include_answers, SvgDiagramCache(cache_dir))
+    else:
+        renderer.data = data
+    renderer.write(output_path)
+    return renderer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='试卷 HTML 校对预览')
+    parser.add_argument('input', help='输入的 JSON 数据文件')
+    parser.add_argument('-o', '--output', help='输出 HTML 路径（默认与输入同名）')
+    parser.add_argument('--with-answers', action='store_true', help='包含答案')
+    parser.add_argument('--watch', action='store_true', help='监视输入文件，改动后自动更新预览')
+    parser.add_argument('--interval', type=float, default=0.3, help='--watch 检查间隔（秒）')
+    parser.add_argument('--cache-dir', help=f'图例 SVG 缓存目录（默认 {DEFAULT_CACHE_DIR}）')
+    args = parser.parse_args()
+
+    output_path = args.output or str(Path(args.input).with_suffix('.html'))
+
+    renderer = None
+    last_mtime = None
+    while True:
+        try:
+            mtime = os.path.getmtime(args.input)
+        except OSError as e:
+            print(f"× 无法读取: {e}")
+            sys.exit(1)
+
+        if mtime != last_mtime:
+            last_mtime = mtime
+            start = time.perf_counter()
+            try:
+                renderer = render_preview(args.input, output_path, renderer,
+                                          args.with_answers, args.cache_dir)
+            except ValueError as e:
+                # 编辑过程中 JSON 可能暂时无效
+                print(f"× 解析失败: {e}")
+                if not args.watch:
+                    sys.exit(1)
+            else:
+                elapsed = (time.perf_counter() - start) * 1000
+                stats = renderer.stats
+                print(f"✓ 预览已生成: {output_path}（{elapsed:.0f} ms，"
+                      f"复用 {stats['hits']} 个片段，重新渲染 {stats['misses']} 个）")
+
+        if not args.watch:
+            break
+        try:
+            time.sleep(args.interval)
+        except KeyboardInterrupt:
+            break
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图例图片存储
+在图片嵌入 PDF 之前去重并压缩：
+- 规格相同（类型 + spec + 渲染上下文）的图例只渲染一次；
+- 内容相同的 PNG 复用同一文件，ReportLab 对同一文件只写入一个图像 XObject；
+- 颜色数有限的平面图（柱状图、流程图等）量化为调色板图像，减小图片体积
+"""
+
+import hashlib
+import os
+from typing import Any, Dict, Optional
+
+import json_io
+
+try:
+    from PIL import Image as PILImage
+except ImportError:  # matplotlib 依赖 Pillow，通常总是可用
+    PILImage = None
+
+# 不同颜色数不超过该值的图片视为平面图，可做调色板量化
+FLAT_COLOR_LIMIT = 4096
+# 调色板颜色数
+PALETTE_COLORS = 256
+
+
+def diagram_key(diagram_type: str, spec: Dict[str, Any], context: Dict[str, Any]) -> str:
+    """图例规格哈希"""
+    body = json_io.dumps({'type': diagram_type, 'spec': spec, 'context': context})
+    return hashlib.sha1(body.encode('utf-8')).hexdigest()
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def optimize_png(path: str, quantize: bool = True) -> bool:
+    """
+    压缩 PNG：去掉全不透明的 alpha 通道；平面图量化为调色板
+
+    Returns:
+        是否改写了文件
+    """
+    if PILImage is None:
+        return False
+
+    with PILImage.open(path) as image:
+        image.load()
+    original = image
+
+    if image.mode in ('RGBA', 'LA') and image.getextrema()[-1][0] == 255:
+        image = image.convert('RGB')
+    if quantize and image.mode == 'RGB' and image.getcolors(FLAT_COLOR_LIMIT) is not None:
+        image = image.quantize(PALETTE_COLORS, dither=PILImage.Dither.NONE)
+
+    if image is original:
+        return False
+    image.save(path, optimize=True)
+    return True
+
+
+class DiagramImageStore:
+    """单次试卷渲染内的图例图片存储"""
+
+    def __init__(self, quantize: bool = True):
+        """
+        Args:
+            quantize: 是否对平面图做调色板量化（有损，但颜色数不超过 256 时无损）
+        """
+        self.quantize = quantize
+        self._by_spec: Dict[str, str] = {}
+        self._by_content: Dict[str, str] = {}
+        self.stats = {'rendered': 0, 'spec_hits': 0, 'content_hits': 0, 'bytes_saved': 0}
+
+    def lookup(self, key: str) -> Optional[str]:
+        """按规格哈希查找已渲染的图片"""
+        path = self._by_spec.get(key)
+        if path is not None and os.path.exists(path):
+            self.stats['spec_hits'] += 1
+            return path
+        return None
+
+    def add(self, key: str, path: str) -> str:
+        """
+        登记新渲染的图片：压缩后按内容去重
+
+        Returns:
+            实际应嵌入的图片路径（内容重复时为先前的文件）
+        """
+        self.stats['rendered'] += 1
+        before = os.path.getsize(path)
+        try:
+            optimize_png(path, self.quantize)
+        except OSError:
+            pass
+        self.stats['bytes_saved'] += before - os.path.getsize(path)
+
+        digest = _file_digest(path)
+        existing = self._by_content.get(digest)
+        if existing is not None and os.path.exists(existing):
+            self.stats['content_hits'] += 1
+            path = existing
+        else:
+            self._by_content[digest] = path
+        self._by_spec[key] = path
+        return path
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON 读写
+安装了 orjson 时使用其快速解析/序列化，否则回退到标准库 json
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # 可选依赖
+    orjson = None
+
+
+def loads(raw) -> Any:
+    """解析 JSON 字符串或字节串"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    if isinstance(raw, (bytes, bytearray)):
+        raw = raw.decode('utf-8')
+    return json.loads(raw)
+
+
+def dumps(data: Any) -> str:
+    """序列化为紧凑的 JSON 字符串（保留中文，键排序以便计算稳定的哈希）"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS).decode('utf-8')
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+
+def load_file(path: str) -> Any:
+    """读取 JSON 文件"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+题库存储
+将试卷 JSON 中的题目导入带索引的 SQLite 题库（学科、知识点、难度、题型），
+按条件查询并直接组装成可交给 generate_exam.py 渲染的试卷 JSON
+
+使用方法:
+    python question_bank.py import exams/*.json --db bank.db
+    python question_bank.py query --subject 化学 --type multiple_choice --difficulty easy --limit 5
+    python question_bank.py build --subject 化学 --type multiple_choice:15 --type comprehensive:2 -o exam.json
+    python question_bank.py stats
+"""
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import json_io
+
+DEFAULT_DB = Path(__file__).parent.parent / 'outputs' / 'question_bank.db'
+
+# 题型 -> 大题名称
+SECTION_NAMES = {
+    'multiple_choice': '选择题',
+    'fill_blank': '填空题',
+    'short_answer': '简答题',
+    'calculation': '计算题',
+    'essay': '论述题',
+    'experiment': '实验题',
+    'comprehensive': '综合题',
+}
+
+CHINESE_NUMERALS = '一二三四五六七八九十'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    qkey TEXT NOT NULL UNIQUE,
+    subject TEXT NOT NULL,
+    question_type TEXT NOT NULL,
+    difficulty TEXT,
+    points REAL,
+    has_diagram INTEGER NOT NULL DEFAULT 0,
+    source TEXT,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS knowledge_points (
+    question_id INTEGER NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    PRIMARY KEY (name, question_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_questions_lookup
+    ON questions (subject, question_type, difficulty);
+CREATE INDEX IF NOT EXISTS idx_questions_difficulty ON questions (subject, difficulty);
+CREATE INDEX IF NOT EXISTS idx_kp_question ON knowledge_points (question_id);
+"""
+
+
+def question_key(question: Dict[str, Any]) -> str:
+    """题目内容哈希（忽略题号），用于导入去重"""
+    body = {k: v for k, v in question.items() if k != 'number'}
+    return hashlib.sha1(json_io.dumps(body).encode('utf-8')).hexdigest()
+
+
+class QuestionBank:
+    """SQLite 题库"""
+
+    def __init__(self, db_path: str = str(DEFAULT_DB)):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ---------- 导入 ----------
+
+    def import_exam(self, data: Dict[str, Any], source: str = '') -> int:
+        """
+        导入一份试卷中的所有题目
+
+        Args:
+            data: 试卷数据
+            source: 来源标识（如文件名）
+
+        Returns:
+            新增题目数（重复题目会被跳过）
+        """
+        subject = str(data.get('meta', {}).get('subject', '') or '')
+        added = 0
+        with self.conn:
+            for section in data.get('sections', []):
+                question_type = section.get('type', '')
+                default_points = section.get('points_per_question')
+                for question in section.get('questions', []):
+                    added += self.add_question(question, subject, question_type,
+                                               default_points=default_points, source=source)
+        return added
+
+    def import_file(self, path: str) -> int:
+        """导入试卷 JSON 文件"""
+        return self.import_exam(json_io.load_file(path), source=Path(path).name)
+
+    def add_question(
+        self,
+        question: Dict[str, Any],
+        subject: str,
+        question_type: str,
+        default_points: Optional[float] = None,
+        source: str = '',
+    ) -> int:
+        """添加单道题目，返回新增数量（0 或 1）"""
+        points = question.get('points', default_points)
+        payload = dict(question)
+        if points is not None:
+            payload['points'] = points
+
+        has_diagram = bool(question.get('diagram')) or any(
+            sub.get('diagram') for sub in question.get('sub_questions', []) or []
+        )
+        cursor = self.conn.execute(
+            'INSERT OR IGNORE INTO questions '
+            '(qkey, subject, question_type, difficulty, points, has_diagram, source, payload) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (question_key(question), subject, question_type, question.get('difficulty'),
+             points, int(has_diagram), source, json_io.dumps(payload)),
+        )
+        if cursor.rowcount == 0:
+            return 0
+
+        question_id = cursor.lastrowid
+        self.conn.executemany(
+            'INSERT OR IGNORE INTO knowledge_points (question_id, name) VALUES (?, ?)',
+            [(question_id, kp) for kp in question.get('knowledge_points', []) or []],
+        )
+        return 1
+
+    # ---------- 查询 ----------
+
+    def query(
+        self,
+        subject: Optional[str] = None,
+        question_type: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        knowledge_points: Optional[Iterable[str]] = None,
+        has_diagram: Optional[bool] = None,
+        exclude_ids: Optional[Iterable[int]] = None,
+        limit: Optional[int] = None,
+        shuffle: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        按条件查询题目
+
+        Returns:
+            题目记录列表，每项包含 id、subject、question_type、difficulty、points、
+            has_diagram、knowledge_points 与 question（原始题目数据）
+        """
+        sql, params = self._build_query(subject, question_type, difficulty, knowledge_points,
+                                        has_diagram, exclude_ids)
+        sql = 'SELECT * FROM questions WHERE ' + sql
+        sql += ' ORDER BY random()' if shuffle else ' ORDER BY id'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        rows = self.conn.execute(sql, params).fetchall()
+        return self._hydrate(rows)
+
+    def candidates(self, **filters) -> List[tuple]:
+        """
+        只取组卷所需的轻量字段，不解析题目内容
+
+        Returns:
+            (id, question_type, difficulty, points) 元组列表
+        """
+        sql, params = self._build_query(**filters)
+        return self.conn.execute(
+            'SELECT id, question_type, difficulty, points FROM questions WHERE ' + sql + ' ORDER BY id',
+            params,
+        ).fetchall()
+
+    def fetch(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """按 id 取回完整题目记录（保持传入顺序）"""
+        ids = list(ids)
+        rows = []
+        for start in range(0, len(ids), 900):
+            chunk = ids[start:start + 900]
+            marks = ','.join('?' * len(chunk))
+            rows.extend(self.conn.execute(f'SELECT * FROM questions WHERE id IN ({marks})', chunk))
+        order = {qid: i for i, qid in enumerate(ids)}
+        rows.sort(key=lambda row: order[row['id']])
+        return self._hydrate(rows)
+
+    def count(self, **filters) -> int:
+        """统计满足条件的题目数"""
+        sql, params = self._build_query(**filters)
+        return self.conn.execute('SELECT COUNT(*) FROM questions WHERE ' + sql, params).fetchone()[0]
+
+    def _build_query(
+        self,
+        subject: Optional[str] = None,
+        question_type: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        knowledge_points: Optional[Iterable[str]] = None,
+        has_diagram: Optional[bool] = None,
+        exclude_ids: Optional[Iterable[int]] = None,
+    ):
+        clauses = ['1=1']
+        params: List[Any] = []
+        if subject:
+            clauses.append('subject = ?')
+            params.append(subject)
+        if question_type:
+            clauses.append('question_type = ?')
+            params.append(question_type)
+        if difficulty:
+            clauses.append('difficulty = ?')
+            params.append(difficulty)
+        if has_diagram is not None:
+            clauses.append('has_diagram = ?')
+            params.append(int(has_diagram))
+        kps = list(knowledge_points or [])
+        if kps:
+            marks = ','.join('?' * len(kps))
+            clauses.append(f'id IN (SELECT question_id FROM knowledge_points WHERE name IN ({marks}))')
+            params.extend(kps)
+        excluded = list(exclude_ids or [])
+        if excluded:
+            marks = ','.join('?' * len(excluded))
+            clauses.append(f'id NOT IN ({marks})')
+            params.extend(excluded)
+        return ' AND '.join(clauses), params
+
+    def _hydrate(self, rows) -> List[Dict[str, Any]]:
+        if not rows:
+            return []
+        ids = [row['id'] for row in rows]
+        kp_map: Dict[int, List[str]] = {}
+        # SQLite 默认最多 999 个参数，分批查询知识点
+        for start in range(0, len(ids), 900):
+            chunk = ids[start:start + 900]
+            marks = ','.join('?' * len(chunk))
+            for qid, name in self.conn.execute(
+                f'SELECT question_id, name FROM knowledge_points WHERE question_id IN ({marks})', chunk
+            ):
+                kp_map.setdefault(qid, []).append(name)
+
+        return [{
+            'id': row['id'],
+            'subject': row['subject'],
+            'question_type': row['question_type'],
+            'difficulty': row['difficulty'],
+            'points': row['points'],
+            'has_diagram': bool(row['has_diagram']),
+            'knowledge_points': kp_map.get(row['id'], []),
+            'question': json_io.loads(row['payload']),
+        } for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        """题库统计"""
+        total = self.conn.execute('SELECT COUNT(*) FROM questions').fetchone()[0]
+        by_group = self.conn.execute(
+            'SELECT subject, question_type, difficulty, COUNT(*) AS n FROM questions '
+            'GROUP BY subject, question_type, difficulty ORDER BY subject, question_type, difficulty'
+        ).fetchall()
+        kp_total = self.conn.execute('SELECT COUNT(DISTINCT name) FROM knowledge_points').fetchone()[0]
+        return {
+            'total_questions': total,
+            'knowledge_points': kp_total,
+            'groups': [dict(row) for row in by_group],
+            'db_path': self.db_path,
+        }
+
+
+def build_exam(meta: Dict[str, Any], records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    将题目记录组装为试卷 JSON（按题型分大题，题号连续编号）
+
+    Args:
+        meta: 试卷元数据
+        records: QuestionBank.query 返回的题目记录
+
+    Returns:
+        符合 exam_schema.json 的试卷数据
+    """
+    by_type: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        by_type.setdefault(record['question_type'], []).append(record)
+
+    ordered_types = [t for t in SECTION_NAMES if t in by_type] + \
+                    [t for t in by_type if t not in SECTION_NAMES]
+
+    sections = []
+    number = 1
+    for idx, question_type in enumerate(ordered_types):
+        questions = []
+        total_points = 0.0
+        for record in by_type[question_type]:
+            question = dict(record['question'])
+            question['number'] = number
+            number += 1
+            total_points += question.get('points') or 0
+            questions.append(question)
+
+        numeral = CHINESE_NUMERALS[idx] if idx < len(CHINESE_NUMERALS) else str(idx + 1)
+        section = {
+            'title': f"{numeral}、{SECTION_NAMES.get(question_type, question_type)}",
+            'type': question_type,
+            'questions': questions,
+        }
+        if total_points:
+            section['total_points'] = total_points
+        sections.append(section)
+
+    exam_meta = dict(meta)
+    if 'total_score' not in exam_meta:
+        exam_meta['total_score'] = int(sum(s.get('total_points', 0) for s in sections)) or 1
+    return {'meta': exam_meta, 'sections': sections}
+
+
+def _parse_type_counts(values: List[str]) -> List[tuple]:
+    """解析 --type multiple_choice:10 形式的参数"""
+    result = []
+    for value in values:
+        name, _, count = value.partition(':')
+        result.append((name, int(count) if count else None))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='题库管理：导入、查询与组卷')
+    parser.add_argument('--db', default=str(DEFAULT_DB), help='题库文件路径')
+    subparsers = parser.add_subparsers(dest='command', help='命令')
+
+    import_parser = subparsers.add_parser('import', help='从试卷 JSON 导入题目')
+    import_parser.add_argument('inputs', nargs='+', help='试卷 JSON 文件')
+
+    def add_filters(p):
+        p.add_argument('--subject', help='学科')
+        p.add_argument('--difficulty', choices=['easy', 'medium', 'hard'], help='难度')
+        p.add_argument('--kp', action='append', help='知识点（可重复，满足任一即可）')
+        p.add_argument('--shuffle', action='store_true', help='随机抽取')
+
+    query_parser = subparsers.add_parser('query', help='查询题目')
+    add_filters(query_parser)
+    query_parser.add_argument('--type', help='题型')
+    query_parser.add_argument('--limit', type=int, default=20, help='最多返回数量')
+
+    build_parser = subparsers.add_parser('build', help='按题型数量组卷')
+    add_filters(build_parser)
+    build_parser.add_argument('--type', action='append', required=True,
+                              help='题型及数量，如 multiple_choice:15（可重复）')
+    build_parser.add_argument('--title', default='', help='试卷标题')
+    build_parser.add_argument('--duration', type=int, default=90, help='考试时长（分钟）')
+    build_parser.add_argument('-o', '--output', required=True, help='输出的试卷 JSON')
+
+    subparsers.add_parser('stats', help='题库统计')
+
+    args = parser.parse_args()
+
+    with QuestionBank(args.db) as bank:
+        if args.command == 'import':
+            for path in args.inputs:
+                added = bank.import_file(path)
+                print(f"✓ {path}: 新增 {added} 道题")
+
+        elif args.command == 'query':
+            records = bank.query(subject=args.subject, question_type=args.type,
+                                 difficulty=args.difficulty, knowledge_points=args.kp,
+                                 limit=args.limit, shuffle=args.shuffle)
+            for record in records:
+                content = record['question'].get('content', '')
+                print(f"[{record['id']}] {record['question_type']}/{record['difficulty'] or '-'} "
+                      f"{record['points'] or '-'}分  {content[:40]}")
+            print(f"共 {len(records)} 道")
+
+        elif args.command == 'build':
+            records = []
+            for question_type, count in _parse_type_counts(args.type):
+                found = bank.query(subject=args.subject, question_type=question_type,
+                                   difficulty=args.difficulty, knowledge_points=args.kp,
+                                   limit=count, shuffle=args.shuffle)
+                if count is not None and len(found) < count:
+                    print(f"⚠ 题型 {question_type} 仅找到 {len(found)}/{count} 道")
+                records.extend(found)
+
+            meta = {'title': args.title, 'subject': args.subject or '', 'duration': args.duration}
+            exam = build_exam(meta, records)
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(exam, f, ensure_ascii=False, indent=2)
+            print(f"✓ 试卷数据已生成: {args.output}（{len(records)} 道题）")
+
+        elif args.command == 'stats':
+            stats = bank.stats()
+            print(f"题库: {stats['db_path']}")
+            print(f"  题目总数: {stats['total_questions']}")
+            print(f"  知识点数: {stats['knowledge_points']}")
+            for group in stats['groups']:
+                print(f"  {group['subject']:<8}{group['question_type']:<18}"
+                      f"{group['difficulty'] or '-':<8}{group['n']:>6}")
+
+        else:
+            parser.print_help()
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量渲染任务队列
+基于 SQLite 的持久化本地队列：批量提交试卷渲染任务，由工作进程池领取执行，
+随时查询进度。相同输入（试卷内容 + 渲染选项）只渲染一次；进程崩溃后重新运行
+会回收过期的租约和本机已退出进程持有的任务继续执行，已完成且输出文件存在的任务不会重复渲染
+
+使用方法:
+    python render_queue.py submit exams/*.json -d outputs/pdf --with-answers
+    python render_queue.py run --workers 4
+    python render_queue.py status
+    python render_queue.py retry
+"""
+
+import argparse
+import hashlib
+import multiprocessing
+import os
+import shutil
+import socket
+import sqlite3
+import sys
+import time
+import traceback
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import json_io
+from diagram_renderers import PRINT_DPI
+from exam_validator import ExamValidationError, validate_exam_data, print_errors
+from workspace import pid_alive
+
+DEFAULT_DB = Path(__file__).parent.parent / 'outputs' / 'render_queue.db'
+
+# 任务状态
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+# 默认租约时长（秒）：超过该时间仍未完成的任务视为工作进程已崩溃
+DEFAULT_LEASE = 600
+
+# 失败任务的最大尝试次数
+MAX_ATTEMPTS = 3
+
+# --follow 模式下回收崩溃任务的间隔（秒）
+RECOVER_INTERVAL = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    input_hash TEXT NOT NULL UNIQUE,
+    source TEXT,
+    output_path TEXT NOT NULL,
+    include_answers INTEGER NOT NULL DEFAULT 0,
+    print_dpi INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS job_targets (
+    job_id INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    output_path TEXT NOT NULL,
+    PRIMARY KEY (job_id, output_path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id);
+"""
+
+
+def input_hash(data: Dict[str, Any], include_answers: bool, print_dpi: int) -> str:
+    """任务去重键：试卷内容（键排序后的规范 JSON）与渲染选项的哈希"""
+    body = json_io.dumps({'data': data, 'answers': bool(include_answers), 'dpi': print_dpi})
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+
+class RenderQueue:
+    """SQLite 持久化渲染队列"""
+
+    def __init__(self, db_path: str = str(DEFAULT_DB)):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        # 自行管理事务，领取任务时使用 BEGIN IMMEDIATE 加写锁
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ---------- 提交 ----------
+
+    def submit(
+        self,
+        data: Dict[str, Any],
+        output_path: str,
+        include_answers: bool = False,
+        print_dpi: int = PRINT_DPI,
+        source: str = '',
+    ) -> Dict[str, Any]:
+        """
+        提交渲染任务
+
+        Returns:
+            {'id': 任务 ID, 'duplicate': 是否命中已有任务, 'status': 当前状态}
+        """
+        output_path = os.path.abspath(output_path)
+        key = input_hash(data, include_answers, print_dpi)
+        now = time.time()
+
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.conn.execute('SELECT id, status, output_path FROM jobs WHERE input_hash = ?',
+                                    (key,)).fetchone()
+            if row is None:
+                cursor = self.conn.execute(
+                    'INSERT INTO jobs (input_hash, source, output_path, include_answers, print_dpi, '
+                    'payload, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (key, source, output_path, int(include_answers), print_dpi, json_io.dumps(data), now),
+                )
+                job_id, status, duplicate = cursor.lastrowid, QUEUED, False
+            else:
+                job_id, status, duplicate = row['id'], row['status'], True
+                if output_path != row['output_path']:
+                    self.conn.execute('INSERT OR IGNORE INTO job_targets (job_id, output_path) VALUES (?, ?)',
+                                      (job_id, output_path))
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+
+        # 已完成的相同任务：直接复制结果
+        if duplicate and status == DONE:
+            self._copy_targets(job_id)
+        return {'id': job_id, 'duplicate': duplicate, 'status': status}
+
+    # ---------- 领取与完成 ----------
+
+    def recover(self, resubmit_missing: bool = True) -> int:
+        """
+        崩溃恢复：租约过期或持有者（本机进程）已退出的运行中任务重新入队；
+        已完成但输出文件丢失的任务也重新入队
+
+        Returns:
+            重新入队的任务数
+        """
+        now = time.time()
+        host = socket.gethostname()
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            reclaim = []
+            for row in self.conn.execute('SELECT id, worker, lease_until FROM jobs WHERE status = ?',
+                                         (RUNNING,)):
+                owner_host, _, pid = (row['worker'] or '').rpartition(':')
+                # 其他主机上的进程无法检查，只按租约判断
+                dead = owner_host == host and pid.isdigit() and not pid_alive(int(pid))
+                if dead or (row['lease_until'] or 0) < now:
+                    reclaim.append(row['id'])
+            for job_id in reclaim:
+                self.conn.execute('UPDATE jobs SET status = ?, worker = NULL, lease_until = NULL WHERE id = ?',
+                                  (QUEUED, job_id))
+            count = len(reclaim)
+            if resubmit_missing:
+                missing = [row['id'] for row in self.conn.execute(
+                    'SELECT id, output_path FROM jobs WHERE status = ?', (DONE,)
+                ) if not os.path.exists(row['output_path'])]
+                for job_id in missing:
+                    self.conn.execute('UPDATE jobs SET status = ? WHERE id = ?', (QUEUED, job_id))
+                count += len(missing)
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+        return count
+
+    def claim(self, worker: str, lease: float = DEFAULT_LEASE) -> Optional[sqlite3.Row]:
+        """原子地领取一个排队中的任务，没有任务时返回 None"""
+        now = time.time()
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.conn.execute(
+                'SELECT id FROM jobs WHERE status = ? ORDER BY id LIMIT 1', (QUEUED,)
+            ).fetchone()
+            if row is None:
+                self.conn.execute('COMMIT')
+                return None
+            self.conn.execute(
+                'UPDATE jobs SET status = ?, worker = ?, lease_until = ?, started_at = ?, '
+                'attempts = attempts + 1, error = NULL WHERE id = ?',
+                (RUNNING, worker, now + lease, now, row['id']),
+            )
+            job = self.conn.execute('SELECT * FROM jobs WHERE id = ?', (row['id'],)).fetchone()
+            self.conn.execute('COMMIT')
+            return job
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+
+    def complete(self, job_id: int, worker: str) -> bool:
+        """
+        标记任务完成
+
+        Returns:
+            False 表示 worker 已不再持有该任务（已被回收），状态未修改
+        """
+        cursor = self.conn.execute(
+            'UPDATE jobs SET status = ?, finished_at = ?, lease_until = NULL '
+            'WHERE id = ? AND status = ? AND worker = ?',
+            (DONE, time.time(), job_id, RUNNING, worker),
+        )
+        if not cursor.rowcount:
+            return False
+        self._copy_targets(job_id)
+        return True
+
+    def fail(self, job_id: int, worker: str, error: str, max_attempts: int = MAX_ATTEMPTS) -> bool:
+        """记录失败；未达到最大尝试次数时重新入队（返回值同 complete）"""
+        cursor = self.conn.execute(
+            'UPDATE jobs SET status = CASE WHEN attempts < ? THEN ? ELSE ? END, error = ?, finished_at = ?, '
+            'lease_until = NULL WHERE id = ? AND status = ? AND worker = ?',
+            (max_attempts, QUEUED, FAILED, error, time.time(), job_id, RUNNING, worker),
+        )
+        return bool(cursor.rowcount)
+
+    def retry_failed(self) -> int:
+        cursor = self.conn.execute(
+            'UPDATE jobs SET status = ?, attempts = 0, error = NULL WHERE status = ?', (QUEUED, FAILED)
+        )
+        return cursor.rowcount
+
+    def _copy_targets(self, job_id: int):
+        """把结果复制到相同任务的其他输出路径"""
+        row = self.conn.execute('SELECT output_path FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None or not os.path.exists(row['output_path']):
+            return
+        for target in self.conn.execute('SELECT output_path FROM job_targets WHERE job_id = ?', (job_id,)):
+            if not os.path.exists(target['output_path']):
+                Path(target['output_path']).parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(row['output_path'], target['output_path'])
+
+    # ---------- 查询 ----------
+
+    def counts(self) -> Dict[str, int]:
+        result = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for row in self.conn.execute('SELECT status, COUNT(*) AS n FROM jobs GROUP BY status'):
+            result[row['status']] = row['n']
+        return result
+
+    def get(self, job_id: int) -> Optional[sqlite3.Row]:
+        return self.conn.execute(
+            'SELECT id, source, output_path, status, attempts, worker, error, created_at, started_at, '
+            'finished_at FROM jobs WHERE id = ?', (job_id,)
+        ).fetchone()
+
+    def failures(self, limit: int = 20) -> List[sqlite3.Row]:
+        return self.conn.execute(
+            'SELECT id, source, error FROM jobs WHERE status = ? ORDER BY id LIMIT ?', (FAILED, limit)
+        ).fetchall()
+
+
+# ---------- 工作进程 ----------
+
+def _render_job(job: sqlite3.Row, deterministic: bool = False):
+    """渲染单个任务：先写入临时文件，成功后原子替换到输出路径"""
+    from generate_exam import ExamRenderer
+
+    output_path = job['output_path']
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    partial = f"{output_path}.{os.getpid()}.part"
+    try:
+        with open(partial, 'wb') as f:
+            ExamRenderer(json_io.loads(job['payload']), f,
+                         include_answers=bool(job['include_answers']),
+                         print_dpi=job['print_dpi'], deterministic=deterministic).render()
+        os.replace(partial, output_path)
+    finally:
+        if os.path.exists(partial):
+            os.unlink(partial)
+
+
+def worker_loop(db_path: str, lease: float = DEFAULT_LEASE, follow: bool = False, poll: float = 1.0,
+                deterministic: bool = False):
+    """
+    工作进程：循环领取并执行任务
+
+    Args:
+        db_path: 队列数据库
+        lease: 租约时长（秒）
+        follow: 队列为空时继续等待新任务
+        poll: 等待新任务的轮询间隔（秒）
+        deterministic: 生成可复现的 PDF（重新渲染的任务输出逐字节不变）
+    """
+    from generate_exam import FontManager
+
+    FontManager.initialize()
+    name = f'{socket.gethostname()}:{os.getpid()}'
+    next_recover = time.monotonic() + RECOVER_INTERVAL
+    with RenderQueue(db_path) as render_queue:
+        while True:
+            if follow and time.monotonic() >= next_recover:
+                next_recover = time.monotonic() + RECOVER_INTERVAL
+                recovered = render_queue.recover(resubmit_missing=False)
+                if recovered:
+                    print(f"⚠ 重新入队 {recovered} 个中断的任务")
+
+            job = render_queue.claim(name, lease)
+            if job is None:
+                if not follow:
+                    break
+                time.sleep(poll)
+                continue
+
+            start = time.perf_counter()
+            try:
+                _render_job(job, deterministic)
+                held = render_queue.complete(job['id'], name)
+                print(f"✓ [{job['id']}] {job['source'] or ''} -> {job['output_path']} "
+                      f"({time.perf_counter() - start:.1f}s)")
+            except Exception as e:
+                traceback.print_exc()
+                held = render_queue.fail(job['id'], name, f'{type(e).__name__}: {e}')
+                print(f"× [{job['id']}] {job['source'] or ''}: {e}")
+            if not held:
+                print(f"⚠ [{job['id']}] 租约已过期，任务已被回收，结果未记录")
+
+
+def run_workers(db_path: str, workers: int, lease: float = DEFAULT_LEASE, follow: bool = False,
+                deterministic: bool = False):
+    """启动工作进程池并等待其结束"""
+    with RenderQueue(db_path) as render_queue:
+        recovered = render_queue.recover()
+        if recovered:
+            print(f"⚠ 重新入队 {recovered} 个中断或输出丢失的任务")
+
+    if workers <= 1:
+        worker_loop(db_path, lease, follow, deterministic=deterministic)
+        return
+
+    ctx = multiprocessing.get_context('spawn')
+    processes = [ctx.Process(target=worker_loop, args=(db_path, lease, follow),
+                             kwargs={'deterministic': deterministic}) for _ in range(workers)]
+    for proc in processes:
+        proc.start()
+    try:
+        for proc in processes:
+            proc.join()
+    except KeyboardInterrupt:
+        # 中断的任务租约过期后会被下一次运行回收
+        for proc in processes:
+            proc.terminate()
+        raise
+
+
+def print_progress(render_queue: RenderQueue):
+    counts = render_queue.counts()
+    total = sum(counts.values())
+    finished = counts[DONE] + counts[FAILED]
+    percent = finished / total if total else 1.0
+    print(f"进度: {finished}/{total} ({percent:.0%})  排队 {counts[QUEUED]}  运行中 {counts[RUNNING]}  "
+          f"完成 {counts[DONE]}  失败 {counts[FAILED]}")
+
+
+def _format_time(value: Optional[float]) -> str:
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(value)) if value else '-'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量渲染任务队列')
+    parser.add_argument('--db', default=str(DEFAULT_DB), help='队列数据库路径')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    submit_parser = subparsers.add_parser('submit', help='提交渲染任务')
+    submit_parser.add_argument('inputs', nargs='+', help='试卷 JSON 文件')
+    submit_parser.add_argument('-d', '--output-dir', default='outputs', help='PDF 输出目录')
+    submit_parser.add_argument('--with-answers', action='store_true', help='包含答案页')
+    submit_parser.add_argument('--dpi', type=int, default=PRINT_DPI, help='图例打印分辨率')
+    submit_parser.add_argument('--no-validate', action='store_true', help='提交前不校验数据')
+
+    run_parser = subparsers.add_parser('run', help='启动工作进程执行队列中的任务')
+    run_parser.add_argument('--workers', type=int, default=max(multiprocessing.cpu_count() - 1, 1),
+                            help='工作进程数')
+    run_parser.add_argument('--lease', type=float, default=DEFAULT_LEASE, help='任务租约时长（秒）')
+    run_parser.add_argument('--follow', action='store_true', help='队列为空后继续等待新任务')
+    run_parser.add_argument('--deterministic', action='store_true',
+                            help='生成可复现的 PDF（相同试卷逐字节相同）')
+
+    status_parser = subparsers.add_parser('status', help='查看队列进度或单个任务')
+    status_parser.add_argument('job_id', nargs='?', type=int, help='任务 ID')
+    status_parser.add_argument('--watch', type=float, metavar='SECONDS', help='每隔若干秒刷新进度')
+
+    subparsers.add_parser('retry', help='失败任务重新入队')
+
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        run_workers(args.db, args.workers, args.lease, args.follow, args.deterministic)
+        with RenderQueue(args.db) as render_queue:
+            print_progress(render_queue)
+        return
+
+    with RenderQueue(args.db) as render_queue:
+        if args.command == 'submit':
+            submitted = duplicates = rejected = 0
+            for path in args.inputs:
+                try:
+                    data = json_io.load_file(path)
+                    if not args.no_validate:
+                        validate_exam_data(data)
+                except ValueError as e:
+                    rejected += 1
+                    if isinstance(e, ExamValidationError):
+                        print_errors(e, path)
+                    else:
+                        print(f"× {path}: JSON 解析失败: {e}")
+                    continue
+
+                output = Path(args.output_dir) / f"{Path(path).stem}.pdf"
+                result = render_queue.submit(data, str(output), args.with_answers, args.dpi,
+                                             source=Path(path).name)
+                if result['duplicate']:
+                    duplicates += 1
+                else:
+                    submitted += 1
+            print(f"✓ 新增 {submitted} 个任务，{duplicates} 个与已有任务相同（不会重复渲染）"
+                  + (f"，{rejected} 个被拒绝" if rejected else ''))
+            print_progress(render_queue)
+            sys.exit(1 if rejected else 0)
+
+        elif args.command == 'status':
+            if args.job_id is not None:
+                job = render_queue.get(args.job_id)
+                if job is None:
+                    print(f"× 任务不存在: {args.job_id}")
+                    sys.exit(1)
+                print(f"任务 {job['id']}  {job['source'] or ''}")
+                print(f"  状态: {job['status']}（第 {job['attempts']} 次尝试）")
+                print(f"  输出: {job['output_path']}")
+                print(f"  提交: {_format_time(job['created_at'])}  开始: {_format_time(job['started_at'])}  "
+                      f"结束: {_format_time(job['finished_at'])}")
+                if job['error']:
+                    print(f"  错误: {job['error']}")
+                return
+
+            while True:
+                print_progress(render_queue)
+                counts = render_queue.counts()
+                if not args.watch or not (counts[QUEUED] or counts[RUNNING]):
+                    break
+                time.sleep(args.watch)
+            for row in render_queue.failures():
+                print(f"  × [{row['id']}] {row['source'] or ''}: {row['error']}")
+
+        elif args.command == 'retry':
+            print(f"✓ {render_queue.retry_failed()} 个失败任务已重新入队")
+
+
+if __name__ == '__main__':
+    main()
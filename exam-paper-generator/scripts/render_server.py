@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+试卷渲染服务
+常驻的本地 HTTP/JSON 服务：预先启动 N 个已完成字体注册、样式与渲染器初始化的
+工作进程，接收试卷 JSON 并返回 PDF 字节，省去每次子进程调用的冷启动开销
+
+接口:
+    POST /render?with_answers=1&dpi=300   请求体为试卷 JSON，返回 application/pdf
+         &deterministic=1                 可复现输出，响应带 ETag，If-None-Match 命中时返回 304
+    GET  /healthz                         健康检查
+    GET  /metrics                         Prometheus 文本格式指标
+
+使用方法:
+    python render_server.py --port 8765 --workers 4 --queue-size 16 --timeout 60
+    curl -X POST --data-binary @exam.json 'http://127.0.0.1:8765/render?with_answers=1' -o exam.pdf
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import multiprocessing
+import queue
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import json_io
+from diagram_renderers import PRINT_DPI
+from exam_validator import ExamValidationError, validate_exam_data
+
+# 延迟直方图的桶上界（秒）
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 请求体上限（字节）
+MAX_BODY_BYTES = 20 * 1024 * 1024
+
+# 替换工作进程时的预热尝试次数
+REPLACE_ATTEMPTS = 3
+
+
+class RenderTimeout(Exception):
+    """渲染超时"""
+
+
+class QueueFull(Exception):
+    """排队请求已满"""
+
+
+# ---------- 工作进程 ----------
+
+def _warm_up():
+    """预热：注册字体、构造样式与全部图例渲染器"""
+    from generate_exam import FontManager, StyleManager
+    from diagram_renderers import DiagramRendererFactory
+
+    FontManager.initialize()
+    StyleManager()
+    for diagram_type in DiagramRendererFactory.list_available():
+        DiagramRendererFactory.get_renderer(diagram_type)
+
+
+def _worker_main(conn):
+    """工作进程主循环：接收 (data, include_answers, dpi, deterministic)，返回 ('ok', pdf) 或 ('error', 信息)"""
+    from generate_exam import ExamRenderer
+
+    _warm_up()
+    conn.send(('ready', None))
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+
+        data, include_answers, print_dpi, deterministic = job
+        try:
+            buffer = io.BytesIO()
+            ExamRenderer(data, buffer, include_answers=include_answers, print_dpi=print_dpi,
+                         deterministic=deterministic).render()
+            conn.send(('ok', buffer.getvalue()))
+        except Exception as e:
+            traceback.print_exc()
+            conn.send(('error', f'{type(e).__name__}: {e}'))
+
+
+class _Worker:
+    """一个常驻工作进程及其通信管道"""
+
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def wait_ready(self, timeout: float) -> bool:
+        try:
+            if self.conn.poll(timeout):
+                return self.conn.recv()[0] == 'ready'
+        except (EOFError, OSError):
+            pass  # 进程在预热中退出
+        return False
+
+    def stop(self, force: bool = False):
+        if force:
+            self.process.terminate()
+        else:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class WorkerPool:
+    """预热工作进程池（有界排队，超时的工作进程被终止并在后台替换）"""
+
+    def __init__(self, workers: int, queue_size: int, startup_timeout: float = 120.0):
+        """
+        Args:
+            workers: 工作进程数
+            queue_size: 除正在渲染的请求外，最多允许排队的请求数
+            startup_timeout: 单个工作进程预热的最长时间（秒）
+        """
+        self._ctx = multiprocessing.get_context('spawn')
+        self._idle: 'queue.Queue[_Worker]' = queue.Queue()
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._startup_timeout = startup_timeout
+        self._lock = threading.Lock()
+        self._closed = False
+        self.size = workers
+        self.busy = 0
+        self.waiting = 0
+        self.restarts = 0
+
+        workers_started = [_Worker(self._ctx) for _ in range(workers)]
+        for worker in workers_started:
+            if not worker.wait_ready(startup_timeout):
+                raise RuntimeError('工作进程预热失败')
+            self._idle.put(worker)
+
+    def render(self, data: Dict[str, Any], include_answers: bool, print_dpi: int, timeout: float,
+               deterministic: bool = False) -> bytes:
+        """
+        在空闲工作进程中渲染试卷
+
+        Raises:
+            QueueFull: 排队已满
+            RenderTimeout: 排队加渲染超过 timeout 秒
+            RuntimeError: 渲染失败
+        """
+        if not self._slots.acquire(blocking=False):
+            raise QueueFull()
+        try:
+            deadline = time.monotonic() + timeout
+            with self._lock:
+                self.waiting += 1
+            try:
+                worker = self._idle.get(timeout=timeout)
+            except queue.Empty:
+                raise RenderTimeout()
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+
+            with self._lock:
+                self.busy += 1
+            broken = False
+            try:
+                worker.conn.send((data, include_answers, print_dpi, deterministic))
+                remaining = max(deadline - time.monotonic(), 0.0)
+                if not worker.conn.poll(remaining):
+                    broken = True
+                    raise RenderTimeout()
+                status, payload = worker.conn.recv()
+            except (EOFError, BrokenPipeError, OSError):
+                broken = True
+                raise RuntimeError('工作进程异常退出')
+            finally:
+                with self._lock:
+                    self.busy -= 1
+                if broken:
+                    # 无法中断正在渲染的进程：后台终止并补充新的工作进程，请求立即返回
+                    threading.Thread(target=self._replace, args=(worker,), daemon=True).start()
+                else:
+                    self._idle.put(worker)
+
+            if status != 'ok':
+                raise RuntimeError(payload)
+            return payload
+        finally:
+            self._slots.release()
+
+    def _replace(self, broken: _Worker):
+        """
+        终止损坏的工作进程，启动并预热替换进程后放回空闲队列（在后台线程中运行）
+
+        连续 REPLACE_ATTEMPTS 次预热失败时放弃，进程池因此少一个工作进程
+        """
+        broken.stop(force=True)
+        for _ in range(REPLACE_ATTEMPTS):
+            if self._closed:
+                return
+            worker = _Worker(self._ctx)
+            if worker.wait_ready(self._startup_timeout):
+                with self._lock:
+                    self.restarts += 1
+                    if not self._closed:
+                        self._idle.put(worker)
+                        return
+                worker.stop()
+                return
+            worker.stop(force=True)
+        with self._lock:
+            self.size -= 1
+        print(f"⚠ 替换的工作进程连续 {REPLACE_ATTEMPTS} 次预热失败，当前工作进程数 {self.size}")
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+
+# ---------- 指标 ----------
+
+class Histogram:
+    """Prometheus 风格的累积直方图"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str = '') -> List[str]:
+        prefix = f'{labels},' if labels else ''
+        result = [f'{name}_bucket{{{prefix}le="{bound}"}} {n}' for bound, n in zip(self.buckets, self.counts)]
+        result.append(f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}')
+        suffix = f'{{{labels}}}' if labels else ''
+        result.append(f'{name}_sum{suffix} {self.total:.6f}')
+        result.append(f'{name}_count{suffix} {self.count}')
+        return result
+
+
+class Metrics:
+    """服务指标"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency: Dict[str, Histogram] = {}
+        self.requests: Dict[str, int] = {}
+        self.pdf_bytes = 0
+
+    def record(self, status: int, seconds: float, size: int = 0):
+        outcome = 'success' if status == 200 else 'error'
+        with self._lock:
+            self.latency.setdefault(outcome, Histogram()).observe(seconds)
+            self.requests[str(status)] = self.requests.get(str(status), 0) + 1
+            self.pdf_bytes += size
+
+    def render(self, pool: WorkerPool) -> str:
+        with self._lock:
+            lines = [
+                '# HELP exam_render_duration_seconds 渲染请求耗时（含排队）',
+                '# TYPE exam_render_duration_seconds histogram',
+            ]
+            for outcome, histogram in sorted(self.latency.items()):
+                lines.extend(histogram.lines('exam_render_duration_seconds', f'outcome="{outcome}"'))
+            lines += ['# HELP exam_render_requests_total 渲染请求数（按 HTTP 状态码）',
+                      '# TYPE exam_render_requests_total counter']
+            lines += [f'exam_render_requests_total{{status="{code}"}} {n}'
+                      for code, n in sorted(self.requests.items())]
+            lines += ['# TYPE exam_render_pdf_bytes_total counter',
+                      f'exam_render_pdf_bytes_total {self.pdf_bytes}']
+        lines += [
+            '# TYPE exam_render_workers gauge', f'exam_render_workers {pool.size}',
+            '# TYPE exam_render_workers_busy gauge', f'exam_render_workers_busy {pool.busy}',
+            '# TYPE exam_render_queue_depth gauge', f'exam_render_queue_depth {pool.waiting}',
+            '# TYPE exam_render_worker_restarts_total counter',
+            f'exam_render_worker_restarts_total {pool.restarts}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+
+# ---------- HTTP ----------
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """HTTP 请求处理"""
+
+    server_version = 'ExamRenderServer/1.0'
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/healthz':
+            self._send(200, b'ok\n', 'text/plain; charset=utf-8')
+        elif path == '/metrics':
+            body = self.server.metrics.render(self.server.pool).encode('utf-8')
+            self._send(200, body, 'text/plain; version=0.0.4; charset=utf-8')
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/render':
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        start = time.perf_counter()
+        status, size = self._handle_render(parse_qs(url.query))
+        self.server.metrics.record(status, time.perf_counter() - start, size)
+
+    def _handle_render(self, query: Dict[str, List[str]]) -> Tuple[int, int]:
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0 or length > MAX_BODY_BYTES:
+            return self._send_json(413 if length > MAX_BODY_BYTES else 400, {'error': '请求体为空或过大'})
+
+        try:
+            data = json_io.loads(self.rfile.read(length))
+        except ValueError as e:
+            return self._send_json(400, {'error': f'JSON 解析失败: {e}'})
+
+        if not self.server.skip_validation:
+            try:
+                validate_exam_data(data)
+            except ExamValidationError as e:
+                return self._send_json(422, {'error': str(e), 'details': e.errors})
+
+        include_answers = query.get('with_answers', ['0'])[0].lower() in ('1', 'true', 'yes')
+        deterministic = self.server.deterministic
+        if 'deterministic' in query:
+            deterministic = query['deterministic'][0].lower() in ('1', 'true', 'yes')
+        try:
+            print_dpi = int(query.get('dpi', [self.server.print_dpi])[0])
+        except ValueError:
+            return self._send_json(400, {'error': 'dpi 必须是整数'})
+
+        try:
+            pdf = self.server.pool.render(data, include_answers, print_dpi, self.server.timeout, deterministic)
+        except QueueFull:
+            return self._send_json(503, {'error': '渲染队列已满，请稍后重试'}, retry_after=1)
+        except RenderTimeout:
+            return self._send_json(504, {'error': f'渲染超时（{self.server.timeout:g}s）'})
+        except RuntimeError as e:
+            return self._send_json(500, {'error': str(e)})
+
+        if not deterministic:
+            self._send(200, pdf, 'application/pdf')
+            return 200, len(pdf)
+
+        # 可复现输出的 ETag 只取决于内容：客户端可据此跳过上传与重印
+        etag = f'"{hashlib.sha1(pdf).hexdigest()}"'
+        if etag in self.headers.get('If-None-Match', ''):
+            self._send(304, b'', 'application/pdf', etag=etag)
+            return 304, 0
+        self._send(200, pdf, 'application/pdf', etag=etag)
+        return 200, len(pdf)
+
+    def _send(self, status: int, body: bytes, content_type: str, retry_after: Optional[int] = None,
+              etag: Optional[str] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if retry_after is not None:
+            self.send_header('Retry-After', str(retry_after))
+        if etag is not None:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: Dict[str, Any], retry_after: Optional[int] = None) -> Tuple[int, int]:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self._send(status, body, 'application/json; charset=utf-8', retry_after)
+        return status, 0
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class RenderServer(ThreadingHTTPServer):
+    """渲染服务（每个连接一个线程，实际渲染在工作进程池中进行）"""
+
+    daemon_threads = True
+
+    def __init__(self, address, pool: WorkerPool, timeout: float, print_dpi: int = PRINT_DPI,
+                 skip_validation: bool = False, quiet: bool = False, deterministic: bool = False):
+        super().__init__(address, RenderRequestHandler)
+        self.pool = pool
+        self.timeout = timeout
+        self.print_dpi = print_dpi
+        self.deterministic = deterministic
+        self.skip_validation = skip_validation
+        self.quiet = quiet
+        self.metrics = Metrics()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='试卷渲染服务（预热工作进程池）')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口')
+    parser.add_argument('--workers', type=int, default=max(multiprocessing.cpu_count() - 1, 1),
+                        help='工作进程数')
+    parser.add_argument('--queue-size', type=int, default=16, help='最多排队的请求数，超出返回 503')
+    parser.add_argument('--timeout', type=float, default=60.0, help='单个请求的超时（秒，含排队）')
+    parser.add_argument('--dpi', type=int, default=PRINT_DPI, help='默认的图例打印分辨率')
+    parser.add_argument('--no-validate', action='store_true', help='跳过渲染前的数据校验')
+    parser.add_argument('--deterministic', action='store_true',
+                        help='默认生成可复现的 PDF 并返回 ETag（请求参数 deterministic=0/1 可覆盖）')
+    parser.add_argument('--quiet', action='store_true', help='不输出访问日志')
+
+    args = parser.parse_args()
+
+    print(f"正在预热 {args.workers} 个工作进程...")
+    start = time.perf_counter()
+    pool = WorkerPool(args.workers, args.queue_size)
+    print(f"✓ 工作进程就绪（{time.perf_counter() - start:.1f}s）")
+
+    server = RenderServer((args.host, args.port), pool, args.timeout, args.dpi,
+                          skip_validation=args.no_validate, quiet=args.quiet,
+                          deterministic=args.deterministic)
+    print(f"✓ 渲染服务已启动: http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n正在关闭...")
+    finally:
+        server.server_close()
+        pool.shutdown()
+
+
+if __name__ == '__main__':
+    main()
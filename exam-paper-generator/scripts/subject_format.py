@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+学科文本格式化
+根据学科把题目文本中的数字与指数转换为上下标：
+- 数学：^n 转为上标；
+- 化学（及其他学科）：元素后的数字转为下标，^n+ / Fe2+ / SO42- 等转为电荷上标。
+输出 ReportLab 段落标记（<sub>/<super>），to_html 将其转换为 HTML 的 <sub>/<sup>
+"""
+
+import html
+import re
+from functools import lru_cache
+
+SUB_OPEN = '<sub rise="2" size="80%">'
+
+_MATH_POWER = re.compile(r'\^(-?[0-9]+)')
+_CHARGE = re.compile(r'\^([0-9]*[+-])')
+_POWER = re.compile(r'\^([0-9]+)')
+_SUBSCRIPT = re.compile(r'(?<=[A-Za-z\)\]])(\d+)')
+_ION_WITH_COUNT = re.compile(
+    r'(?<![A-Za-z\)\]])([A-Z][a-z]?)(?:' + re.escape(SUB_OPEN) + r'(\d+)</sub>)([+-])'
+)
+_ION = re.compile(r'(?<![A-Za-z\)\]])([A-Z][a-z]?)([+-])')
+_GROUP_CHARGE = re.compile(r'(' + re.escape(SUB_OPEN) + r'\d+</sub>)([+-])')
+_TAG_SPLIT = re.compile(r'(<[^>]+>)')
+
+# ReportLab 标记 -> HTML 标记
+_HTML_TAGS = (
+    (SUB_OPEN, '<sub>'),
+    ('<super>', '<sup>'),
+    ('</super>', '</sup>'),
+)
+
+
+def is_math_subject(subject: str) -> bool:
+    """数学（且不是化学）学科使用数学格式"""
+    subject = str(subject or '')
+    subject_lower = subject.lower()
+    is_math = '数学' in subject or 'math' in subject_lower
+    is_chem = '化学' in subject or 'chem' in subject_lower
+    return is_math and not is_chem
+
+
+def format_math_text(text: str) -> str:
+    """数学表达式：处理 ^n 的上标"""
+    return _MATH_POWER.sub(r'<super>\1</super>', html.escape(text, quote=False))
+
+
+def _apply_outside_tags(text: str, func) -> str:
+    """仅对标签外的文本进行转换"""
+    parts = _TAG_SPLIT.split(text)
+    for idx, part in enumerate(parts):
+        if part.startswith('<') and part.endswith('>'):
+            continue
+        parts[idx] = func(part)
+    return ''.join(parts)
+
+
+def format_chemistry_text(text: str) -> str:
+    """化学表达式：处理下标与电荷"""
+    safe_text = html.escape(text, quote=False)
+
+    # 先处理电荷（显式 ^ 形式）
+    safe_text = _CHARGE.sub(r'<super>\1</super>', safe_text)
+    safe_text = _POWER.sub(r'<super>\1</super>', safe_text)
+
+    # 普通下标
+    safe_text = _apply_outside_tags(
+        safe_text,
+        lambda s: _SUBSCRIPT.sub(lambda m: f'{SUB_OPEN}{m.group(1)}</sub>', s),
+    )
+
+    # 单原子离子（如 Fe2+、Na+）
+    safe_text = _ION_WITH_COUNT.sub(r'\1<super>\2\3</super>', safe_text)
+    safe_text = _ION.sub(r'\1<super>\2</super>', safe_text)
+
+    # 多原子离子电荷
+    safe_text = _GROUP_CHARGE.sub(r'\1<super>\2</super>', safe_text)
+    return safe_text
+
+
+@lru_cache(maxsize=8192)
+def format_text(text: str, subject: str = '') -> str:
+    """按学科格式化文本，返回 ReportLab 段落标记（已转义）"""
+    if not text:
+        return text
+    if is_math_subject(subject):
+        return format_math_text(text)
+    return format_chemistry_text(text)
+
+
+def to_html(markup: str) -> str:
+    """ReportLab 段落标记转换为 HTML"""
+    for source, target in _HTML_TAGS:
+        markup = markup.replace(source, target)
+    return markup
+
+
+def format_html(text: str, subject: str = '') -> str:
+    """按学科格式化文本，返回 HTML 片段（已转义）"""
+    return to_html(format_text(text, subject))
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+渲染工作目录管理
+每次渲染使用独立的临时目录存放图例 PNG：
+- 目录按进程分片（<根目录>/<主机名>-<pid>/run-xxxx），并行批量渲染互不干扰；
+- 以上下文管理器使用，正常结束、抛出异常都会删除；
+- SIGTERM/SIGHUP 与进程退出时删除本进程的分片；
+- 清理程序删除所属进程已不存在、且超过时限未更新的分片，避免长期运行的批量主机堆积孤儿文件
+
+使用方法:
+    python workspace.py status
+    python workspace.py clean --max-age-hours 6
+    python workspace.py clean --dry-run
+"""
+
+import argparse
+import atexit
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+# 工作目录根目录（可用环境变量 EXAM_WORKSPACE_DIR 指定）
+DEFAULT_ROOT = Path(os.environ.get('EXAM_WORKSPACE_DIR')
+                    or Path(tempfile.gettempdir()) / 'exam-paper-generator')
+
+# 超过该时长未更新、且所属进程已不存在的分片视为过期（秒）
+DEFAULT_MAX_AGE = 6 * 3600
+
+# 退出时需要清理的信号
+CLEANUP_SIGNALS = tuple(getattr(signal, name) for name in ('SIGTERM', 'SIGHUP') if hasattr(signal, name))
+
+_lock = threading.Lock()
+_shards: dict = {}  # 根目录 -> 本进程分片目录
+_hooks_installed = False
+
+
+def _shard_name() -> str:
+    return f'{socket.gethostname()}-{os.getpid()}'
+
+
+def pid_alive(pid: int) -> bool:
+    """本机进程是否仍在运行"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _remove_shards():
+    """删除本进程创建的全部分片"""
+    with _lock:
+        shards = [shard for shard in _shards.values() if shard.owner == os.getpid()]
+        _shards.clear()
+    for shard in shards:
+        shutil.rmtree(shard.path, ignore_errors=True)
+
+
+def _on_signal(signum, frame):
+    # 转为 SystemExit：正在执行的 with 块与 atexit 都会照常清理
+    raise SystemExit(128 + signum)
+
+
+def _install_hooks():
+    """注册退出清理；仅在主线程、且信号仍为默认处理时接管信号，不覆盖应用自己的处理函数"""
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    _hooks_installed = True
+    atexit.register(_remove_shards)
+    if threading.current_thread() is not threading.main_thread():
+        return
+    for signum in CLEANUP_SIGNALS:
+        try:
+            if signal.getsignal(signum) is signal.SIG_DFL:
+                signal.signal(signum, _on_signal)
+        except (OSError, ValueError):
+            pass
+
+
+class _Shard:
+    def __init__(self, path: Path):
+        self.path = path
+        self.owner = os.getpid()
+
+
+def _process_shard(root: Path) -> Path:
+    """本进程在 root 下的分片目录（首次使用时创建，并顺带清理过期分片）"""
+    with _lock:
+        shard = _shards.get(root)
+        # fork 出的子进程不能沿用父进程的分片
+        if shard is not None and shard.owner == os.getpid() and shard.path.is_dir():
+            return shard.path
+        path = root / _shard_name()
+        path.mkdir(parents=True, exist_ok=True)
+        _shards[root] = _Shard(path)
+        _install_hooks()
+
+    try:
+        clean_stale(root)
+    except OSError:
+        pass
+    return path
+
+
+class RenderWorkspace:
+    """
+    单次渲染的临时工作目录
+
+    with RenderWorkspace() as workspace:
+        path = workspace.new_file('.png')
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root) if root else DEFAULT_ROOT
+        self.path: Optional[Path] = None
+
+    def __enter__(self) -> 'RenderWorkspace':
+        shard = _process_shard(self.root)
+        self.path = Path(tempfile.mkdtemp(prefix='run-', dir=shard))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cleanup()
+        return False
+
+    def new_file(self, suffix: str = '') -> str:
+        """在工作目录中创建一个空文件并返回路径"""
+        if self.path is None:
+            raise RuntimeError('工作目录未打开，请在 with RenderWorkspace() 中使用')
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=self.path)
+        os.close(fd)
+        return path
+
+    def cleanup(self):
+        if self.path is not None:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self.path = None
+
+
+def _last_modified(path: Path) -> float:
+    """目录及其直接子项中最新的修改时间"""
+    latest = path.stat().st_mtime
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                latest = max(latest, entry.stat(follow_symlinks=False).st_mtime)
+            except OSError:
+                pass
+    return latest
+
+
+def _is_stale(path: Path, max_age: float, now: float) -> bool:
+    if now - _last_modified(path) < max_age:
+        return False
+    host, _, pid = path.name.rpartition('-')
+    if host == socket.gethostname() and pid.isdigit():
+        return not pid_alive(int(pid))
+    # 其他主机（共享目录）上的分片无法检查进程，只按时间判断
+    return True
+
+
+def clean_stale(root: Optional[Path] = None, max_age: float = DEFAULT_MAX_AGE,
+                dry_run: bool = False) -> List[Path]:
+    """
+    删除过期分片
+
+    Returns:
+        被删除（dry_run 时为将被删除）的目录
+    """
+    root = Path(root) if root else DEFAULT_ROOT
+    if not root.is_dir():
+        return []
+
+    with _lock:
+        own = {shard.path for shard in _shards.values() if shard.owner == os.getpid()}
+
+    now = time.time()
+    removed = []
+    for path in root.iterdir():
+        if not path.is_dir() or path in own:
+            continue
+        try:
+            if not _is_stale(path, max_age, now):
+                continue
+        except OSError:
+            continue
+        if not dry_run:
+            shutil.rmtree(path, ignore_errors=True)
+        removed.append(path)
+    return removed
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='渲染工作目录管理')
+    parser.add_argument('--root', default=str(DEFAULT_ROOT), help='工作目录根目录')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('status', help='列出各进程分片')
+
+    clean_parser = subparsers.add_parser('clean', help='删除过期分片')
+    clean_parser.add_argument('--max-age-hours', type=float, default=DEFAULT_MAX_AGE / 3600,
+                              help='超过该时长未更新且进程已退出的分片视为过期')
+    clean_parser.add_argument('--dry-run', action='store_true', help='只列出，不删除')
+
+    args = parser.parse_args()
+    root = Path(args.root)
+
+    if args.command == 'status':
+        if not root.is_dir():
+            print(f'工作目录不存在: {root}')
+            return
+        now = time.time()
+        for path in sorted(root.iterdir()):
+            if not path.is_dir():
+                continue
+            runs = sum(1 for _ in path.iterdir())
+            age = (now - _last_modified(path)) / 60
+            print(f'{path.name:<40} {runs:>4} 个运行目录  {_dir_size(path) / 1024:>10.1f} KB  {age:>8.1f} 分钟前')
+    else:
+        removed = clean_stale(root, args.max_age_hours * 3600, dry_run=args.dry_run)
+        verb = '将删除' if args.dry_run else '已删除'
+        for path in removed:
+            print(f'  {path}')
+        print(f'✓ {verb} {len(removed)} 个过期分片')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Answer Cache for NotebookLM
+Stores answers keyed by (notebook, normalised question) next to library.json,
+so re-asking the same question skips the browser round-trip.
+
+- Questions are normalised (Unicode NFKC, case, whitespace, trailing punctuation)
+- Entries expire after ANSWER_CACHE_TTL_SECONDS
+- At most ANSWER_CACHE_MAX_ENTRIES are kept (least recently used are evicted)
+- Writes are atomic (temp file + replace) and made under a file lock, so
+  several scripts running at once don't lose each other's entries
+- Lookups only read; hit/miss counters are kept in memory and saved with
+  the next put() or flush()
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+import unicodedata
+from typing import Any, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from config import ANSWER_CACHE_FILE, ANSWER_CACHE_TTL_SECONDS, ANSWER_CACHE_MAX_ENTRIES
+
+_WHITESPACE = re.compile(r'\s+')
+_TRAILING_PUNCTUATION = '?？!！.。,，;；:： '
+
+
+def normalize_question(question: str) -> str:
+    """Canonical form used for cache keys"""
+    text = unicodedata.normalize('NFKC', question).casefold()
+    text = _WHITESPACE.sub(' ', text).strip()
+    return text.rstrip(_TRAILING_PUNCTUATION)
+
+
+class AnswerCache:
+    """Persistent answer cache with TTL and size-bounded LRU eviction"""
+
+    def __init__(self, cache_file=ANSWER_CACHE_FILE, ttl_seconds: int = ANSWER_CACHE_TTL_SECONDS,
+                 max_entries: int = ANSWER_CACHE_MAX_ENTRIES):
+        self.cache_file = cache_file
+        self.lock_file = cache_file.with_name(cache_file.name + '.lock')
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # Not yet saved: hit/miss counts and entries used since the last write
+        self._pending = {'hits': 0, 'misses': 0}
+        self._used: Dict[str, float] = {}
+
+    @staticmethod
+    def make_key(notebook: str, question: str) -> str:
+        """Cache key for a notebook (library ID or URL) and question"""
+        raw = f"{notebook}\n{normalize_question(question)}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Exclusive lock (sidecar file) held across load -> modify -> save"""
+        self.lock_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_file, 'a+') as lock:
+            if fcntl:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            else:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock.seek(0)
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        data.setdefault('entries', {})
+        data.setdefault('stats', {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0})
+        return data
+
+    def _save(self, data: Dict[str, Any]):
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=str(self.cache_file.parent), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, self.cache_file)
+        except Exception:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def _apply_pending(self, data: Dict[str, Any]):
+        """Merge in-memory counters and LRU touches into freshly loaded data"""
+        for name, count in self._pending.items():
+            data['stats'][name] += count
+        for key, used in self._used.items():
+            entry = data['entries'].get(key)
+            if entry:
+                entry['last_used'] = max(entry['last_used'], used)
+                entry['hits'] = entry.get('hits', 0) + 1
+        self._pending = {'hits': 0, 'misses': 0}
+        self._used = {}
+
+    def _expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return now - entry['created_at'] > self.ttl_seconds
+
+    def get(self, notebook: str, question: str) -> Optional[str]:
+        """
+        Cached answer (without follow-up reminder) or None
+
+        Only reads the cache file; the hit or miss is counted in memory.
+        """
+        key = self.make_key(notebook, question)
+        entry = self._load()['entries'].get(key)
+        now = time.time()
+
+        if entry and not self._expired(entry, now):
+            self._pending['hits'] += 1
+            self._used[key] = now
+            return entry['answer']
+
+        self._pending['misses'] += 1
+        return None
+
+    def put(self, notebook: str, question: str, answer: str):
+        """Store an answer, evicting expired and least recently used entries"""
+        try:
+            with self._locked():
+                data = self._load()
+                self._apply_pending(data)
+                entries = data['entries']
+                now = time.time()
+
+                entries[self.make_key(notebook, question)] = {
+                    'notebook': notebook,
+                    'question': question,
+                    'answer': answer,
+                    'created_at': now,
+                    'last_used': now,
+                    'hits': 0,
+                }
+                data['stats']['stores'] += 1
+
+                for key in [k for k, e in entries.items() if self._expired(e, now)]:
+                    del entries[key]
+                overflow = len(entries) - self.max_entries
+                if overflow > 0:
+                    for key in sorted(entries, key=lambda k: entries[k]['last_used'])[:overflow]:
+                        del entries[key]
+                    data['stats']['evictions'] += overflow
+
+                self._save(data)
+        except OSError as e:
+            print(f"  ⚠️ Could not save answer cache: {e}")
+
+    def flush(self):
+        """Save hit/miss counters gathered since the last write (no-op if none)"""
+        if not any(self._pending.values()):
+            return
+        try:
+            with self._locked():
+                data = self._load()
+                self._apply_pending(data)
+                self._save(data)
+        except OSError:
+            pass
+
+    def clear(self) -> int:
+        """Remove all entries (statistics are kept)"""
+        with self._locked():
+            data = self._load()
+            self._apply_pending(data)
+            removed = len(data['entries'])
+            data['entries'] = {}
+            self._save(data)
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache statistics"""
+        data = self._load()
+        now = time.time()
+        entries = data['entries'].values()
+        stats = dict(data['stats'])
+        for name, count in self._pending.items():
+            stats[name] += count
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'entries': len(data['entries']),
+            'expired': sum(1 for e in entries if self._expired(e, now)),
+            'hit_rate': stats['hits'] / lookups if lookups else 0.0,
+            'size_bytes': self.cache_file.stat().st_size if self.cache_file.exists() else 0,
+            'ttl_seconds': self.ttl_seconds,
+            'max_entries': self.max_entries,
+            'cache_path': str(self.cache_file),
+        })
+        return stats
+
+
+def cache_key_for(notebook_url: str, library=None) -> str:
+    """Notebook part of the cache key: library ID when known, else the URL"""
+    if library is not None:
+        for notebook in library.list_notebooks():
+            if notebook['url'] == notebook_url:
+                return notebook['id']
+    return notebook_url
@@ -0,0 +1,263 @@
+"""
+Answer Completion Detection for NotebookLM
+An in-page MutationObserver pushes the answer state (thinking indicator,
+latest response text) to Python through expose_function whenever the DOM
+changes. An answer is complete once div.thinking-message is gone, a new
+response is present and nothing has changed for ANSWER_QUIET_MS, measured
+from the last pushed change instead of the next 0.5-1 s poll.
+
+A slow snapshot poll runs alongside as a safety net in case the page
+drops the observer (e.g. a navigation before the init script ran). When no
+events arrive, an answer also needs the same text on two snapshots in a row.
+
+stream() yields the partial answer while NotebookLM is still writing;
+DeltaEncoder turns those snapshots into incremental stream events.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+
+from config import RESPONSE_SELECTORS, QUERY_TIMEOUT_SECONDS, ANSWER_QUIET_MS
+
+BINDING_NAME = "__notebooklmAnswerState"
+
+# Wait granularity while listening for pushed events (ms)
+TICK_MS = 50
+
+# Safety-net snapshot interval (s)
+FALLBACK_POLL_SECONDS = 1.0
+
+# Reads {thinking, text, count} from the page
+_READ_STATE_JS = """
+const readAnswerState = (selectors) => {
+  const thinking = document.querySelector('div.thinking-message');
+  const thinkingVisible = !!thinking && thinking.getClientRects().length > 0
+    && getComputedStyle(thinking).visibility !== 'hidden';
+  for (const selector of selectors) {
+    const elements = document.querySelectorAll(selector);
+    if (elements.length) {
+      const latest = elements[elements.length - 1];
+      return {thinking: thinkingVisible, text: (latest.innerText || '').trim(), count: elements.length};
+    }
+  }
+  return {thinking: thinkingVisible, text: null, count: 0};
+};
+"""
+
+SNAPSHOT_JS = "(selectors) => {" + _READ_STATE_JS + " return readAnswerState(selectors); }"
+
+OBSERVER_JS = """
+(() => {
+  if (window.__notebooklmObserver) return;
+  window.__notebooklmObserver = true;
+  const selectors = %s;
+  %s
+  let last = '';
+  let scheduled = false;
+  const push = () => {
+    scheduled = false;
+    const state = readAnswerState(selectors);
+    const key = JSON.stringify(state);
+    if (key !== last && typeof window.%s === 'function') {
+      last = key;
+      window.%s(state);
+    }
+  };
+  const start = () => {
+    new MutationObserver(() => {
+      if (!scheduled) { scheduled = true; queueMicrotask(push); }
+    }).observe(document.documentElement, {childList: true, subtree: true, characterData: true, attributes: true});
+    push();
+  };
+  if (document.documentElement) start();
+  else document.addEventListener('DOMContentLoaded', start);
+})()
+""" % (json.dumps(RESPONSE_SELECTORS), _READ_STATE_JS, BINDING_NAME, BINDING_NAME)
+
+
+class AnswerState:
+    """Latest answer state seen for a page and the time it last changed"""
+
+    def __init__(self):
+        self.state: Dict[str, Any] = {'thinking': False, 'text': None, 'count': 0}
+        self.changed_at = time.time()
+
+    def update(self, state: Dict[str, Any]):
+        if state != self.state:
+            self.state = state
+            self.changed_at = time.time()
+
+    def partial(self, previous: Dict[str, Any]) -> Optional[str]:
+        """The new answer text written so far (None while thinking or before it appears)"""
+        text = self.state.get('text')
+        if self.state.get('thinking') or not text:
+            return None
+        is_new = text != previous.get('text') or self.state.get('count', 0) > previous.get('count', 0)
+        return text if is_new else None
+
+    def answer(self, previous: Dict[str, Any], quiet_ms: int) -> Optional[str]:
+        """The new answer if it is complete, otherwise None"""
+        if (time.time() - self.changed_at) * 1000 < quiet_ms:
+            return None
+        return self.partial(previous)
+
+
+class DeltaEncoder:
+    """
+    Turns successive answer snapshots into stream events:
+    {'type': 'delta', 'text': appended} while the answer grows,
+    {'type': 'replace', 'text': full} if NotebookLM rewrote earlier text
+    """
+
+    def __init__(self):
+        self.text = ''
+
+    def encode(self, text: str) -> Optional[Dict[str, str]]:
+        if text == self.text:
+            return None
+        if text.startswith(self.text):
+            event = {'type': 'delta', 'text': text[len(self.text):]}
+        else:
+            event = {'type': 'replace', 'text': text}
+        self.text = text
+        return event
+
+
+class AnswerWatcher:
+    """
+    Event-driven answer detection for a sync API page
+
+    Install once per page (survives reloads), then per question:
+        previous = watcher.snapshot()
+        ... submit ...
+        answer = watcher.wait_for_answer(previous)
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.tracker = AnswerState()
+        self.events = 0
+        self.page.expose_function(BINDING_NAME, self._on_state)
+        self.page.add_init_script(OBSERVER_JS)
+        self.page.evaluate(OBSERVER_JS)
+
+    def _on_state(self, state: Dict[str, Any]):
+        self.events += 1
+        self.tracker.update(state)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current answer state (use before submitting a question)"""
+        state = self.page.evaluate(SNAPSHOT_JS, RESPONSE_SELECTORS)
+        self.tracker.update(state)
+        return state
+
+    def stream(self, previous: Dict[str, Any], timeout: int = QUERY_TIMEOUT_SECONDS,
+               quiet_ms: int = ANSWER_QUIET_MS) -> Iterator[Tuple[str, bool]]:
+        """
+        Yield (text, complete) for every change of the new answer;
+        the last item has complete=True
+        """
+        deadline = time.time() + timeout
+        next_poll = time.time() + FALLBACK_POLL_SECONDS
+        last_partial = None
+        events_before = self.events
+        stable_snapshots = 0
+
+        while time.time() < deadline:
+            answer = self.tracker.answer(previous, quiet_ms)
+            # Observer silent: only trust text seen unchanged on two snapshots
+            if answer and (self.events > events_before or stable_snapshots):
+                yield answer, True
+                return
+            partial = self.tracker.partial(previous)
+            if partial and partial != last_partial:
+                last_partial = partial
+                yield partial, False
+            # Lets Playwright deliver pushed events while we wait
+            self.page.wait_for_timeout(TICK_MS)
+            if time.time() >= next_poll:
+                next_poll = time.time() + FALLBACK_POLL_SECONDS
+                try:
+                    seen = self.tracker.state
+                    stable_snapshots = stable_snapshots + 1 if self.snapshot() == seen else 0
+                except Exception:
+                    pass
+
+        raise TimeoutError(f"No response received within {timeout} seconds")
+
+    def wait_for_answer(self, previous: Dict[str, Any], timeout: int = QUERY_TIMEOUT_SECONDS,
+                        quiet_ms: int = ANSWER_QUIET_MS) -> str:
+        """Wait until a new answer is complete and return its text"""
+        for text, complete in self.stream(previous, timeout, quiet_ms):
+            if complete:
+                return text
+
+
+class AsyncAnswerWatcher:
+    """Event-driven answer detection for an async API page (see AnswerWatcher)"""
+
+    def __init__(self, page):
+        self.page = page
+        self.tracker = AnswerState()
+        self.events = 0
+        self.changed = asyncio.Event()
+
+    @classmethod
+    async def install(cls, page) -> 'AsyncAnswerWatcher':
+        watcher = cls(page)
+        await page.expose_function(BINDING_NAME, watcher._on_state)
+        await page.add_init_script(OBSERVER_JS)
+        await page.evaluate(OBSERVER_JS)
+        return watcher
+
+    def _on_state(self, state: Dict[str, Any]):
+        self.events += 1
+        self.tracker.update(state)
+        self.changed.set()
+
+    async def snapshot(self) -> Dict[str, Any]:
+        state = await self.page.evaluate(SNAPSHOT_JS, RESPONSE_SELECTORS)
+        self.tracker.update(state)
+        return state
+
+    async def stream(self, previous: Dict[str, Any], timeout: int = QUERY_TIMEOUT_SECONDS,
+                     quiet_ms: int = ANSWER_QUIET_MS) -> AsyncIterator[Tuple[str, bool]]:
+        deadline = time.time() + timeout
+        next_poll = time.time() + FALLBACK_POLL_SECONDS
+        last_partial = None
+        events_before = self.events
+        stable_snapshots = 0
+
+        while time.time() < deadline:
+            answer = self.tracker.answer(previous, quiet_ms)
+            # Observer silent: only trust text seen unchanged on two snapshots
+            if answer and (self.events > events_before or stable_snapshots):
+                yield answer, True
+                return
+            partial = self.tracker.partial(previous)
+            if partial and partial != last_partial:
+                last_partial = partial
+                yield partial, False
+            self.changed.clear()
+            try:
+                # Wake up on the next pushed event, or re-check after a tick
+                await asyncio.wait_for(self.changed.wait(), TICK_MS / 1000)
+            except asyncio.TimeoutError:
+                pass
+            if time.time() >= next_poll:
+                next_poll = time.time() + FALLBACK_POLL_SECONDS
+                try:
+                    seen = self.tracker.state
+                    stable_snapshots = stable_snapshots + 1 if await self.snapshot() == seen else 0
+                except Exception:
+                    pass
+
+        raise TimeoutError(f"No response received within {timeout} seconds")
+
+    async def wait_for_answer(self, previous: Dict[str, Any], timeout: int = QUERY_TIMEOUT_SECONDS,
+                              quiet_ms: int = ANSWER_QUIET_MS) -> str:
+        async for text, complete in self.stream(previous, timeout, quiet_ms):
+            if complete:
+                return text
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Fan-out NotebookLM Questions
+Asks the same question in several notebooks at once: one browser, one tab per
+notebook in a shared context, submitted in parallel with the async Playwright API.
+Answers are collected as they stabilise and written as one combined JSON document.
+
+Progress goes to stderr, the JSON result to stdout (or --output).
+
+Usage:
+    python ask_notebooks.py --question "..." --notebook-ids api-docs,sdk-guide
+    python ask_notebooks.py --question "..." --query "api" --max-concurrent 3
+    python ask_notebooks.py --question "..." --all --timeout 180 --output answers.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from patchright.async_api import async_playwright
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from auth_manager import AuthManager
+from notebook_manager import NotebookLibrary
+from browser_utils import BrowserFactory, StealthUtils
+from answer_watcher import AsyncAnswerWatcher
+from config import (
+    QUERY_INPUT_SELECTORS, PAGE_LOAD_TIMEOUT, FANOUT_MAX_CONCURRENT, FANOUT_TIMEOUT_SECONDS,
+    INPUT_STRATEGIES
+)
+from answer_cache import AnswerCache
+from ask_question import FOLLOW_UP_REMINDER
+
+
+async def _ask_in_page(page, notebook_url: str, question: str, input_strategy: Optional[str] = None) -> str:
+    """Open the notebook in this tab, submit the question and return the answer"""
+    await page.goto(notebook_url, wait_until="domcontentloaded", timeout=PAGE_LOAD_TIMEOUT)
+    await page.wait_for_url(re.compile(r"^https://notebooklm\.google\.com/"), timeout=10000)
+
+    input_selector = None
+    for selector in QUERY_INPUT_SELECTORS:
+        try:
+            await page.wait_for_selector(selector, timeout=10000, state="visible")
+            input_selector = selector
+            break
+        except Exception:
+            continue
+    if not input_selector:
+        raise RuntimeError("Could not find query input")
+
+    watcher = await AsyncAnswerWatcher.install(page)
+    previous = await watcher.snapshot()
+
+    await StealthUtils.enter_text_async(page, input_selector, question, input_strategy)
+    await asyncio.sleep(random.uniform(0.3, 0.8))
+    await page.keyboard.press("Enter")
+
+    return await watcher.wait_for_answer(previous)
+
+
+async def _ask_notebook(context, notebook: Dict[str, Any], question: str,
+                        semaphore: asyncio.Semaphore, timeout: float,
+                        input_strategy: Optional[str] = None) -> Dict[str, Any]:
+    """Ask one notebook in its own tab (limited by the semaphore, bounded by timeout)"""
+    result = {
+        'notebook_id': notebook.get('id'),
+        'name': notebook.get('name'),
+        'url': notebook['url'],
+    }
+
+    async with semaphore:
+        start = time.time()
+        page = await context.new_page()
+        try:
+            # Per-notebook input policy unless overridden
+            strategy = input_strategy or notebook.get('input_strategy')
+            answer = await asyncio.wait_for(_ask_in_page(page, notebook['url'], question, strategy), timeout)
+            result.update(status='success', answer=answer)
+        except asyncio.TimeoutError:
+            result.update(status='timeout', error=f"No answer within {timeout:.0f} seconds")
+        except Exception as e:
+            result.update(status='error', error=str(e))
+        finally:
+            result['elapsed_seconds'] = round(time.time() - start, 2)
+            try:
+                await page.close()
+            except Exception:
+                pass
+
+    return result
+
+
+async def ask_notebooks(question: str, notebooks: List[Dict[str, Any]], headless: bool = True,
+                        max_concurrent: int = FANOUT_MAX_CONCURRENT,
+                        timeout: float = FANOUT_TIMEOUT_SECONDS,
+                        input_strategy: Optional[str] = None,
+                        cache: Optional[AnswerCache] = None) -> Dict[str, Any]:
+    """
+    Ask the same question in several notebooks concurrently
+
+    Args:
+        question: Question to ask
+        notebooks: Library notebook dicts (need 'url'; 'id' and 'name' are reported)
+        headless: Run browser in headless mode
+        max_concurrent: Maximum tabs working at the same time
+        timeout: Per-notebook timeout in seconds (navigation + answer)
+        input_strategy: Override the notebooks' input policies (see config.INPUT_STRATEGIES)
+        cache: Answer cache to read and fill (None = always ask)
+
+    Returns:
+        Combined result with one entry per notebook, in the given order
+    """
+    start = time.time()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(notebooks)
+
+    # Cached answers need no tab
+    if cache:
+        for idx, notebook in enumerate(notebooks):
+            answer = cache.get(notebook.get('id') or notebook['url'], question)
+            if answer is not None:
+                results[idx] = {
+                    'notebook_id': notebook.get('id'),
+                    'name': notebook.get('name'),
+                    'url': notebook['url'],
+                    'status': 'success',
+                    'answer': answer,
+                    'cached': True,
+                    'elapsed_seconds': 0.0,
+                }
+                print(f"  ⚡ [{notebook.get('id') or notebook['url']}] cached")
+
+    to_ask = [idx for idx, result in enumerate(results) if result is None]
+    if to_ask:
+        await _ask_all(question, notebooks, to_ask, results, headless, max_concurrent, timeout, input_strategy)
+
+    if cache:
+        for idx in to_ask:
+            result = results[idx]
+            if result['status'] == 'success':
+                cache.put(result['notebook_id'] or result['url'], question, result['answer'])
+        cache.flush()
+
+    return {
+        'question': question,
+        'notebooks': len(notebooks),
+        'succeeded': sum(1 for r in results if r['status'] == 'success'),
+        'cached': sum(1 for r in results if r.get('cached')),
+        'elapsed_seconds': round(time.time() - start, 2),
+        'results': results,
+        'follow_up': FOLLOW_UP_REMINDER.strip(),
+    }
+
+
+async def _ask_all(question: str, notebooks: List[Dict[str, Any]], indexes: List[int],
+                   results: List[Optional[Dict[str, Any]]], headless: bool, max_concurrent: int,
+                   timeout: float, input_strategy: Optional[str]):
+    """Ask notebooks[idx] for each index in one shared browser, filling results in place"""
+    async with async_playwright() as playwright:
+        context = await BrowserFactory.launch_persistent_context_async(playwright, headless=headless)
+        try:
+            semaphore = asyncio.Semaphore(max(1, max_concurrent))
+            tasks = {
+                asyncio.ensure_future(
+                    _ask_notebook(context, notebooks[idx], question, semaphore, timeout, input_strategy)
+                ): idx
+                for idx in indexes
+            }
+
+            # Report answers as they come in
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    results[tasks[task]] = result
+                    label = result['notebook_id'] or result['url']
+                    if result['status'] == 'success':
+                        print(f"  ✅ [{label}] {len(result['answer'])} chars in {result['elapsed_seconds']}s")
+                    else:
+                        print(f"  ❌ [{label}] {result['error']}")
+        finally:
+            await context.close()
+
+
+def _select_notebooks(args, library: NotebookLibrary) -> List[Dict[str, Any]]:
+    """Resolve target notebooks from the command line options"""
+    notebooks = []
+    if args.all:
+        notebooks.extend(library.list_notebooks())
+    if args.query:
+        notebooks.extend(library.search_notebooks(args.query))
+    for notebook_id in filter(None, (args.notebook_ids or '').split(',')):
+        notebook = library.get_notebook(notebook_id.strip())
+        if not notebook:
+            raise ValueError(f"Notebook '{notebook_id.strip()}' not found")
+        notebooks.append(notebook)
+    for url in filter(None, (args.notebook_urls or '').split(',')):
+        notebooks.append({'id': None, 'name': None, 'url': url.strip()})
+
+    # Same notebook selected twice -> ask once
+    unique = {}
+    for notebook in notebooks:
+        unique.setdefault(notebook['url'], notebook)
+    return list(unique.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ask several NotebookLM notebooks the same question')
+
+    parser.add_argument('--question', required=True, help='Question to ask')
+    parser.add_argument('--notebook-ids', help='Comma-separated notebook IDs from library')
+    parser.add_argument('--notebook-urls', help='Comma-separated NotebookLM notebook URLs')
+    parser.add_argument('--query', help='All library notebooks matching this search')
+    parser.add_argument('--all', action='store_true', help='All library notebooks')
+    parser.add_argument('--max-concurrent', type=int, default=FANOUT_MAX_CONCURRENT,
+                        help='Maximum notebooks asked at the same time')
+    parser.add_argument('--timeout', type=float, default=FANOUT_TIMEOUT_SECONDS,
+                        help='Per-notebook timeout in seconds')
+    parser.add_argument('--input-strategy', choices=INPUT_STRATEGIES,
+                        help='How the question is entered (default: each notebook\'s policy)')
+    parser.add_argument('--no-cache', action='store_true', help='Always ask NotebookLM, ignore cached answers')
+    parser.add_argument('--output', help='Write JSON result to this file instead of stdout')
+    parser.add_argument('--show-browser', action='store_true', help='Show browser')
+
+    args = parser.parse_args()
+
+    # Keep stdout clean for the JSON result
+    with contextlib.redirect_stdout(sys.stderr):
+        if not AuthManager().is_authenticated():
+            print("⚠️ Not authenticated. Run: python auth_manager.py setup")
+            return 1
+
+        from session_manager import SessionManagerClient
+        if SessionManagerClient().is_running():
+            print("❌ Session manager is running and holds the browser profile.")
+            print("   Stop it first: python scripts/run.py session_manager.py stop")
+            return 1
+
+        try:
+            notebooks = _select_notebooks(args, NotebookLibrary())
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+        if not notebooks:
+            print("❌ No notebooks selected. Use --notebook-ids, --notebook-urls, --query or --all")
+            return 1
+
+        print(f"💬 Asking {len(notebooks)} notebooks: {args.question}")
+        print(f"  ⏳ Up to {args.max_concurrent} at a time, {args.timeout:.0f}s per notebook")
+        result = asyncio.run(ask_notebooks(
+            question=args.question,
+            notebooks=notebooks,
+            headless=not args.show_browser,
+            max_concurrent=args.max_concurrent,
+            timeout=args.timeout,
+            input_strategy=args.input_strategy,
+            cache=None if args.no_cache else AnswerCache()
+        ))
+        print(f"✅ {result['succeeded']}/{result['notebooks']} answered in {result['elapsed_seconds']}s")
+
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(output + '\n', encoding='utf-8')
+        print(f"💾 Saved to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+    return 0 if result['succeeded'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
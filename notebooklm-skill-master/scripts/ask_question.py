@@ -10,10 +10,12 @@ See: https://github.com/microsoft/playwright/issues/36139
 """
 
 import argparse
+import contextlib
+import json
 import sys
-import time
 import re
 from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
 
 from patchright.sync_api import sync_playwright
 
@@ -22,8 +24,10 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from auth_manager import AuthManager
 from notebook_manager import NotebookLibrary
-from config import QUERY_INPUT_SELECTORS, RESPONSE_SELECTORS
+from config import QUERY_INPUT_SELECTORS, INPUT_STRATEGIES
 from browser_utils import BrowserFactory, StealthUtils
+from answer_watcher import AnswerWatcher, DeltaEncoder
+from answer_cache import AnswerCache, cache_key_for
 
 
 # Follow-up reminder (adapted from MCP server for stateless operation)
@@ -37,26 +41,28 @@ FOLLOW_UP_REMINDER = (
 )
 
 
-def ask_notebooklm(question: str, notebook_url: str, headless: bool = True) -> str:
+def stream_notebooklm(question: str, notebook_url: str, headless: bool = True,
+                      input_strategy: Optional[str] = None) -> Iterator[Dict[str, Any]]:
     """
-    Ask a question to NotebookLM
+    Ask a question to NotebookLM and yield the answer while it is generated
 
     Args:
         question: Question to ask
         notebook_url: NotebookLM notebook URL
         headless: Run browser in headless mode
+        input_strategy: human, burst, fast or auto (see config.INPUT_STRATEGIES)
 
-    Returns:
-        Answer text from NotebookLM
-    """
-    auth = AuthManager()
+    Yields:
+        {'type': 'delta', 'text': ...} for appended answer text,
+        {'type': 'replace', 'text': ...} if NotebookLM rewrote the answer,
+        then {'type': 'done', 'answer': ...} with the follow-up reminder appended
 
-    if not auth.is_authenticated():
-        print("⚠️ Not authenticated. Run: python auth_manager.py setup")
-        return None
-
-    print(f"💬 Asking: {question}")
-    print(f"📚 Notebook: {notebook_url}")
+    Raises:
+        RuntimeError: Not authenticated or notebook not usable
+        TimeoutError: No complete answer in time
+    """
+    if not AuthManager().is_authenticated():
+        raise RuntimeError("Not authenticated. Run: python auth_manager.py setup")
 
     playwright = None
     context = None
@@ -97,80 +103,35 @@ def ask_notebooklm(question: str, notebook_url: str, headless: bool = True) -> s
                 continue
 
         if not query_element:
-            print("  ❌ Could not find query input")
-            return None
+            raise RuntimeError("Could not find query input")
+
+        # Watch the answer area before submitting
+        watcher = AnswerWatcher(page)
+        previous = watcher.snapshot()
+
+        # Enter question (human-like typing, chunks or one input event)
+        strategy = StealthUtils.resolve_input_strategy(input_strategy, question)
+        print(f"  ⏳ Entering question ({strategy})...")
 
-        # Type question (human-like, fast)
-        print("  ⏳ Typing question...")
-        
         # Use primary selector for typing
         input_selector = QUERY_INPUT_SELECTORS[0]
-        StealthUtils.human_type(page, input_selector, question)
+        StealthUtils.enter_text(page, input_selector, question, strategy)
 
         # Submit
         print("  📤 Submitting...")
         page.keyboard.press("Enter")
 
-        # Small pause
-        StealthUtils.random_delay(500, 1500)
-
-        # Wait for response (MCP approach: poll for stable text)
+        # Wait for response (pushed DOM changes, see answer_watcher.py)
         print("  ⏳ Waiting for answer...")
-
-        answer = None
-        stable_count = 0
-        last_text = None
-        deadline = time.time() + 120  # 2 minutes timeout
-
-        while time.time() < deadline:
-            # Check if NotebookLM is still thinking (most reliable indicator)
-            try:
-                thinking_element = page.query_selector('div.thinking-message')
-                if thinking_element and thinking_element.is_visible():
-                    time.sleep(1)
-                    continue
-            except:
-                pass
-
-            # Try to find response with MCP selectors
-            for selector in RESPONSE_SELECTORS:
-                try:
-                    elements = page.query_selector_all(selector)
-                    if elements:
-                        # Get last (newest) response
-                        latest = elements[-1]
-                        text = latest.inner_text().strip()
-
-                        if text:
-                            if text == last_text:
-                                stable_count += 1
-                                if stable_count >= 3:  # Stable for 3 polls
-                                    answer = text
-                                    break
-                            else:
-                                stable_count = 0
-                                last_text = text
-                except:
-                    continue
-
-            if answer:
-                break
-
-            time.sleep(1)
-
-        if not answer:
-            print("  ❌ Timeout waiting for answer")
-            return None
-
-        print("  ✅ Got answer!")
-        # Add follow-up reminder to encourage Claude to ask more questions
-        return answer + FOLLOW_UP_REMINDER
-
-    except Exception as e:
-        print(f"  ❌ Error: {e}")
-        import traceback
-        traceback.print_exc()
-        return None
+        encoder = DeltaEncoder()
+        for text, complete in watcher.stream(previous):
+            if complete:
+                # Add follow-up reminder to encourage Claude to ask more questions
+                yield {'type': 'done', 'answer': text + FOLLOW_UP_REMINDER}
+                return
+            event = encoder.encode(text)
+            if event:
+                yield event
 
     finally:
         # Always clean up
@@ -187,13 +148,162 @@ def ask_notebooklm(question: str, notebook_url: str, headless: bool = True) -> s
                 pass
 
 
+def ask_notebooklm(question: str, notebook_url: str, headless: bool = True,
+                   input_strategy: Optional[str] = None) -> str:
+    """
+    Ask a question to NotebookLM
+
+    Args:
+        question: Question to ask
+        notebook_url: NotebookLM notebook URL
+        headless: Run browser in headless mode
+        input_strategy: human, burst, fast or auto (see config.INPUT_STRATEGIES)
+
+    Returns:
+        Answer text from NotebookLM
+    """
+    auth = AuthManager()
+
+    if not auth.is_authenticated():
+        print("⚠️ Not authenticated. Run: python auth_manager.py setup")
+        return None
+
+    print(f"💬 Asking: {question}")
+    print(f"📚 Notebook: {notebook_url}")
+
+    try:
+        for event in stream_notebooklm(question, notebook_url, headless, input_strategy):
+            if event['type'] == 'done':
+                print("  ✅ Got answer!")
+                return event['answer']
+
+    except TimeoutError:
+        print("  ❌ Timeout waiting for answer")
+        return None
+
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+def ask_via_session_manager(question: str, notebook_url: str, input_strategy: Optional[str] = None) -> str:
+    """
+    Ask through the session manager daemon (warm tab, chat context kept)
+
+    Returns:
+        Answer text, or None if the daemon is not running or the question failed
+    """
+    from session_manager import SessionManagerClient
+
+    client = SessionManagerClient()
+    if not client.is_running():
+        return None
+
+    print(f"💬 Asking (session manager): {question}")
+    print(f"📚 Notebook: {notebook_url}")
+    try:
+        result = client.ask(question, notebook_url, input_strategy)
+    except OSError as e:
+        result = {'status': 'error', 'error': f"Session manager connection failed: {e}"}
+    if result.get('status') != 'success':
+        print(f"  ❌ Error: {result.get('error')}")
+        return None
+
+    print("  ✅ Got answer!")
+    return result['answer'] + FOLLOW_UP_REMINDER
+
+
+def stream_via_session_manager(question: str, notebook_url: str,
+                               input_strategy: Optional[str] = None) -> Optional[Iterator[Dict[str, Any]]]:
+    """
+    Stream events (see stream_notebooklm) from the session manager daemon
+
+    Returns:
+        Event iterator, or None if the daemon is not running
+    """
+    from session_manager import SessionManagerClient
+
+    client = SessionManagerClient()
+    if not client.is_running():
+        return None
+
+    def events():
+        payload = {'command': 'ask', 'question': question, 'notebook_url': notebook_url,
+                   'input_strategy': input_strategy, 'stream': True}
+        for message in client.stream(payload):
+            if 'type' in message:
+                yield message
+            elif message.get('status') == 'success':
+                yield {'type': 'done', 'answer': message['answer'] + FOLLOW_UP_REMINDER}
+            else:
+                raise RuntimeError(message.get('error'))
+
+    return events()
+
+
+def _without_reminder(answer: str) -> str:
+    """Answer text as cached (follow-up reminder removed)"""
+    return answer[:-len(FOLLOW_UP_REMINDER)] if answer.endswith(FOLLOW_UP_REMINDER) else answer
+
+
+def stream_answer(question: str, notebook_url: str, headless: bool = True, use_daemon: bool = True,
+                  input_strategy: Optional[str] = None, cache: Optional[AnswerCache] = None,
+                  cache_key: Optional[str] = None) -> int:
+    """Print answer events as JSON lines on stdout (progress goes to stderr)"""
+    out = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        print(f"💬 Asking: {question}")
+        print(f"📚 Notebook: {notebook_url}")
+
+        cached = cache.get(cache_key, question) if cache else None
+        if cached is not None:
+            print("  ⚡ Cached answer")
+            cache.flush()
+            event = {'type': 'done', 'answer': cached + FOLLOW_UP_REMINDER, 'cached': True}
+            out.write(json.dumps(event, ensure_ascii=False) + "\n")
+            return 0
+
+        events = stream_via_session_manager(question, notebook_url, input_strategy) if use_daemon else None
+        if events is None:
+            events = stream_notebooklm(question, notebook_url, headless, input_strategy)
+        try:
+            for event in events:
+                if event['type'] == 'done' and cache:
+                    cache.put(cache_key, question, _without_reminder(event['answer']))
+                out.write(json.dumps(event, ensure_ascii=False) + "\n")
+                out.flush()
+        except Exception as e:
+            print(f"  ❌ Error: {e}")
+            out.write(json.dumps({'type': 'error', 'error': str(e)}, ensure_ascii=False) + "\n")
+            return 1
+        finally:
+            if cache:
+                cache.flush()
+    return 0
+
+
 def main():
     parser = argparse.ArgumentParser(description='Ask NotebookLM a question')
 
-    parser.add_argument('--question', required=True, help='Question to ask')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--question', help='Question to ask')
+    target.add_argument('--questions-file', help='Run every question in this file (text lines or JSONL)')
+    parser.add_argument('--output', help='Batch results JSONL / checkpoint (default: <file>.answers.jsonl)')
+    parser.add_argument('--reset-every', type=int, default=0,
+                        help='Batch: start a fresh chat after this many questions (0 = never)')
     parser.add_argument('--notebook-url', help='NotebookLM notebook URL')
     parser.add_argument('--notebook-id', help='Notebook ID from library')
     parser.add_argument('--show-browser', action='store_true', help='Show browser')
+    parser.add_argument('--input-strategy', choices=INPUT_STRATEGIES,
+                        help='How the question is entered (default: notebook policy, else auto by length)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Print the answer as JSON lines while it is generated')
+    parser.add_argument('--no-daemon', action='store_true',
+                        help='Open a fresh browser instead of a session manager tab (the session manager must be stopped)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always ask NotebookLM, ignore cached answers')
 
     args = parser.parse_args()
 
@@ -231,12 +341,68 @@ def main():
                 print("python scripts/run.py notebook_manager.py add --url URL --name NAME --description DESC --topics TOPICS")
             return 1
 
-    # Ask the question
-    answer = ask_notebooklm(
-        question=args.question,
-        notebook_url=notebook_url,
-        headless=not args.show_browser
-    )
+    # Per-notebook input policy unless overridden
+    library = NotebookLibrary()
+    input_strategy = args.input_strategy or library.get_input_strategy(notebook_url)
+
+    from session_manager import SessionManagerClient
+
+    # Prefer the warm session manager when it is running; it also holds the
+    # browser profile, so never fall back to a second browser while it is
+    # alive, even if it is busy or the question failed
+    daemon_running = SessionManagerClient().is_running()
+    if args.no_daemon and daemon_running:
+        print("❌ Session manager is running and holds the browser profile, --no-daemon cannot open a second browser.")
+        print("   Stop it first: python scripts/run.py session_manager.py stop")
+        return 1
+    use_daemon = daemon_running
+
+    # Answer cache (keyed by notebook and normalised question). Only answers
+    # from a fresh chat are cached: the daemon's tab keeps the conversation,
+    # so its answers may depend on earlier questions (batches track this per question)
+    cache = None if args.no_cache else AnswerCache()
+    cache_key = cache_key_for(notebook_url, library)
+
+    if args.questions_file:
+        from batch_runner import run_batch
+        return run_batch(
+            Path(args.questions_file),
+            notebook_url,
+            output=Path(args.output) if args.output else None,
+            headless=not args.show_browser,
+            use_daemon=use_daemon,
+            input_strategy=input_strategy,
+            cache=cache,
+            cache_key=cache_key,
+            reset_every=args.reset_every
+        )
+
+    if use_daemon:
+        cache = None
+
+    if args.stream:
+        return stream_answer(args.question, notebook_url, not args.show_browser, use_daemon,
+                             input_strategy, cache, cache_key)
+
+    answer = None
+    cached = cache.get(cache_key, args.question) if cache else None
+    if cached is not None:
+        print("⚡ Cached answer (use --no-cache to ask again)")
+        answer = cached + FOLLOW_UP_REMINDER
+
+    if answer is None and use_daemon:
+        answer = ask_via_session_manager(args.question, notebook_url, input_strategy)
+    elif answer is None:
+        answer = ask_notebooklm(
+            question=args.question,
+            notebook_url=notebook_url,
+            headless=not args.show_browser,
+            input_strategy=input_strategy
+        )
+    if cache:
+        if answer and cached is None:
+            cache.put(cache_key, args.question, _without_reminder(answer))
+        cache.flush()
 
     if answer:
         print("\n" + "=" * 60)
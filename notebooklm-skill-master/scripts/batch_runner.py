@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Batch Question Runner for NotebookLM
+Runs a list of questions against one notebook in a single browser tab:
+the next question is submitted as soon as the previous answer is complete.
+
+Every result is appended to a JSONL checkpoint, so an interrupted run
+resumes where it stopped (questions already answered are skipped by id,
+failed ones are retried). A throughput report is printed at the end.
+
+The tab keeps the conversation, so the answer cache is only used while the
+chat is fresh: before the first question of our own tab and right after a
+reset (--reset-every 1 makes every question cacheable).
+
+Questions file: one question per line (blank lines and # comments ignored),
+or JSONL with {"question": "...", "id": "..."} objects.
+
+Used by: python ask_question.py --questions-file questions.txt [--output answers.jsonl]
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from answer_cache import AnswerCache
+
+
+def load_questions(path: Path) -> List[Dict[str, Any]]:
+    """Read questions as [{'index', 'id', 'question'}] (id defaults to the index)"""
+    questions = []
+    ids = set()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('{'):
+                item = json.loads(line)
+                question, question_id = item['question'], item.get('id')
+            else:
+                question, question_id = line, None
+            index = len(questions)
+            question_id = question_id if question_id is not None else index
+            if question_id in ids:
+                raise ValueError(f"Duplicate question id: {question_id}")
+            ids.add(question_id)
+            questions.append({'index': index, 'id': question_id, 'question': question})
+    return questions
+
+
+def default_output_path(questions_file: Path) -> Path:
+    return questions_file.with_name(questions_file.stem + '.answers.jsonl')
+
+
+def load_checkpoint(path: Path) -> Set[Any]:
+    """Ids of questions already answered successfully in a previous run"""
+    done = set()
+    if not path.exists():
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Partial last line of an interrupted run
+            if record.get('status') == 'success':
+                done.add(record['id'])
+    return done
+
+
+def _ends_with_newline(path: Path) -> bool:
+    """True for empty files and files whose last line is complete"""
+    with open(path, 'rb') as f:
+        f.seek(0, 2)
+        if f.tell() == 0:
+            return True
+        f.seek(-1, 2)
+        return f.read(1) == b'\n'
+
+
+class _Asker:
+    """Asks questions on one reused tab: the session manager's, or our own BrowserSession"""
+
+    def __init__(self, notebook_url: str, headless: bool, use_daemon: bool):
+        self.notebook_url = notebook_url
+        self.headless = headless
+        self.client = None
+        self.playwright = None
+        self.context = None
+        self.session = None
+
+        if use_daemon:
+            from session_manager import SessionManagerClient
+            client = SessionManagerClient()
+            if client.is_running():
+                print("  🔗 Using session manager")
+                self.client = client
+
+    def _open(self):
+        from patchright.sync_api import sync_playwright
+        from browser_utils import BrowserFactory
+        from browser_session import BrowserSession
+
+        if self.context is None:
+            self.playwright = sync_playwright().start()
+            self.context = BrowserFactory.launch_persistent_context(self.playwright, headless=self.headless)
+        self.session = BrowserSession('batch', self.context, self.notebook_url)
+
+    def ask(self, question: str, input_strategy: Optional[str]) -> Dict[str, Any]:
+        if self.client:
+            return self.client.ask(question, self.notebook_url, input_strategy)
+        if self.session is None or self.session.page.is_closed():
+            self._open()
+        return self.session.ask(question, input_strategy=input_strategy)
+
+    def reset(self):
+        if self.client:
+            self.client.request({'command': 'reset', 'notebook_url': self.notebook_url})
+        elif self.session:
+            self.session.reset()
+
+    def close(self):
+        for close in (lambda: self.session.close(), lambda: self.context.close(), lambda: self.playwright.stop()):
+            try:
+                close()
+            except Exception:
+                pass
+
+
+def run_batch(questions_file: Path, notebook_url: str, output: Optional[Path] = None,
+              headless: bool = True, use_daemon: bool = True, input_strategy: Optional[str] = None,
+              cache: Optional[AnswerCache] = None, cache_key: Optional[str] = None,
+              reset_every: int = 0) -> int:
+    """
+    Run a question file against one notebook
+
+    Args:
+        questions_file: Text or JSONL questions file
+        notebook_url: NotebookLM notebook URL
+        output: JSONL checkpoint (default: <questions>.answers.jsonl)
+        headless: Run browser in headless mode
+        use_daemon: Use a running session manager's tab
+        input_strategy: human, burst, fast or auto (see config.INPUT_STRATEGIES)
+        cache: Answer cache to read and fill (None = always ask)
+        cache_key: Notebook part of the cache key
+        reset_every: Start a fresh chat after this many questions (0 = never)
+
+    Returns:
+        Exit code (0 if every question has an answer)
+    """
+    try:
+        questions = load_questions(questions_file)
+    except ValueError as e:
+        print(f"❌ {questions_file}: {e}")
+        return 1
+    output = output or default_output_path(questions_file)
+    done = load_checkpoint(output)
+    todo = [q for q in questions if q['id'] not in done]
+
+    print(f"📋 {len(questions)} questions, {len(questions) - len(todo)} already answered, {len(todo)} to go")
+    print(f"💾 Checkpoint: {output}")
+    if not todo:
+        return 0
+
+    asker = _Asker(notebook_url, headless, use_daemon)
+    # The daemon's tab may hold earlier questions; our own new tab starts empty
+    fresh = asker.client is None
+    in_chat = 0  # Questions asked since the chat was fresh / reset
+    answered = cached = failed = 0
+    answer_seconds = 0.0
+    start = time.time()
+
+    try:
+        with open(output, 'a', encoding='utf-8') as out:
+            # An interrupted write may have left a partial last line
+            if not _ends_with_newline(output):
+                out.write('\n')
+            for position, item in enumerate(todo, 1):
+                question = item['question']
+                print(f"\n[{position}/{len(todo)}] 💬 {question}")
+                record = {'index': item['index'], 'id': item['id'], 'question': question}
+                question_start = time.time()
+
+                if reset_every and in_chat >= reset_every:
+                    asker.reset()
+                    fresh, in_chat = True, 0
+
+                # Answers depend on the chat so far: only cache fresh-chat answers
+                use_cache = cache is not None and fresh
+                answer = cache.get(cache_key, question) if use_cache else None
+                if answer is not None:
+                    print("  ⚡ Cached answer")
+                    record.update(status='success', answer=answer, cached=True)
+                    cached += 1
+                else:
+                    fresh = False
+                    in_chat += 1
+                    try:
+                        result = asker.ask(question, input_strategy)
+                    except Exception as e:
+                        result = {'status': 'error', 'error': str(e)}
+                    if result.get('status') == 'success':
+                        record.update(status='success', answer=result['answer'])
+                        answered += 1
+                        answer_seconds += time.time() - question_start
+                        if use_cache:
+                            cache.put(cache_key, question, result['answer'])
+                    else:
+                        record.update(status='error', error=result.get('error'))
+                        failed += 1
+
+                record['elapsed_seconds'] = round(time.time() - question_start, 2)
+                out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                out.flush()
+
+    except KeyboardInterrupt:
+        print("\n⏸️ Interrupted - run the same command again to resume")
+
+    finally:
+        asker.close()
+        if cache:
+            cache.flush()
+
+    elapsed = time.time() - start
+    processed = answered + cached + failed
+    print("\n" + "=" * 60)
+    print("📊 Batch Summary:")
+    print(f"  Processed: {processed}/{len(todo)} ({answered} answered, {cached} cached, {failed} failed)")
+    print(f"  Elapsed: {elapsed:.1f}s")
+    if processed:
+        print(f"  Throughput: {processed / elapsed * 60:.1f} questions/min")
+    if answered:
+        print(f"  Average answer time: {answer_seconds / answered:.1f}s")
+    print(f"  Results: {output}")
+    print("=" * 60)
+
+    return 0 if processed == len(todo) and not failed else 1
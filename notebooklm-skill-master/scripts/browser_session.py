@@ -7,7 +7,7 @@ Based on the original NotebookLM API implementation
 
 import time
 import sys
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
 from pathlib import Path
 
 from patchright.sync_api import BrowserContext, Page
@@ -16,6 +16,7 @@ from patchright.sync_api import BrowserContext, Page
 sys.path.insert(0, str(Path(__file__).parent))
 
 from browser_utils import StealthUtils
+from answer_watcher import AnswerWatcher
 
 
 class BrowserSession:
@@ -43,6 +44,7 @@ class BrowserSession:
         self.notebook_url = notebook_url
         self.context = context
         self.page = None
+        self.watcher = None
         self.stealth = StealthUtils()
 
         # Initialize the session
@@ -67,6 +69,9 @@ class BrowserSession:
             # Wait for page to be ready
             self._wait_for_ready()
 
+            # Push answer changes from the page (kept across reloads)
+            self.watcher = AnswerWatcher(self.page)
+
             # Simulate human inspection
             self.stealth.random_mouse_movement(self.page)
             self.stealth.random_delay(300, 600)
@@ -88,12 +93,15 @@ class BrowserSession:
             # Try alternative selector
             self.page.wait_for_selector('textarea[aria-label="Feld für Anfragen"]', timeout=5000, state="visible")
 
-    def ask(self, question: str) -> Dict[str, Any]:
+    def ask(self, question: str, on_update: Optional[Callable[[str], None]] = None,
+            input_strategy: Optional[str] = None) -> Dict[str, Any]:
         """
         Ask a question in this session
 
         Args:
             question: The question to ask
+            on_update: Called with the partial answer text while it is generated
+            input_strategy: human, burst, fast or auto (see config.INPUT_STRATEGIES)
 
         Returns:
             Dict with status, question, answer, session_id
@@ -105,7 +113,7 @@ class BrowserSession:
             print(f"💬 [{self.id}] Asking: {question}")
 
             # Snapshot current answer to detect new response
-            previous_answer = self._snapshot_latest_response()
+            previous_answer = self.watcher.snapshot()
 
             # Find chat input
             chat_input_selector = "textarea.query-box-input"
@@ -115,9 +123,9 @@ class BrowserSession:
                 chat_input_selector = 'textarea[aria-label="Feld für Anfragen"]'
                 self.page.wait_for_selector(chat_input_selector, timeout=5000, state="visible")
 
-            # Click and type with human-like behavior
+            # Click and enter the question (human-like typing, chunks or one input event)
             self.stealth.realistic_click(self.page, chat_input_selector)
-            self.stealth.human_type(self.page, chat_input_selector, question)
+            self.stealth.enter_text(self.page, chat_input_selector, question, input_strategy)
 
             # Small pause before submit
             self.stealth.random_delay(300, 800)
@@ -127,10 +135,9 @@ class BrowserSession:
 
             # Wait for response
             print("  ⏳ Waiting for response...")
-            self.stealth.random_delay(1500, 3000)
 
             # Get new answer
-            answer = self._wait_for_latest_answer(previous_answer)
+            answer = self._wait_for_latest_answer(previous_answer, on_update=on_update)
 
             if not answer:
                 raise Exception("Empty response from NotebookLM")
@@ -154,57 +161,14 @@ class BrowserSession:
                 "session_id": self.id
             }
 
-    def _snapshot_latest_response(self) -> Optional[str]:
-        """Get the current latest response text"""
-        try:
-            # Use correct NotebookLM selector
-            responses = self.page.query_selector_all(".to-user-container .message-text-content")
-            if responses:
-                return responses[-1].inner_text()
-        except Exception:
-            pass
-        return None
-
-    def _wait_for_latest_answer(self, previous_answer: Optional[str], timeout: int = 120) -> str:
-        """Wait for and extract the new answer"""
-        start_time = time.time()
-        last_candidate = None
-        stable_count = 0
-
-        while time.time() - start_time < timeout:
-            # Check if NotebookLM is still thinking (most reliable indicator)
-            try:
-                thinking_element = self.page.query_selector('div.thinking-message')
-                if thinking_element and thinking_element.is_visible():
-                    time.sleep(0.5)
-                    continue
-            except Exception:
-                pass
-
-            try:
-                # Use correct NotebookLM selector
-                responses = self.page.query_selector_all(".to-user-container .message-text-content")
-
-                if responses:
-                    latest_text = responses[-1].inner_text().strip()
-
-                    # Check if it's a new response
-                    if latest_text and latest_text != previous_answer:
-                        # Check if text is stable (3 consecutive polls)
-                        if latest_text == last_candidate:
-                            stable_count += 1
-                            if stable_count >= 3:
-                                return latest_text
-                        else:
-                            stable_count = 1
-                            last_candidate = latest_text
-
-            except Exception:
-                pass
-
-            time.sleep(0.5)
-
-        raise TimeoutError(f"No response received within {timeout} seconds")
+    def _wait_for_latest_answer(self, previous_answer: Dict[str, Any], timeout: int = 120,
+                                on_update: Optional[Callable[[str], None]] = None) -> str:
+        """Wait for and extract the new answer (see answer_watcher.py)"""
+        for text, complete in self.watcher.stream(previous_answer, timeout=timeout):
+            if complete:
+                return text
+            if on_update:
+                on_update(text)
 
     def reset(self):
         """Reset the chat by reloading the page"""
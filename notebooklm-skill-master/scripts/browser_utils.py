@@ -3,13 +3,21 @@ Browser Utilities for NotebookLM Skill
 Handles browser launching, stealth features, and common interactions
 """
 
+import asyncio
 import json
 import time
 import random
 from typing import Optional, List
 
 from patchright.sync_api import Playwright, BrowserContext, Page
-from config import BROWSER_PROFILE_DIR, STATE_FILE, BROWSER_ARGS, USER_AGENT
+from config import (
+    BROWSER_PROFILE_DIR, STATE_FILE, BROWSER_ARGS, USER_AGENT,
+    DEFAULT_INPUT_STRATEGY, INPUT_HUMAN_MAX_CHARS, INPUT_BURST_MAX_CHARS
+)
+
+# Burst typing: characters per chunk and pause between chunks (ms)
+BURST_CHUNK_CHARS = (12, 32)
+BURST_PAUSE_MS = (20, 60)
 
 
 class BrowserFactory:
@@ -28,12 +36,7 @@ class BrowserFactory:
         # Launch persistent context
         context = playwright.chromium.launch_persistent_context(
             user_data_dir=user_data_dir,
-            channel="chrome",  # Use real Chrome
-            headless=headless,
-            no_viewport=True,
-            ignore_default_args=["--enable-automation"],
-            user_agent=USER_AGENT,
-            args=BROWSER_ARGS
+            **BrowserFactory._launch_options(headless)
         )
 
         # Cookie Workaround for Playwright bug #36139
@@ -42,18 +45,57 @@ class BrowserFactory:
 
         return context
 
+    @staticmethod
+    async def launch_persistent_context_async(
+        playwright,
+        headless: bool = True,
+        user_data_dir: str = str(BROWSER_PROFILE_DIR)
+    ):
+        """
+        Async API variant of launch_persistent_context
+        (same profile, anti-detection options and cookie workaround)
+        """
+        context = await playwright.chromium.launch_persistent_context(
+            user_data_dir=user_data_dir,
+            **BrowserFactory._launch_options(headless)
+        )
+
+        cookies = BrowserFactory._load_cookies()
+        if cookies:
+            await context.add_cookies(cookies)
+
+        return context
+
+    @staticmethod
+    def _launch_options(headless: bool) -> dict:
+        return dict(
+            channel="chrome",  # Use real Chrome
+            headless=headless,
+            no_viewport=True,
+            ignore_default_args=["--enable-automation"],
+            user_agent=USER_AGENT,
+            args=BROWSER_ARGS
+        )
+
     @staticmethod
     def _inject_cookies(context: BrowserContext):
         """Inject cookies from state.json if available"""
+        cookies = BrowserFactory._load_cookies()
+        if cookies:
+            context.add_cookies(cookies)
+            # print(f"  🔧 Injected {len(cookies)} cookies from state.json")
+
+    @staticmethod
+    def _load_cookies() -> List[dict]:
+        """Cookies saved in state.json (empty if none)"""
         if STATE_FILE.exists():
             try:
                 with open(STATE_FILE, 'r') as f:
                     state = json.load(f)
-                    if 'cookies' in state and len(state['cookies']) > 0:
-                        context.add_cookies(state['cookies'])
-                        # print(f"  🔧 Injected {len(state['cookies'])} cookies from state.json")
+                    return state.get('cookies') or []
             except Exception as e:
                 print(f"  ⚠️  Could not load state.json: {e}")
+        return []
 
 
 class StealthUtils:
@@ -65,8 +107,7 @@ class StealthUtils:
         time.sleep(random.uniform(min_ms / 1000, max_ms / 1000))
 
     @staticmethod
-    def human_type(page: Page, selector: str, text: str, wpm_min: int = 320, wpm_max: int = 480):
-        """Type with human-like speed"""
+    def _find_input(page: Page, selector: str):
         element = page.query_selector(selector)
         if not element:
             # Try waiting if not immediately found
@@ -74,9 +115,92 @@ class StealthUtils:
                 element = page.wait_for_selector(selector, timeout=2000)
             except:
                 pass
-        
+
         if not element:
             print(f"⚠️ Element not found for typing: {selector}")
+        return element
+
+    @staticmethod
+    def resolve_input_strategy(strategy: Optional[str], text: str) -> str:
+        """Concrete strategy (human/burst/fast) for this text, see INPUT_STRATEGIES"""
+        strategy = strategy or DEFAULT_INPUT_STRATEGY
+        if strategy != 'auto':
+            return strategy
+        if len(text) <= INPUT_HUMAN_MAX_CHARS:
+            return 'human'
+        if len(text) <= INPUT_BURST_MAX_CHARS:
+            return 'burst'
+        return 'fast'
+
+    @staticmethod
+    def enter_text(page: Page, selector: str, text: str, strategy: Optional[str] = None) -> str:
+        """
+        Enter text into an input with the given strategy
+
+        Returns:
+            The strategy that was used
+        """
+        strategy = StealthUtils.resolve_input_strategy(strategy, text)
+        if strategy == 'fast':
+            StealthUtils.fast_fill(page, selector, text)
+        elif strategy == 'burst':
+            StealthUtils.burst_type(page, selector, text)
+        else:
+            StealthUtils.human_type(page, selector, text)
+        return strategy
+
+    @staticmethod
+    async def enter_text_async(page, selector: str, text: str, strategy: Optional[str] = None) -> str:
+        """Async API variant of enter_text"""
+        strategy = StealthUtils.resolve_input_strategy(strategy, text)
+        await page.click(selector)
+        if strategy == 'fast':
+            await page.fill(selector, text)
+        elif strategy == 'burst':
+            for chunk in StealthUtils._chunks(text):
+                await page.keyboard.insert_text(chunk)
+                await asyncio.sleep(random.uniform(*BURST_PAUSE_MS) / 1000)
+        else:
+            await page.type(selector, text, delay=random.uniform(25, 75))
+        return strategy
+
+    @staticmethod
+    def _chunks(text: str) -> List[str]:
+        chunks = []
+        pos = 0
+        while pos < len(text):
+            size = random.randint(*BURST_CHUNK_CHARS)
+            chunks.append(text[pos:pos + size])
+            pos += size
+        return chunks
+
+    @staticmethod
+    def burst_type(page: Page, selector: str, text: str):
+        """Type in chunks of a few words with short pauses"""
+        element = StealthUtils._find_input(page, selector)
+        if not element:
+            return
+
+        element.click()
+        for chunk in StealthUtils._chunks(text):
+            page.keyboard.insert_text(chunk)
+            StealthUtils.random_delay(*BURST_PAUSE_MS)
+
+    @staticmethod
+    def fast_fill(page: Page, selector: str, text: str):
+        """Set the whole text at once (single input event)"""
+        element = StealthUtils._find_input(page, selector)
+        if not element:
+            return
+
+        element.click()
+        element.fill(text)
+
+    @staticmethod
+    def human_type(page: Page, selector: str, text: str, wpm_min: int = 320, wpm_max: int = 480):
+        """Type with human-like speed"""
+        element = StealthUtils._find_input(page, selector)
+        if not element:
             return
 
         # Click to focus
@@ -105,3 +229,13 @@ class StealthUtils:
         StealthUtils.random_delay(100, 300)
         element.click()
         StealthUtils.random_delay(100, 300)
+
+    @staticmethod
+    def random_mouse_movement(page: Page, moves: int = 3):
+        """Move the mouse around the viewport like a user scanning the page"""
+        size = page.viewport_size or page.evaluate("() => ({width: window.innerWidth, height: window.innerHeight})")
+        for _ in range(moves):
+            x = random.uniform(0.1, 0.9) * size['width']
+            y = random.uniform(0.1, 0.9) * size['height']
+            page.mouse.move(x, y, steps=random.randint(5, 15))
+            StealthUtils.random_delay(50, 150)
@@ -42,3 +42,35 @@ USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
 LOGIN_TIMEOUT_MINUTES = 10
 QUERY_TIMEOUT_SECONDS = 120
 PAGE_LOAD_TIMEOUT = 30000
+
+# Session manager daemon
+SESSION_MANAGER_FILE = DATA_DIR / "session_manager.json"  # pid, port and access token
+SESSION_MANAGER_LOG = DATA_DIR / "session_manager.log"
+SESSION_IDLE_TIMEOUT = 900  # Close a notebook tab after 15 minutes without questions
+SESSION_MAX_TABS = 5  # Warm notebook tabs kept open (least recently used is closed)
+SESSION_SHUTDOWN_AFTER = 3600  # Stop the daemon after 1 hour without requests
+SESSION_REQUEST_TIMEOUT = 10  # Seconds a client may take to send its request line
+
+# Multi-notebook fan-out (ask_notebooks.py)
+FANOUT_MAX_CONCURRENT = 4  # Tabs working at the same time
+FANOUT_TIMEOUT_SECONDS = QUERY_TIMEOUT_SECONDS + 60  # Per notebook: page load + answer
+
+# Answer completion: no DOM change for this long after the thinking indicator is gone (ms).
+# NotebookLM keeps writing after the indicator disappears and pauses between chunks,
+# so this matches the old "stable for 3 one-second polls" check rather than the event latency
+ANSWER_QUIET_MS = 3000
+
+# Question input strategies (StealthUtils.enter_text)
+#   human - per-character typing with pauses (~50 ms/char, 500 chars ≈ 25 s)
+#   burst - chunks of 12-32 characters, short pauses (500 chars ≈ 1 s)
+#   fast  - whole text at once with a single input event
+#   auto  - human up to INPUT_HUMAN_MAX_CHARS, burst up to INPUT_BURST_MAX_CHARS, fast above
+INPUT_STRATEGIES = ('auto', 'human', 'burst', 'fast')
+DEFAULT_INPUT_STRATEGY = 'auto'  # Used when neither --input-strategy nor the notebook sets one
+INPUT_HUMAN_MAX_CHARS = 80
+INPUT_BURST_MAX_CHARS = 300
+
+# Answer cache (answer_cache.py)
+ANSWER_CACHE_FILE = DATA_DIR / "answer_cache.json"
+ANSWER_CACHE_TTL_SECONDS = 24 * 3600  # Re-ask after a day (sources may have changed)
+ANSWER_CACHE_MAX_ENTRIES = 500  # Least recently used entries are evicted beyond this
@@ -13,6 +13,9 @@ from pathlib import Path
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 
+from config import INPUT_STRATEGIES, DEFAULT_INPUT_STRATEGY
+from answer_cache import AnswerCache
+
 
 class NotebookLibrary:
     """Manages a collection of NotebookLM notebooks with metadata"""
@@ -156,7 +159,8 @@ class NotebookLibrary:
         content_types: Optional[List[str]] = None,
         use_cases: Optional[List[str]] = None,
         tags: Optional[List[str]] = None,
-        url: Optional[str] = None
+        url: Optional[str] = None,
+        input_strategy: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Update notebook metadata
@@ -188,6 +192,10 @@ class NotebookLibrary:
             notebook['tags'] = tags
         if url is not None:
             notebook['url'] = url
+        if input_strategy is not None:
+            if input_strategy not in INPUT_STRATEGIES:
+                raise ValueError(f"Unknown input strategy: {input_strategy}")
+            notebook['input_strategy'] = input_strategy
 
         notebook['updated_at'] = datetime.now().isoformat()
 
@@ -251,6 +259,13 @@ class NotebookLibrary:
         print(f"✅ Activated notebook: {notebook['name']}")
         return notebook
 
+    def get_input_strategy(self, notebook_url: str) -> str:
+        """Input strategy policy for a notebook URL (default if not in library or not set)"""
+        for notebook in self.notebooks.values():
+            if notebook['url'] == notebook_url:
+                return notebook.get('input_strategy') or DEFAULT_INPUT_STRATEGY
+        return DEFAULT_INPUT_STRATEGY
+
     def get_active_notebook(self) -> Optional[Dict[str, Any]]:
         """Get the currently active notebook"""
         if self.active_notebook_id:
@@ -320,6 +335,16 @@ def main():
     add_parser.add_argument('--use-cases', help='Comma-separated use cases')
     add_parser.add_argument('--tags', help='Comma-separated tags')
 
+    # Update command
+    update_parser = subparsers.add_parser('update', help='Update a notebook')
+    update_parser.add_argument('--id', required=True, help='Notebook ID')
+    update_parser.add_argument('--name', help='Display name')
+    update_parser.add_argument('--description', help='Description')
+    update_parser.add_argument('--topics', help='Comma-separated topics')
+    update_parser.add_argument('--url', help='NotebookLM URL')
+    update_parser.add_argument('--input-strategy', choices=INPUT_STRATEGIES,
+                               help='How questions are entered (human, burst, fast or auto by length)')
+
     # List command
     subparsers.add_parser('list', help='List all notebooks')
 
@@ -336,7 +361,10 @@ def main():
     remove_parser.add_argument('--id', required=True, help='Notebook ID')
 
     # Stats command
-    subparsers.add_parser('stats', help='Show library statistics')
+    subparsers.add_parser('stats', help='Show library and answer cache statistics')
+
+    # Clear cache command
+    subparsers.add_parser('clear-cache', help='Remove all cached answers')
 
     args = parser.parse_args()
 
@@ -359,6 +387,18 @@ def main():
         )
         print(json.dumps(notebook, indent=2))
 
+    elif args.command == 'update':
+        topics = [t.strip() for t in args.topics.split(',')] if args.topics else None
+        notebook = library.update_notebook(
+            args.id,
+            name=args.name,
+            description=args.description,
+            topics=topics,
+            url=args.url,
+            input_strategy=args.input_strategy
+        )
+        print(json.dumps(notebook, indent=2))
+
     elif args.command == 'list':
         notebooks = library.list_notebooks()
         if notebooks:
@@ -369,6 +409,8 @@ def main():
                 print(f"     ID: {notebook['id']}")
                 print(f"     Topics: {', '.join(notebook['topics'])}")
                 print(f"     Uses: {notebook['use_count']}")
+                if notebook.get('input_strategy'):
+                    print(f"     Input: {notebook['input_strategy']}")
         else:
             print("📚 Library is empty. Add notebooks with: notebook_manager.py add")
 
@@ -402,6 +444,19 @@ def main():
             print(f"  Most used: {stats['most_used_notebook']['name']} ({stats['most_used_notebook']['use_count']} uses)")
         print(f"  Library path: {stats['library_path']}")
 
+        cache_stats = AnswerCache().get_stats()
+        print("\n⚡ Answer Cache:")
+        print(f"  Entries: {cache_stats['entries']}/{cache_stats['max_entries']} ({cache_stats['expired']} expired)")
+        print(f"  Hits: {cache_stats['hits']}, misses: {cache_stats['misses']} "
+              f"(hit rate {cache_stats['hit_rate']:.0%})")
+        print(f"  Stored: {cache_stats['stores']}, evicted: {cache_stats['evictions']}")
+        print(f"  TTL: {cache_stats['ttl_seconds'] / 3600:g}h")
+        print(f"  Cache path: {cache_stats['cache_path']} ({cache_stats['size_bytes'] / 1024:.1f} KB)")
+
+    elif args.command == 'clear-cache':
+        removed = AnswerCache().clear()
+        print(f"✅ Removed {removed} cached answers")
+
     else:
         parser.print_help()
 
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+Session Manager for NotebookLM
+Long-lived daemon that keeps one browser context open with a pool of warm
+BrowserSession tabs (one per notebook), so follow-up questions skip the
+browser launch, navigation and page-ready wait (10-20 s per question).
+
+The CLI talks to the daemon over a local socket (127.0.0.1, random port).
+The port and a per-run access token are written to DATA_DIR/session_manager.json
+(readable only by the current user). Protocol: one JSON request line per
+connection, answered by JSON lines; the last line always carries "status".
+An ask with "stream": true first sends delta/replace events as the answer grows.
+
+Usage:
+    python session_manager.py start [--show-browser] [--idle-timeout 900]
+    python session_manager.py status
+    python session_manager.py ask --question "..." [--notebook-id ID | --notebook-url URL]
+    python session_manager.py reset [--notebook-id ID | --notebook-url URL]
+    python session_manager.py stop
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import secrets
+import socket
+import socketserver
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from answer_watcher import DeltaEncoder
+from config import (
+    DATA_DIR, SESSION_MANAGER_FILE, SESSION_MANAGER_LOG,
+    SESSION_IDLE_TIMEOUT, SESSION_MAX_TABS, SESSION_SHUTDOWN_AFTER, SESSION_REQUEST_TIMEOUT,
+    QUERY_TIMEOUT_SECONDS,
+    INPUT_STRATEGIES
+)
+
+
+def session_id_for(notebook_url: str) -> str:
+    """Stable short session id for a notebook URL"""
+    return hashlib.sha1(notebook_url.encode('utf-8')).hexdigest()[:8]
+
+
+class SessionPool:
+    """
+    Pool of BrowserSession tabs keyed by notebook URL, sharing one context.
+
+    All methods must be called from the thread that created the pool
+    (the Playwright sync API is not thread-safe).
+    """
+
+    def __init__(self, headless: bool = True, idle_timeout: int = SESSION_IDLE_TIMEOUT,
+                 max_tabs: int = SESSION_MAX_TABS):
+        from patchright.sync_api import sync_playwright
+        from browser_utils import BrowserFactory
+
+        self.idle_timeout = idle_timeout
+        self.max_tabs = max_tabs
+        self.sessions: Dict[str, Any] = {}
+        self.started_at = time.time()
+        self.questions = 0
+
+        self.playwright = sync_playwright().start()
+        self.context = BrowserFactory.launch_persistent_context(self.playwright, headless=headless)
+
+    def get(self, notebook_url: str):
+        """Get the warm session for a notebook, opening a tab if needed"""
+        from browser_session import BrowserSession
+
+        session = self.sessions.get(notebook_url)
+        if session is not None and not session.page.is_closed():
+            return session
+        if session is not None:
+            self.close(notebook_url)
+
+        # Make room: drop the least recently used tab
+        while len(self.sessions) >= self.max_tabs:
+            oldest = min(self.sessions.values(), key=lambda s: s.last_activity)
+            self.close(oldest.notebook_url)
+
+        session = BrowserSession(session_id_for(notebook_url), self.context, notebook_url)
+        self.sessions[notebook_url] = session
+        return session
+
+    def ask(self, notebook_url: str, question: str, on_update=None,
+            input_strategy: Optional[str] = None) -> Dict[str, Any]:
+        """Ask in the notebook's warm tab (reopens the tab once if it broke)"""
+        from notebook_manager import NotebookLibrary
+
+        self.questions += 1
+        # Per-notebook input policy unless the request overrides it
+        input_strategy = input_strategy or NotebookLibrary().get_input_strategy(notebook_url)
+        result = self.get(notebook_url).ask(question, on_update, input_strategy)
+        if result.get('status') != 'success' and self.sessions[notebook_url].page.is_closed():
+            self.close(notebook_url)
+            result = self.get(notebook_url).ask(question, on_update, input_strategy)
+        return result
+
+    def reset(self, notebook_url: str) -> int:
+        session = self.sessions.get(notebook_url)
+        return session.reset() if session else 0
+
+    def close(self, notebook_url: str):
+        session = self.sessions.pop(notebook_url, None)
+        if session:
+            session.close()
+
+    def expire_idle(self) -> int:
+        """Close tabs idle for longer than idle_timeout"""
+        expired = [url for url, s in self.sessions.items() if s.is_expired(self.idle_timeout)]
+        for url in expired:
+            self.close(url)
+        return len(expired)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            'pid': os.getpid(),
+            'uptime_seconds': time.time() - self.started_at,
+            'questions': self.questions,
+            'idle_timeout': self.idle_timeout,
+            'max_tabs': self.max_tabs,
+            'sessions': [s.get_info() for s in self.sessions.values()],
+        }
+
+    def shutdown(self):
+        for url in list(self.sessions):
+            try:
+                self.close(url)
+            except Exception as e:
+                print(f"  ⚠️ Error closing session: {e}")
+        for resource in (self.context, self.playwright):
+            try:
+                resource.close() if resource is self.context else resource.stop()
+            except Exception:
+                pass
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handles one JSON request line"""
+
+    # Socket timeout: a client that connects and never sends its request
+    # must not block the single-threaded daemon
+    timeout = SESSION_REQUEST_TIMEOUT
+
+    def handle(self):
+        try:
+            line = self.rfile.readline()
+        except OSError:
+            return  # Timed out or disconnected before sending a request
+        if not line.strip():
+            return  # Liveness probe (see SessionManagerClient.is_running)
+        try:
+            request = json.loads(line.decode('utf-8'))
+        except ValueError:
+            request = None
+        if not isinstance(request, dict):
+            self._reply({'status': 'error', 'error': 'Invalid JSON request (expected an object)'})
+            return
+
+        if not secrets.compare_digest(str(request.get('token', '')), self.server.token):
+            self._reply({'status': 'error', 'error': 'Invalid token'})
+            return
+
+        self.server.last_request = time.time()
+        try:
+            self.server.dispatch(request, self._reply)
+        except Exception as e:
+            self._reply({'status': 'error', 'error': f'{type(e).__name__}: {e}'})
+
+    def _reply(self, message: Dict[str, Any]):
+        try:
+            self.wfile.write((json.dumps(message) + '\n').encode('utf-8'))
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client stopped waiting
+
+
+class SessionManagerServer(socketserver.TCPServer):
+    """
+    Single-threaded daemon: requests are served one at a time on the Playwright thread.
+    Connections made while a question is being answered wait in the listen queue.
+    """
+
+    allow_reuse_address = True
+    request_queue_size = 16
+
+    def __init__(self, pool: SessionPool, shutdown_after: int = SESSION_SHUTDOWN_AFTER):
+        super().__init__(('127.0.0.1', 0), _RequestHandler)
+        self.pool = pool
+        self.token = secrets.token_hex(16)
+        self.shutdown_after = shutdown_after
+        self.last_request = time.time()
+        self.running = True
+        # Wake up periodically to expire idle tabs
+        self.timeout = 5
+
+    def dispatch(self, request: Dict[str, Any], reply):
+        command = request.get('command')
+        if command == 'ask':
+            encoder = DeltaEncoder()
+
+            def send_partial(text):
+                event = encoder.encode(text)
+                if event:
+                    reply(event)
+
+            # Partial answers go out as delta/replace lines before the result
+            on_update = send_partial if request.get('stream') else None
+            reply(self.pool.ask(request['notebook_url'], request['question'], on_update,
+                                request.get('input_strategy')))
+        elif command == 'reset':
+            cleared = self.pool.reset(request['notebook_url'])
+            reply({'status': 'success', 'cleared_messages': cleared})
+        elif command == 'close':
+            self.pool.close(request['notebook_url'])
+            reply({'status': 'success'})
+        elif command == 'status':
+            reply({'status': 'success', **self.pool.info()})
+        elif command == 'stop':
+            self.running = False
+            reply({'status': 'success'})
+        else:
+            reply({'status': 'error', 'error': f'Unknown command: {command}'})
+
+    def serve(self):
+        while self.running:
+            self.handle_request()
+            expired = self.pool.expire_idle()
+            if expired:
+                print(f"⏱️ Closed {expired} idle session(s)")
+            if self.shutdown_after and time.time() - self.last_request > self.shutdown_after:
+                print("⏱️ No requests for a while, shutting down")
+                break
+
+
+def _write_state(server: SessionManagerServer):
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    state = {
+        'pid': os.getpid(),
+        'host': server.server_address[0],
+        'port': server.server_address[1],
+        'token': server.token,
+        'started_at': time.time(),
+    }
+    fd = os.open(str(SESSION_MANAGER_FILE), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(state, f)
+
+
+def serve(headless: bool = True, idle_timeout: int = SESSION_IDLE_TIMEOUT,
+          max_tabs: int = SESSION_MAX_TABS, shutdown_after: int = SESSION_SHUTDOWN_AFTER):
+    """Run the daemon in the foreground"""
+    from auth_manager import AuthManager
+
+    if not AuthManager().is_authenticated():
+        print("⚠️ Not authenticated. Run: python auth_manager.py setup")
+        return 1
+
+    print("🚀 Starting session manager...")
+    pool = SessionPool(headless=headless, idle_timeout=idle_timeout, max_tabs=max_tabs)
+    server = SessionManagerServer(pool, shutdown_after)
+    try:
+        _write_state(server)
+        print(f"✅ Session manager listening on {server.server_address[0]}:{server.server_address[1]}")
+        server.serve()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("🛑 Stopping session manager...")
+        server.server_close()
+        pool.shutdown()
+        try:
+            SESSION_MANAGER_FILE.unlink()
+        except OSError:
+            pass
+    return 0
+
+
+class SessionManagerClient:
+    """Client for the session manager daemon"""
+
+    def __init__(self):
+        self.state = self._load_state()
+
+    @staticmethod
+    def _load_state() -> Optional[Dict[str, Any]]:
+        try:
+            with open(SESSION_MANAGER_FILE, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_running(self) -> bool:
+        """
+        Check whether the daemon process is alive and listening.
+
+        Does not wait for a reply: a daemon busy answering a question is
+        still running (and still holds the browser profile).
+        """
+        if not self.state:
+            return False
+        if os.name != 'nt':
+            try:
+                os.kill(self.state['pid'], 0)
+            except ProcessLookupError:
+                return False
+            except PermissionError:
+                pass
+        try:
+            socket.create_connection((self.state['host'], self.state['port']), timeout=2).close()
+        except OSError:
+            return False
+        return True
+
+    def status(self, timeout: float = 5) -> Optional[Dict[str, Any]]:
+        """Daemon status, or None while it is busy with another request"""
+        try:
+            return self.request({'command': 'status'}, timeout=timeout)
+        except socket.timeout:
+            return None
+
+    def stream(self, payload: Dict[str, Any], timeout: float = QUERY_TIMEOUT_SECONDS + 60) -> Iterator[Dict[str, Any]]:
+        """Send a request and yield every JSON line of the reply"""
+        if not self.state:
+            raise ConnectionRefusedError("Session manager is not running")
+        payload = {**payload, 'token': self.state['token']}
+        with socket.create_connection((self.state['host'], self.state['port']), timeout=timeout) as sock:
+            sock.sendall((json.dumps(payload) + '\n').encode('utf-8'))
+            with sock.makefile('r', encoding='utf-8') as reply:
+                for line in reply:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def request(self, payload: Dict[str, Any], timeout: float = QUERY_TIMEOUT_SECONDS + 60) -> Dict[str, Any]:
+        """Send a request and return the final reply line"""
+        result: Dict[str, Any] = {'status': 'error', 'error': 'Empty reply from session manager'}
+        for message in self.stream(payload, timeout):
+            result = message
+        return result
+
+    def ask(self, question: str, notebook_url: str, input_strategy: Optional[str] = None) -> Dict[str, Any]:
+        return self.request({'command': 'ask', 'question': question, 'notebook_url': notebook_url,
+                             'input_strategy': input_strategy})
+
+
+def start_daemon(headless: bool = True, idle_timeout: int = SESSION_IDLE_TIMEOUT,
+                 max_tabs: int = SESSION_MAX_TABS, shutdown_after: int = SESSION_SHUTDOWN_AFTER,
+                 wait: float = 60) -> bool:
+    """Start the daemon in the background and wait until it answers"""
+    if SessionManagerClient().is_running():
+        print("✅ Session manager already running")
+        return True
+
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    cmd = [sys.executable, str(Path(__file__).resolve()), 'serve',
+           '--idle-timeout', str(idle_timeout), '--max-tabs', str(max_tabs),
+           '--shutdown-after', str(shutdown_after)]
+    if not headless:
+        cmd.append('--show-browser')
+
+    kwargs: Dict[str, Any] = {}
+    if os.name == 'nt':
+        kwargs['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs['start_new_session'] = True
+
+    with open(SESSION_MANAGER_LOG, 'a') as log:
+        process = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, **kwargs)
+
+    print("🚀 Starting session manager...")
+    deadline = time.time() + wait
+    while time.time() < deadline:
+        if process.poll() is not None:
+            print(f"❌ Session manager exited, see {SESSION_MANAGER_LOG}")
+            return False
+        if SessionManagerClient().is_running():
+            print(f"✅ Session manager running (pid {process.pid})")
+            return True
+        time.sleep(0.5)
+
+    print(f"❌ Session manager did not start within {wait:.0f}s, see {SESSION_MANAGER_LOG}")
+    return False
+
+
+def _resolve_notebook_url(args) -> Optional[str]:
+    from notebook_manager import NotebookLibrary
+
+    if getattr(args, 'notebook_url', None):
+        return args.notebook_url
+    library = NotebookLibrary()
+    notebook = library.get_notebook(args.notebook_id) if args.notebook_id else library.get_active_notebook()
+    if not notebook:
+        print("❌ Notebook not found. Use --notebook-url, --notebook-id or activate a notebook")
+        return None
+    return notebook['url']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage persistent NotebookLM browser sessions')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_daemon_options(sub):
+        sub.add_argument('--show-browser', action='store_true', help='Show browser')
+        sub.add_argument('--idle-timeout', type=int, default=SESSION_IDLE_TIMEOUT,
+                         help='Close a notebook tab after this many idle seconds')
+        sub.add_argument('--max-tabs', type=int, default=SESSION_MAX_TABS, help='Maximum warm notebook tabs')
+        sub.add_argument('--shutdown-after', type=int, default=SESSION_SHUTDOWN_AFTER,
+                         help='Stop the daemon after this many seconds without requests (0 = never)')
+
+    add_daemon_options(subparsers.add_parser('start', help='Start the daemon in the background'))
+    add_daemon_options(subparsers.add_parser('serve', help='Run the daemon in the foreground'))
+    subparsers.add_parser('stop', help='Stop the daemon')
+    subparsers.add_parser('status', help='Show daemon and session status')
+
+    for name, help_text in (('ask', 'Ask a question in a warm session'), ('reset', 'Clear a notebook chat')):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument('--notebook-id', help='Notebook ID from library')
+        sub.add_argument('--notebook-url', help='NotebookLM notebook URL')
+        if name == 'ask':
+            sub.add_argument('--question', required=True, help='Question to ask')
+            sub.add_argument('--input-strategy', choices=INPUT_STRATEGIES,
+                             help='How the question is entered (default: notebook policy)')
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        return serve(not args.show_browser, args.idle_timeout, args.max_tabs, args.shutdown_after)
+    if args.command == 'start':
+        return 0 if start_daemon(not args.show_browser, args.idle_timeout, args.max_tabs, args.shutdown_after) else 1
+
+    client = SessionManagerClient()
+    if not client.is_running():
+        print("ℹ️ Session manager is not running. Start it with: python scripts/run.py session_manager.py start")
+        return 0 if args.command in ('stop', 'status') else 1
+
+    if args.command == 'stop':
+        client.request({'command': 'stop'})
+        print("✅ Session manager stopped")
+    elif args.command == 'status':
+        info = client.status()
+        if info is None:
+            print(f"⏳ Session manager running (pid {client.state['pid']}), busy answering a question")
+            return 0
+        print(f"✅ Session manager running (pid {info['pid']}, up {info['uptime_seconds'] / 60:.0f} min, "
+              f"{info['questions']} questions)")
+        print(f"  Idle timeout: {info['idle_timeout']}s, max tabs: {info['max_tabs']}")
+        for session in info['sessions']:
+            print(f"  [{session['id']}] {session['notebook_url']}")
+            print(f"      {session['message_count']} messages, idle {session['inactive_seconds']:.0f}s")
+        if not info['sessions']:
+            print("  No open sessions")
+    else:
+        notebook_url = _resolve_notebook_url(args)
+        if not notebook_url:
+            return 1
+        if args.command == 'reset':
+            result = client.request({'command': 'reset', 'notebook_url': notebook_url})
+            print(f"✅ Session reset (cleared {result.get('cleared_messages', 0)} messages)")
+        else:
+            result = client.ask(args.question, notebook_url, args.input_strategy)
+            if result.get('status') != 'success':
+                print(f"❌ {result.get('error')}")
+                return 1
+            print(result['answer'])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())